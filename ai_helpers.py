@@ -3,6 +3,9 @@
 from typing import List, Dict
 import pandas as pd
 
+from instrumentation import timed
+from units import REGISTRY as UNIT_REGISTRY, UNKNOWN as UNKNOWN_UNIT
+
 
 class AISuggester:
     """
@@ -14,6 +17,7 @@ class AISuggester:
         # Add any API keys / client initialization you need here
         pass
 
+    @timed("ai.suggest_dsr_items")
     def suggest_dsr_items(
         self,
         boq_description: str,
@@ -47,7 +51,12 @@ class AISuggester:
 
         mask = dsr_df["description"].str.contains(boq_description, case=False, na=False)
         if unit:
-            mask |= dsr_df["unit"].str.lower().eq(unit.lower())
+            uid = UNIT_REGISTRY.unit_id(unit)
+            if uid == UNKNOWN_UNIT:
+                mask |= dsr_df["unit"].str.lower().eq(unit.lower())
+            else:
+                unit_ids = dsr_df["unit_id"] if "unit_id" in dsr_df else UNIT_REGISTRY.encode(dsr_df["unit"])
+                mask |= unit_ids == uid
 
         candidates = dsr_df[mask].head(top_n)
 
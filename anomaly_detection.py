@@ -0,0 +1,216 @@
+# anomaly_detection.py
+
+"""
+Quantity plausibility checks for whole estimates.
+
+A typo such as 100 m for 10.0 m passes the number_input bounds in Tab 1
+and the max(..., 0) clamps in IS1200Engine. Two vectorised checks catch
+most of them:
+
+Row outliers (within the estimate)
+    Each row's length / breadth / depth / quantity / rate is compared with
+    the other rows of the same DSR item. Values are taken in log10, where a
+    slipped decimal point is a fixed distance (1.0) whatever the size, and
+    a row is flagged when
+        |robust z| = 0.6745 · |x − median| / MAD  >  Z_LIMIT, or
+        x lies outside the IQR fences Q1 − IQR_K·IQR … Q3 + IQR_K·IQR,
+    provided the item has at least MIN_PEERS rows and the value is at
+    least MIN_FACTOR times off the median (so identical peers do not turn
+    a 10.0 vs 10.1 difference into an "outlier").
+
+Estimate ratios (against earlier estimates)
+    Per-category ratios (steel kg per cum of RCC, plaster sqm per cum of
+    brickwork, ...) and cost per sqm of plinth area are compared with the
+    same metrics of the estimates in an EstimateProfile – a JSON-lines
+    file the app appends to when an estimate is recorded as a reference.
+    Robust z and IQR fences again, once MIN_HISTORY estimates exist.
+
+Both run on the items frame in one groupby / one column-wise pass, so a
+100k-row estimate is checked in well under a second, on every save
+(estimate revision).
+"""
+
+from __future__ import annotations
+
+import json
+from dataclasses import dataclass, field
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, Iterable, List, Mapping, Optional
+
+import numpy as np
+import pandas as pd
+
+ROW_FIELDS = ("length", "breadth", "depth", "quantity", "rate")
+Z_LIMIT = 3.5          # Iglewicz & Hoaglin's cut-off for the modified z-score
+IQR_K = 3.0            # "far out" fences
+MAD_SCALE = 0.6745
+MIN_PEERS = 5
+MIN_FACTOR = 2.0
+MIN_HISTORY = 5
+
+# metric → (numerator category, denominator category); quantities summed per category
+RATIO_METRICS = {
+    "Steel per cum of RCC (kg/cum)": ("reinforcement", "rcc_concrete"),
+    "Formwork per cum of RCC (sqm/cum)": ("formwork", "rcc_concrete"),
+    "Plaster per cum of brickwork (sqm/cum)": ("plaster", "brickwork"),
+    "Concrete per cum of excavation": ("rcc_concrete", "earthwork"),
+}
+COST_PER_PLINTH = "Cost per sqm of plinth area (₹/sqm)"
+
+HISTORY_FILE = Path(__file__).resolve().parent / "history" / "estimate_metrics.jsonl"
+
+FLAG_COLUMNS = ["id", "item", "field", "value", "median", "z", "reason"]
+METRIC_COLUMNS = ["metric", "value", "median", "q1", "q3", "z", "estimates", "flagged"]
+
+
+def robust_z(x: np.ndarray, median: np.ndarray, mad: np.ndarray) -> np.ndarray:
+    """Modified z-score; ±inf where the peers agree exactly (MAD 0) and x differs."""
+    dev = x - median
+    with np.errstate(divide="ignore", invalid="ignore"):
+        z = np.where(mad > 0, MAD_SCALE * dev / mad, np.where(dev == 0, 0.0, np.sign(dev) * np.inf))
+    return z
+
+
+def _reason(value: float, median: float) -> str:
+    factor = value / median if median else np.inf
+    return f"{factor:,.1f}× the usual value" if factor >= 1 else f"1/{1 / factor:,.1f} of the usual value"
+
+
+# -----------------------------
+# Row outliers
+# -----------------------------
+def row_outliers(
+    items: Iterable[Mapping],
+    fields=ROW_FIELDS,
+    z_limit: float = Z_LIMIT,
+    iqr_k: float = IQR_K,
+    min_peers: int = MIN_PEERS,
+    min_factor: float = MIN_FACTOR,
+) -> pd.DataFrame:
+    """Rows whose value of a field is implausible next to the other rows of the same item."""
+    df = pd.DataFrame.from_records(list(items), columns=["id", "item", *fields])
+    if df.empty:
+        return pd.DataFrame(columns=FLAG_COLUMNS)
+    long = df.melt(id_vars=["id", "item"], value_vars=list(fields), var_name="field")
+    long["value"] = pd.to_numeric(long["value"], errors="coerce")
+    long = long[long["value"] > 0].reset_index(drop=True)
+    if long.empty:
+        return pd.DataFrame(columns=FLAG_COLUMNS)
+
+    x = np.log10(long["value"].to_numpy(dtype=float))
+    keys = [long["item"], long["field"]]
+    logs = pd.Series(x, index=long.index)
+    g = logs.groupby(keys)
+    peers = g.transform("size").to_numpy()
+    med = g.transform("median").to_numpy()
+    mad = (logs - med).abs().groupby(keys).transform("median").to_numpy()
+    q1 = g.transform("quantile", 0.25).to_numpy()
+    q3 = g.transform("quantile", 0.75).to_numpy()
+    iqr = q3 - q1
+
+    z = robust_z(x, med, mad)
+    outside = (x < q1 - iqr_k * iqr) | (x > q3 + iqr_k * iqr)
+    flagged = (
+        (peers >= min_peers)
+        & ((np.abs(z) > z_limit) | outside)
+        & (np.abs(x - med) >= np.log10(min_factor))
+    )
+    out = long.loc[flagged, ["id", "item", "field", "value"]].copy()
+    out["median"] = 10 ** med[flagged]
+    out["z"] = z[flagged]
+    out["reason"] = [_reason(v, m) for v, m in zip(out["value"], out["median"])]
+    order = np.argsort(-np.abs(out["z"].to_numpy()), kind="stable")
+    return out.iloc[order].reset_index(drop=True)[FLAG_COLUMNS]
+
+
+# -----------------------------
+# Estimate metrics and history
+# -----------------------------
+def estimate_metrics(
+    items: Iterable[Mapping], categories: Mapping[str, str] = {}, plinth_area: Optional[float] = None
+) -> Dict[str, float]:
+    """
+    Ratio metrics of an estimate. categories maps item name → category
+    for items stored without one.
+    """
+    df = pd.DataFrame.from_records(list(items), columns=["item", "category", "quantity", "amount"])
+    if df.empty:
+        return {}
+    cat = df["category"].fillna("")
+    missing = cat == ""
+    if missing.any():
+        cat = cat.where(~missing, df["item"].map(categories).fillna(""))
+    qty = pd.to_numeric(df["quantity"], errors="coerce").fillna(0.0).groupby(cat).sum()
+    metrics: Dict[str, float] = {}
+    for name, (num, den) in RATIO_METRICS.items():
+        if qty.get(num, 0.0) > 0 and qty.get(den, 0.0) > 0:
+            metrics[name] = float(qty[num] / qty[den])
+    if plinth_area:
+        metrics[COST_PER_PLINTH] = float(pd.to_numeric(df["amount"], errors="coerce").sum() / plinth_area)
+    return metrics
+
+
+@dataclass
+class EstimateProfile:
+    """Metrics of earlier (reference) estimates, one record per estimate."""
+
+    records: List[dict] = field(default_factory=list)
+    path: Optional[Path] = None
+
+    @classmethod
+    def load(cls, path: Path = HISTORY_FILE) -> "EstimateProfile":
+        records = []
+        if path.is_file():
+            with path.open(encoding="utf-8") as fh:
+                records = [json.loads(line) for line in fh if line.strip()]
+        return cls(records, path)
+
+    def __len__(self) -> int:
+        return len(self.records)
+
+    def record(self, name: str, metrics: Mapping[str, float]) -> dict:
+        """Add an estimate's metrics (and append it to the file, if any)."""
+        rec = {"time": datetime.now().isoformat(timespec="seconds"), "name": name, "metrics": dict(metrics)}
+        self.records.append(rec)
+        if self.path is not None:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            with self.path.open("a", encoding="utf-8") as fh:
+                fh.write(json.dumps(rec) + "\n")
+        return rec
+
+    def frame(self) -> pd.DataFrame:
+        """One row per recorded estimate, one column per metric."""
+        return pd.DataFrame([r["metrics"] for r in self.records], dtype=float)
+
+    def check(
+        self, metrics: Mapping[str, float], z_limit: float = Z_LIMIT, iqr_k: float = IQR_K, min_history: int = MIN_HISTORY
+    ) -> pd.DataFrame:
+        """The estimate's metrics next to the history's median and quartiles."""
+        names = list(metrics)
+        if not names:
+            return pd.DataFrame(columns=METRIC_COLUMNS)
+        hist = self.frame().reindex(columns=names)
+        value = np.array([metrics[n] for n in names], dtype=float)
+        med = hist.median().to_numpy()
+        mad = (hist - med).abs().median().to_numpy()
+        q1 = hist.quantile(0.25).to_numpy()
+        q3 = hist.quantile(0.75).to_numpy()
+        count = hist.notna().sum().to_numpy()
+        z = robust_z(value, med, mad)
+        iqr = q3 - q1
+        outside = (value < q1 - iqr_k * iqr) | (value > q3 + iqr_k * iqr)
+        flagged = (count >= min_history) & ((np.abs(z) > z_limit) | outside)
+        return pd.DataFrame(
+            {
+                "metric": names,
+                "value": value,
+                "median": med,
+                "q1": q1,
+                "q3": q3,
+                "z": np.where(count >= min_history, z, np.nan),
+                "estimates": count,
+                "flagged": flagged,
+            },
+            columns=METRIC_COLUMNS,
+        )
@@ -0,0 +1,46 @@
+# benchmarks/app_extract.py
+
+"""
+Load pure helpers from streamlit_app.py without running the app.
+
+Importing streamlit_app executes the whole Streamlit script, so the
+definitions benchmarks need (IS1200Engine, monte_carlo, the DSR
+catalogue) are pulled out of its syntax tree and executed on their own.
+Decorators (st.cache_data etc.) are dropped, so the raw function is timed.
+"""
+
+from __future__ import annotations
+
+import ast
+from functools import lru_cache
+from pathlib import Path
+from types import SimpleNamespace
+
+import numpy as np
+
+APP_FILE = Path(__file__).resolve().parent.parent / "streamlit_app.py"
+APP_NAMES = ("CPWD_BASE_DSR_2023", "IS1200Engine", "monte_carlo")
+
+
+def _defined_name(node: ast.stmt) -> str | None:
+    if isinstance(node, (ast.FunctionDef, ast.ClassDef)):
+        return node.name
+    if isinstance(node, ast.Assign) and isinstance(node.targets[0], ast.Name):
+        return node.targets[0].id
+    return None
+
+
+@lru_cache(maxsize=1)
+def load_app_helpers(path: Path = APP_FILE) -> SimpleNamespace:
+    """Namespace with the APP_NAMES definitions of streamlit_app.py."""
+    tree = ast.parse(path.read_text(encoding="utf-8"), filename=str(path))
+    nodes = [n for n in tree.body if _defined_name(n) in APP_NAMES]
+    for node in nodes:
+        if isinstance(node, (ast.FunctionDef, ast.ClassDef)):
+            node.decorator_list = []
+    missing = set(APP_NAMES) - {_defined_name(n) for n in nodes}
+    if missing:
+        raise LookupError(f"{path.name} no longer defines {sorted(missing)}")
+    namespace = {"np": np}
+    exec(compile(ast.Module(body=nodes, type_ignores=[]), str(path), "exec"), namespace)
+    return SimpleNamespace(**{name: namespace[name] for name in APP_NAMES})
@@ -0,0 +1,55 @@
+# benchmarks/bench_export_bundle.py
+
+"""
+Export bundle time vs. item count.
+
+    python benchmarks/bench_export_bundle.py --sizes 1000 10000 100000
+
+Prints, per size, the total bundle time and the time per output file
+from the bundle manifest. Items are synthetic QTO lines from
+synthetic_data.estimate_items.
+"""
+
+from __future__ import annotations
+
+import argparse
+import os
+import sys
+import time
+
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from cpwd_forms import FormCache, FormContext  # noqa: E402
+from export_bundle import EXPORT_FORMATS, build_export_bundle  # noqa: E402
+from synthetic_data import estimate_records  # noqa: E402
+from wbs_tree import WBSTree  # noqa: E402
+
+
+def main(argv=None) -> None:
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    ap.add_argument("--sizes", type=int, nargs="+", default=[1_000, 10_000, 100_000])
+    ap.add_argument("--formats", nargs="+", default=list(EXPORT_FORMATS), choices=EXPORT_FORMATS)
+    args = ap.parse_args(argv)
+
+    rows = []
+    for n in args.sizes:
+        items = estimate_records(n)
+        tree = WBSTree.from_items(items)
+        t0 = time.perf_counter()
+        bundle = build_export_bundle(
+            FormCache(), revision=1, items=items, tree=tree,
+            ctx=FormContext("Benchmark", "Delhi"), formats=args.formats,
+        )
+        total = time.perf_counter() - t0
+        per_file = bundle.manifest_frame().set_index("file")["seconds"]
+        rows.append({"items": n, "total_s": total, "zip_MB": len(bundle.data) / 1e6, **per_file.to_dict()})
+        print(f"{n:>9,d} items: {total:7.2f} s  ({len(bundle.data) / 1e6:.1f} MB)", flush=True)
+
+    pd.set_option("display.width", 200)
+    print(pd.DataFrame(rows).set_index("items").T.round(3))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,187 @@
+# benchmarks/bench_hot_paths.py
+
+"""
+Benchmarks for the estimation hot paths.
+
+Sizes are estimate items (or DSR catalogue rows for the DSR / suggester
+benchmarks); inputs come from synthetic_data.py. Run through
+benchmarks/run.py:
+
+    python benchmarks/run.py --sizes 1000 10000
+    python benchmarks/run.py --filter dsr. --sizes 100000 1000000
+"""
+
+from __future__ import annotations
+
+import os
+import sys
+from types import SimpleNamespace
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from ai_helpers import AISuggester  # noqa: E402
+from boq_generator import BOQGenerator  # noqa: E402
+from dsr_parser import DSRParser  # noqa: E402
+from is1200_rules import IS1200Engine as RulesEngine  # noqa: E402
+from phases_structure import classify_many, classify_worktype_to_phase  # noqa: E402
+from synthetic_data import dsr_catalogue, estimate_items, takeoff_elements  # noqa: E402
+
+from benchmarks.app_extract import load_app_helpers  # noqa: E402
+from benchmarks.harness import benchmark  # noqa: E402
+
+APP = load_app_helpers()
+LOOKUPS = 10_000            # code lookups per get_rate_for_code run
+OPENINGS = [{"w": 1.0, "h": 2.1}, {"w": 1.5, "h": 1.2}, {"w": 0.3, "h": 0.3}]
+
+
+# -----------------------------
+# Synthetic inputs (synthetic_data.py)
+# -----------------------------
+def dsr_frame(n: int, seed: int = 0) -> pd.DataFrame:
+    return pd.concat(dsr_catalogue(n, seed), ignore_index=True)
+
+
+def estimate_elements(n: int, seed: int = 0) -> SimpleNamespace:
+    """Element schedule of n rows as plain lists (type, L, B, H)."""
+    df = pd.concat(takeoff_elements(n, seed), ignore_index=True)
+    return SimpleNamespace(
+        kind=df["Element Type"].tolist(),
+        L=df["Length"].tolist(), B=df["Width"].tolist(), D=df["Height"].tolist(),
+    )
+
+
+def boq_generator(n: int) -> BOQGenerator:
+    gen = BOQGenerator()
+    for chunk in estimate_items(n):
+        for i, d, u, q, r, a, ph in zip(
+            chunk["id"].astype(str), chunk["item"], chunk["unit"], chunk["quantity"].tolist(),
+            chunk["rate"].tolist(), chunk["amount"].tolist(), chunk["phase"],
+        ):
+            gen.add_boq_item(i, d, u, q, r, a, ph, d, "IS 1200", "CPWD DSR 2023", "")
+    return gen
+
+
+# -----------------------------
+# IS 1200 engines
+# -----------------------------
+def _measure_all(engine, d: SimpleNamespace, rich: bool) -> float:
+    """Measure every element the way the app does: concrete + formwork, masonry, finishes."""
+    total = 0.0
+    for kind, L, B, D in zip(d.kind, d.L, d.B, d.D):
+        if kind == "IfcWall":
+            total += (engine.brickwork_wall(L, B, D, OPENINGS)["net"] if rich
+                      else engine.volume(L, B, D)["net"])
+        elif kind == "Plaster":
+            total += engine.wall_finish_area(L, D, 2, OPENINGS)["net"]
+        elif kind == "Floor_Tile":
+            total += engine.floor_area(L, B)["net"] if rich else engine.formwork_slab_area(L, B)
+        else:
+            total += engine.volume(L, B, D)["net"]
+            if kind == "IfcBeam":
+                total += engine.formwork_beam_area(B, D, L)
+            elif kind == "IfcSlab":
+                total += engine.formwork_slab_area(L, B)
+            else:
+                total += engine.formwork_column_area(L, B, D)
+    return total
+
+
+@benchmark("is1200_rules.IS1200Engine", setup=estimate_elements)
+def rules_engine(d):
+    _measure_all(RulesEngine, d, rich=True)
+
+
+@benchmark("streamlit_app.IS1200Engine", setup=estimate_elements)
+def app_engine(d):
+    _measure_all(APP.IS1200Engine, d, rich=False)
+
+
+# -----------------------------
+# DSR parser and suggester
+# -----------------------------
+def _raw_dsr(n: int) -> pd.DataFrame:
+    return dsr_frame(n)
+
+
+def _loaded_parser(n: int) -> SimpleNamespace:
+    parser = DSRParser()
+    parser.load_records(dsr_frame(n))
+    codes = parser.get_all_items()["code"].sample(LOOKUPS, replace=True, random_state=0).tolist()
+    return SimpleNamespace(parser=parser, codes=codes)
+
+
+@benchmark("dsr.load_records", setup=_raw_dsr)
+def dsr_load(df):
+    DSRParser().load_records(df)
+
+
+@benchmark("dsr.get_rate_for_code", setup=_loaded_parser)
+def dsr_lookup(s):
+    for code in s.codes:
+        s.parser.get_rate_for_code(code)
+
+
+@benchmark("dsr.find_matches", setup=_loaded_parser)
+def dsr_search(s):
+    s.parser.find_matches("brick masonry", "cum")
+    s.parser.find_matches("plaster")
+
+
+def _suggester(n: int) -> SimpleNamespace:
+    parser = DSRParser()
+    parser.load_records(dsr_frame(n))
+    return SimpleNamespace(ai=AISuggester(), dsr=parser.get_all_items())
+
+
+@benchmark("ai.suggest_dsr_items", setup=_suggester)
+def suggest(s):
+    s.ai.suggest_dsr_items("cement concrete", "Cum", s.dsr)
+
+
+# -----------------------------
+# BOQ, phases, Monte Carlo
+# -----------------------------
+@benchmark("boq.generate_dataframe", setup=boq_generator)
+def boq_dataframe(gen):
+    gen.generate_dataframe("Benchmark", "Delhi")
+
+
+def _boq_frame(n: int) -> pd.DataFrame:
+    return boq_generator(n).generate_dataframe("Benchmark", "Delhi")
+
+
+@benchmark("boq.to_excel_bytes", setup=_boq_frame, max_size=100_000)
+def boq_excel(df):
+    BOQGenerator().to_excel_bytes(df, base_total=float(df["Amount (₹)"].sum()), contingency_pct=5.0)
+
+
+def _worktype_names(n: int) -> list:
+    names = np.array(list(APP.CPWD_BASE_DSR_2023) + ["Anti-termite treatment", "Waterproofing of roof"])
+    return names[np.random.default_rng(2).integers(0, len(names), n)].tolist()
+
+
+def _distinct_worktype_names(n: int) -> list:
+    """n different descriptions, so no name is ever answered from the cache."""
+    return [f"{name} - BOQ line {i}" for i, name in enumerate(_worktype_names(n))]
+
+
+# the cached function would only be timed on its first run; time the classifier itself
+@benchmark("phases.classify_worktype_to_phase", setup=_distinct_worktype_names)
+def classify(names):
+    uncached = classify_worktype_to_phase.__wrapped__
+    for name in names:
+        uncached(name)
+
+
+@benchmark("phases.classify_many", setup=_worktype_names)
+def classify_bulk(names):
+    classify_worktype_to_phase.cache_clear()        # every run starts cold
+    classify_many(names)
+
+
+@benchmark("streamlit_app.monte_carlo", setup=lambda n: n)
+def monte_carlo(n):
+    APP.monte_carlo(2.5e7, n=n)
@@ -0,0 +1,189 @@
+# benchmarks/harness.py
+
+"""
+Minimal asv-style benchmark harness.
+
+Benchmarks are plain functions registered with @benchmark. Each takes
+the prepared state returned by its setup(size) and is timed over
+several repeats; setup is never timed. Every run appends one record per
+(benchmark, size) to a JSONL history file, and each new timing is
+compared with the median of earlier runs of the same benchmark and size
+on the same machine, so slowdowns show up as regressions:
+
+    @benchmark("dsr.find_matches", setup=make_parser, sizes=SIZES)
+    def find_matches(parser):
+        parser.find_matches("brick", "cum")
+"""
+
+from __future__ import annotations
+
+import json
+import platform
+import statistics
+import subprocess
+import time
+from dataclasses import dataclass, field
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Sequence
+
+SIZES = (1_000, 10_000, 100_000, 1_000_000)
+HISTORY_FILE = Path(__file__).resolve().parent / "results" / "history.jsonl"
+
+REGRESSION_THRESHOLD = 1.20     # slower than 1.2 x the baseline median
+BASELINE_WINDOW = 5             # earlier runs the baseline median is taken over
+
+
+@dataclass
+class Benchmark:
+    name: str
+    func: Callable[[Any], Any]
+    setup: Callable[[int], Any]
+    sizes: Sequence[int] = SIZES
+    max_size: Optional[int] = None      # skip larger sizes (e.g. XLSX writing at 1M rows)
+
+    def runs_at(self, size: int) -> bool:
+        return size in self.sizes and (self.max_size is None or size <= self.max_size)
+
+
+REGISTRY: Dict[str, Benchmark] = {}
+
+
+def benchmark(
+    name: str,
+    *,
+    setup: Callable[[int], Any],
+    sizes: Sequence[int] = SIZES,
+    max_size: Optional[int] = None,
+) -> Callable:
+    """Register func(state) as benchmark name; state = setup(size)."""
+
+    def wrap(func: Callable[[Any], Any]) -> Callable[[Any], Any]:
+        if name in REGISTRY:
+            raise ValueError(f"Benchmark {name!r} is registered twice")
+        REGISTRY[name] = Benchmark(name, func, setup, tuple(sizes), max_size)
+        return func
+
+    return wrap
+
+
+# -----------------------------
+# Timing
+# -----------------------------
+@dataclass
+class Timing:
+    benchmark: str
+    size: int
+    times: List[float] = field(default_factory=list)
+
+    @property
+    def best(self) -> float:
+        return min(self.times)
+
+    @property
+    def median(self) -> float:
+        return statistics.median(self.times)
+
+    @property
+    def per_item_us(self) -> float:
+        return self.best / self.size * 1e6
+
+
+def time_benchmark(bench: Benchmark, size: int, repeat: int = 5, budget: float = 10.0) -> Timing:
+    """
+    Time bench at size: up to `repeat` runs, stopping early once `budget`
+    seconds have been spent (a single slow run is still recorded).
+    """
+    state = bench.setup(size)
+    timing = Timing(bench.name, size)
+    spent = 0.0
+    for _ in range(max(repeat, 1)):
+        t0 = time.perf_counter()
+        bench.func(state)
+        dt = time.perf_counter() - t0
+        timing.times.append(dt)
+        spent += dt
+        if spent >= budget:
+            break
+    return timing
+
+
+# -----------------------------
+# History and regressions
+# -----------------------------
+def _commit() -> str:
+    try:
+        out = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            capture_output=True, text=True, check=True, cwd=Path(__file__).resolve().parent,
+        )
+        return out.stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return ""
+
+
+def machine_id() -> str:
+    return f"{platform.node()}|{platform.machine()}|py{platform.python_version()}"
+
+
+def load_history(path: Path = HISTORY_FILE) -> List[dict]:
+    if not path.is_file():
+        return []
+    with path.open(encoding="utf-8") as fh:
+        return [json.loads(line) for line in fh if line.strip()]
+
+
+def append_history(timings: Sequence[Timing], path: Path = HISTORY_FILE) -> List[dict]:
+    """Append one record per timing; returns the records written."""
+    run = {
+        "run": datetime.now().strftime("%Y-%m-%dT%H:%M:%S"),
+        "commit": _commit(),
+        "machine": machine_id(),
+    }
+    records = [
+        {**run, "benchmark": t.benchmark, "size": t.size, "best": t.best, "median": t.median, "repeat": len(t.times)}
+        for t in timings
+    ]
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with path.open("a", encoding="utf-8") as fh:
+        for rec in records:
+            fh.write(json.dumps(rec) + "\n")
+    return records
+
+
+def compare(
+    timings: Sequence[Timing],
+    history: Sequence[dict],
+    threshold: float = REGRESSION_THRESHOLD,
+    window: int = BASELINE_WINDOW,
+) -> List[dict]:
+    """
+    Per timing: baseline (median best time of the last `window` earlier
+    runs on this machine), ratio and status (new / ok / faster / REGRESSION).
+    """
+    machine = machine_id()
+    earlier: Dict[tuple, List[float]] = {}
+    for rec in history:
+        if rec.get("machine") == machine:
+            earlier.setdefault((rec["benchmark"], rec["size"]), []).append(rec["best"])
+
+    rows = []
+    for t in timings:
+        past = earlier.get((t.benchmark, t.size), [])[-window:]
+        baseline = statistics.median(past) if past else None
+        ratio = t.best / baseline if baseline else None
+        if ratio is None:
+            status = "new"
+        elif ratio > threshold:
+            status = "REGRESSION"
+        elif ratio < 1.0 / threshold:
+            status = "faster"
+        else:
+            status = "ok"
+        rows.append(
+            {
+                "benchmark": t.benchmark, "size": t.size, "best_s": t.best, "median_s": t.median,
+                "per_item_us": t.per_item_us, "baseline_s": baseline, "ratio": ratio, "status": status,
+            }
+        )
+    return rows
@@ -0,0 +1,90 @@
+# benchmarks/run.py
+
+"""
+Run the registered benchmarks, record them and flag regressions.
+
+    python benchmarks/run.py                                # all sizes: 1k, 10k, 100k, 1M
+    python benchmarks/run.py --sizes 1000 10000 --filter dsr.
+    python benchmarks/run.py --no-save --fail-on-regression
+
+Results are appended to benchmarks/results/history.jsonl; each timing is
+compared with the median of the last runs of the same benchmark and
+size on this machine.
+"""
+
+from __future__ import annotations
+
+import argparse
+import importlib
+import os
+import sys
+from pathlib import Path
+
+import pandas as pd
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+from benchmarks.harness import (  # noqa: E402
+    BASELINE_WINDOW,
+    HISTORY_FILE,
+    REGISTRY,
+    REGRESSION_THRESHOLD,
+    SIZES,
+    append_history,
+    compare,
+    load_history,
+    time_benchmark,
+)
+
+BENCH_MODULES = ("benchmarks.bench_hot_paths",)
+
+
+def main(argv=None) -> int:
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    ap.add_argument("--sizes", type=int, nargs="+", default=list(SIZES))
+    ap.add_argument("--filter", default="", help="only benchmarks whose name contains this text")
+    ap.add_argument("--repeat", type=int, default=5)
+    ap.add_argument("--budget", type=float, default=10.0, help="seconds per benchmark and size")
+    ap.add_argument("--threshold", type=float, default=REGRESSION_THRESHOLD)
+    ap.add_argument("--window", type=int, default=BASELINE_WINDOW)
+    ap.add_argument("--history", type=Path, default=HISTORY_FILE)
+    ap.add_argument("--no-save", action="store_true", help="compare only, do not append to the history")
+    ap.add_argument("--fail-on-regression", action="store_true")
+    args = ap.parse_args(argv)
+
+    os.environ.setdefault("STREAMLIT_SERVER_HEADLESS", "true")
+    for module in BENCH_MODULES:
+        importlib.import_module(module)
+
+    timings = []
+    for bench in REGISTRY.values():
+        if args.filter not in bench.name:
+            continue
+        for size in args.sizes:
+            if not bench.runs_at(size):
+                continue
+            t = time_benchmark(bench, size, repeat=args.repeat, budget=args.budget)
+            timings.append(t)
+            print(f"{bench.name:<38} {size:>9,d}  {t.best:9.4f} s  ({t.per_item_us:8.3f} µs/item)", flush=True)
+
+    if not timings:
+        print("No benchmarks matched.")
+        return 0
+
+    history = load_history(args.history)
+    report = pd.DataFrame(compare(timings, history, args.threshold, args.window))
+    if not args.no_save:
+        append_history(timings, args.history)
+
+    pd.set_option("display.width", 200)
+    print()
+    print(report.round(4).to_string(index=False))
+    regressions = report[report["status"] == "REGRESSION"]
+    if len(regressions):
+        print(f"\n{len(regressions)} regression(s) above {args.threshold:.2f} x baseline")
+    return 1 if args.fail_on_regression and len(regressions) else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -3,6 +3,8 @@ from typing import List
 import pandas as pd
 from io import BytesIO
 
+from instrumentation import timed
+
 
 @dataclass
 class BOQItem:
@@ -26,6 +28,7 @@ class BOQGenerator:
     def clear_items(self) -> None:
         self.items = []
 
+    @timed("boq.add_boq_item")
     def add_boq_item(
         self,
         item_no: str,
@@ -56,6 +59,7 @@ class BOQGenerator:
             )
         )
 
+    @timed("boq.generate_dataframe")
     def generate_dataframe(self, project_name: str, project_location: str) -> pd.DataFrame:
         data = [
             {
@@ -79,6 +83,7 @@ class BOQGenerator:
         df.attrs["project_location"] = project_location
         return df
 
+    @timed("boq.to_excel_bytes")
     def to_excel_bytes(
         self,
         df_boq: pd.DataFrame,
@@ -0,0 +1,232 @@
+# composite_items.py
+
+"""
+Composite RCC items: concrete parent rows with formula-driven children.
+
+An RCC member is entered once (concrete: L × B × D) and expands into
+reinforcement and formwork rows. The children used to be plain rows; here
+each child keeps a ComponentFormula and its quantity is re-derived from
+the parent whenever the parent or a coefficient changes:
+
+    steel     kg   = parent volume × steel_kg_per_cum[member]
+    formwork  sqm  = IS 1200 area of the member's L / B / D
+                     (imported members without dimensions: the area given)
+                     × parent volume / volume at link
+
+"Volume at link" is the parent's quantity when the child was linked (or
+the member last resized), deductions included. The ratio is exactly 1
+for a freshly measured member, whatever was deducted, and makes formwork
+follow later quantity changes (e.g. a row scaled to several identical
+members).
+
+Recomputation is lazy and incremental. touch() (parent changed) and
+set_steel_rate() (coefficient changed) only mark the affected children
+dirty; recompute() later evaluates the dirty children alone and returns
+the rows whose quantity changed as an item_store.BulkChange. A coefficient
+change on a 10k-member estimate therefore re-derives only that member
+type's steel rows, and nothing else is touched.
+"""
+
+from __future__ import annotations
+
+from dataclasses import dataclass
+from typing import Dict, Iterable, List, Mapping, Optional, Set
+
+from item_store import BulkChange, ItemStore, ItemStoreError
+
+STEEL = "steel"
+FORMWORK = "formwork"
+
+# member name keyword → formwork rule (anything else is measured like a footing)
+FORMWORK_RULES = (
+    ("Column", "column"),
+    ("Beam", "beam"),
+    ("Slab", "slab"),
+)
+
+
+@dataclass(frozen=True)
+class ComponentFormula:
+    """How one child row derives its quantity from its parent."""
+
+    kind: str                  # STEEL | FORMWORK
+    rule: str = ""             # formwork: column / beam / slab / footing / given
+    area: float = 0.0          # formwork area at link (given rule)
+
+    def describe(self, coefficient: float = 0.0) -> str:
+        if self.kind == STEEL:
+            return f"volume × {coefficient:g} kg/cum"
+        if self.rule == "given":
+            return f"{self.area:,.2f} sqm × volume / volume at link"
+        return f"IS 1200 {self.rule} formwork from L × B × D × volume / volume at link"
+
+
+def formwork_rule(member: str) -> str:
+    for keyword, rule in FORMWORK_RULES:
+        if keyword in member:
+            return rule
+    return "footing"   # footings etc. – four vertical faces, like a column
+
+
+class CompositeModel:
+    """
+    Formulas, coefficients and dirty set for the RCC children of one
+    estimate. Keep one instance in st.session_state next to the ItemStore.
+    """
+
+    def __init__(self, components: Mapping[str, Mapping], engine):
+        self.engine = engine
+        self.coefficients: Dict[str, float] = {
+            member: float(spec["steel_kg_per_cum"]) for member, spec in components.items()
+        }
+        self.formulas: Dict[int, ComponentFormula] = {}        # child ID → formula
+        self._children: Dict[int, List[int]] = {}              # parent ID → child IDs
+        self._parent: Dict[int, int] = {}                      # child ID → parent ID
+        self._member: Dict[int, str] = {}                      # parent ID → member name
+        self._members: Dict[str, Set[int]] = {}                # member name → parent IDs
+        self._basis: Dict[int, float] = {}                     # parent ID → volume at link / resize
+        self.dirty: Set[int] = set()
+        self.recomputed = 0                                    # children evaluated so far
+
+    def __len__(self) -> int:
+        return len(self.formulas)
+
+    # -----------------------------
+    # Formulas
+    # -----------------------------
+    def formwork_formula(self, member: str, L: float, B: float, D: float, area: Optional[float] = None):
+        """Formula for a member's formwork; a given area (e.g. no dimensions) is kept as is."""
+        if area is not None or not (L > 0 and B > 0 and D > 0):
+            return ComponentFormula(FORMWORK, "given", float(area or 0.0))
+        return ComponentFormula(FORMWORK, formwork_rule(member))
+
+    def steel_formula(self) -> ComponentFormula:
+        return ComponentFormula(STEEL)
+
+    def evaluate(self, formula: ComponentFormula, parent: Mapping) -> float:
+        """Child quantity for the parent row as it is now (unlinked parent: as at link)."""
+        volume = float(parent["quantity"])
+        if formula.kind == STEEL:
+            return volume * self.coefficients.get(parent["item"], 0.0)
+        if formula.rule == "given":
+            area = formula.area
+        else:
+            L, B, D = float(parent["length"]), float(parent["breadth"]), float(parent["depth"])
+            if formula.rule == "beam":
+                area = self.engine.formwork_beam_area(B, D, L)
+            elif formula.rule == "slab":
+                area = self.engine.formwork_slab_area(L, B)
+            else:
+                area = self.engine.formwork_column_area(L, B, D)
+        basis = self._basis.get(parent["id"], volume)
+        return area * volume / basis if basis else area
+
+    def describe(self, child_id: int) -> str:
+        member = self._member[self._parent[child_id]]
+        return self.formulas[child_id].describe(self.coefficients.get(member, 0.0))
+
+    # -----------------------------
+    # Links
+    # -----------------------------
+    def link(self, parent: Mapping, child_id: int, formula: ComponentFormula) -> None:
+        pid = parent["id"]
+        self.formulas[child_id] = formula
+        self._parent[child_id] = pid
+        self._children.setdefault(pid, []).append(child_id)
+        self._member[pid] = parent["item"]
+        self._members.setdefault(parent["item"], set()).add(pid)
+        self._basis.setdefault(pid, float(parent["quantity"]))
+
+    def is_parent(self, item_id: int) -> bool:
+        return item_id in self._children
+
+    def members(self) -> Dict[str, int]:
+        """Member name → number of linked parent rows."""
+        return {m: len(ids) for m, ids in self._members.items() if ids}
+
+    def forget(self, item_ids: Iterable[int]) -> None:
+        """Drop deleted rows (parents or children)."""
+        for item_id in item_ids:
+            for child in self._children.pop(item_id, ()):
+                self._drop_child(child)
+            if item_id in self._parent:
+                pid = self._parent[item_id]
+                self._drop_child(item_id)
+                siblings = self._children.get(pid)
+                if siblings is not None:
+                    siblings.remove(item_id)
+            self._basis.pop(item_id, None)
+            member = self._member.pop(item_id, None)
+            if member is not None:
+                self._members[member].discard(item_id)
+
+    def _drop_child(self, child_id: int) -> None:
+        self.formulas.pop(child_id, None)
+        self._parent.pop(child_id, None)
+        self.dirty.discard(child_id)
+
+    # -----------------------------
+    # Dirty tracking
+    # -----------------------------
+    def touch(self, parent_ids: Iterable[int]) -> int:
+        """Mark the children of changed parents dirty; returns how many were marked."""
+        before = len(self.dirty)
+        for pid in parent_ids:
+            self.dirty.update(self._children.get(pid, ()))
+        return len(self.dirty) - before
+
+    def set_steel_rate(self, member: str, kg_per_cum: float) -> int:
+        """Change a member type's reinforcement coefficient; marks its steel rows dirty."""
+        if kg_per_cum < 0:
+            raise ItemStoreError("Reinforcement cannot be negative")
+        if self.coefficients.get(member) == float(kg_per_cum):
+            return 0
+        self.coefficients[member] = float(kg_per_cum)
+        before = len(self.dirty)
+        for pid in self._members.get(member, ()):
+            self.dirty.update(c for c in self._children.get(pid, ()) if self.formulas[c].kind == STEEL)
+        return len(self.dirty) - before
+
+    def recompute(self, store: ItemStore, tolerance: float = 1e-9) -> BulkChange:
+        """Re-derive the dirty children from their parents; returns the rows that changed."""
+        change = BulkChange(label=f"Recomputed {len(self.dirty)} RCC component(s)")
+        for child_id in self.dirty:
+            if not store.has_id(child_id):
+                continue
+            formula = self.formulas[child_id]
+            child = store.get(child_id)
+            quantity = self.evaluate(formula, store.get(self._parent[child_id]))
+            self.recomputed += 1
+            if abs(quantity - float(child["quantity"])) > tolerance:
+                child["quantity"] = quantity
+                child["amount"] = quantity * float(child["rate"])
+                change.updated.append(child)
+        self.dirty.clear()
+        return change
+
+    # -----------------------------
+    # Parent edits
+    # -----------------------------
+    def resize(self, store: ItemStore, parent_id: int, L: float, B: float, D: float) -> BulkChange:
+        """
+        New dimensions for a measured member: its volume is re-measured
+        (keeping the original deduction), it becomes the volume at link and
+        the children are marked dirty. A given formwork area is replaced by
+        the IS 1200 area of the new dimensions.
+        """
+        parent = store.get(parent_id)
+        if not self.is_parent(parent_id):
+            raise ItemStoreError(f"Item {parent_id} is not an RCC member with linked components")
+        if min(L, B, D) <= 0:
+            raise ItemStoreError("Member dimensions must be positive")
+        old_gross = float(parent["length"]) * float(parent["breadth"]) * float(parent["depth"])
+        deduction = max(old_gross - float(parent["quantity"]), 0.0) if old_gross else 0.0
+        volume = self.engine.volume(L, B, D, deduction)["net"]
+        change = store.edit([parent_id], cascade=False, length=L, breadth=B, depth=D, quantity=volume)
+        change.label = f"Resized item {parent_id} to {L:g} × {B:g} × {D:g}"
+        self._basis[parent_id] = volume
+        for child in self._children[parent_id]:
+            if self.formulas[child].rule == "given":
+                self.formulas[child] = ComponentFormula(FORMWORK, formwork_rule(parent["item"]))
+        self.touch([parent_id])
+        return change
@@ -0,0 +1,363 @@
+# cpwd_forms.py
+
+"""
+CPWD / PWD form tables (Form 5A, 7, 8, 31 and PWD Form 6).
+
+Forms are built from one shared numeric items frame and kept numeric;
+currency / unit formatting is applied only when a form is displayed or
+exported. Built forms (and their formatted views and CSV text) are
+cached per estimate revision, so switching between forms on an
+unchanged estimate is a dictionary lookup.
+"""
+
+from __future__ import annotations
+
+from dataclasses import dataclass, field
+from datetime import date, timedelta
+from typing import Callable, Dict, Iterable, Mapping, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+FORM_KEYS = ("5A", "7", "8", "31", "PWD6")
+
+ITEM_COLUMNS = (
+    "id", "dsr_code", "phase", "item", "building", "floor",
+    "length", "breadth", "depth", "quantity", "unit", "rate", "amount",
+)
+NUMERIC_COLUMNS = ("length", "breadth", "depth", "quantity", "rate", "amount")
+
+# Column format specs are str.format patterns applied to numeric cells only;
+# labels and dates pass through and NaN shows blank.
+RUPEES = "₹{:,.0f}"   # same text as format_rupees() in the app
+
+# Bill deductions (fraction of gross value)
+INCOME_TAX_RATE = 0.02
+LABOUR_CESS_RATE = 0.01
+EMD_RATE = 0.02
+SECURITY_DEPOSIT_RATE = 0.05
+PERFORMANCE_GUARANTEE_RATE = 0.03
+CONTRACT_DAYS = 180
+
+
+def format_column(values: pd.Series, spec: str) -> pd.Series:
+    """Format the numeric cells of a column with spec; other cells pass through."""
+    num = pd.to_numeric(values, errors="coerce")
+    out = values.astype(object).where(values.notna(), "")
+    mask = num.notna()
+    out[mask] = [spec.format(v) for v in num[mask]]
+    return out
+
+
+# -----------------------------
+# Data holders
+# -----------------------------
+@dataclass(frozen=True)
+class FormContext:
+    """Non-item inputs a form depends on (part of its cache key)."""
+
+    project: str = ""
+    location: str = ""
+    on_date: date = field(default_factory=date.today)
+    bill_no: Optional[int] = None     # RA bill for Forms 8/31 (None: the open bill)
+
+
+@dataclass
+class FormTable:
+    """A numeric form table plus how to format it."""
+
+    key: str
+    title: str
+    data: pd.DataFrame
+    formats: Dict[str, str]
+    file_stem: str
+    totals: Dict[str, float] = field(default_factory=dict)
+    _display: Optional[pd.DataFrame] = field(default=None, repr=False)
+    _csv: Optional[str] = field(default=None, repr=False)
+
+    def display(self) -> pd.DataFrame:
+        """Formatted (string) view for st.dataframe, built once."""
+        if self._display is None:
+            df = self.data.copy()
+            for col, spec in self.formats.items():
+                df[col] = format_column(df[col], spec)
+            self._display = df
+        return self._display
+
+    def to_csv(self) -> str:
+        """CSV of the formatted view, built once."""
+        if self._csv is None:
+            self._csv = self.display().to_csv(index=False)
+        return self._csv
+
+    def file_name(self, on_date: date) -> str:
+        return f"{self.file_stem}_{on_date.strftime('%Y%m%d')}.csv"
+
+
+# -----------------------------
+# Shared items frame
+# -----------------------------
+def items_frame(items: Iterable[Mapping]) -> pd.DataFrame:
+    """Numeric columnar frame of QTO items (dicts or read-only mappings)."""
+    records = [it if isinstance(it, dict) else dict(it) for it in items]
+    df = pd.DataFrame.from_records(records, columns=list(ITEM_COLUMNS)) if records else pd.DataFrame(
+        columns=list(ITEM_COLUMNS)
+    )
+    for c in set(ITEM_COLUMNS) - set(NUMERIC_COLUMNS) - {"id"}:
+        df[c] = df[c].fillna("")
+    for c in NUMERIC_COLUMNS:
+        df[c] = pd.to_numeric(df[c], errors="coerce").fillna(0.0).astype(float)
+    df["id"] = df["id"].astype(str)
+    return df
+
+
+# -----------------------------
+# Builders
+# -----------------------------
+def build_form_5a(tree) -> FormTable:
+    df = tree.to_abstract("phase")
+    df.loc[df.index[-1], ["S.No.", "Description"]] = ["**TOTAL-A**", "**CIVIL WORKS**"]
+    return FormTable(
+        key="5A",
+        title="CPWD FORM 5A - ABSTRACT OF COST",
+        data=df,
+        formats={"Amount (₹)": RUPEES},
+        file_stem="CPWD_Form5A",
+        totals={"grand_total": float(tree.total)},
+    )
+
+
+def build_form_7(frame: pd.DataFrame, grand_total: float) -> FormTable:
+    df = pd.DataFrame(
+        {
+            "Item No": frame["id"],
+            "DSR Code": frame["dsr_code"].astype(str),
+            "Description": frame["item"].astype(str),
+            "Quantity": frame["quantity"],
+            "Unit": frame["unit"].astype(str),
+            "Rate (₹)": frame["rate"],
+            "Amount (₹)": frame["amount"],
+        }
+    )
+    total = pd.DataFrame(
+        [{"Item No": "**TOTAL**", "DSR Code": "", "Description": "**GRAND TOTAL**",
+          "Quantity": np.nan, "Unit": "", "Rate (₹)": np.nan, "Amount (₹)": grand_total}]
+    )
+    return FormTable(
+        key="7",
+        title="CPWD FORM 7 - SCHEDULE OF QUANTITIES",
+        data=pd.concat([df, total], ignore_index=True),
+        formats={"Quantity": "{:.3f}", "Rate (₹)": RUPEES, "Amount (₹)": RUPEES},
+        file_stem="SOQ_Form7",
+        totals={"grand_total": float(grand_total)},
+    )
+
+
+def _mb_pages(ids: pd.Series) -> pd.Series:
+    """MB/001 for numeric IDs, MB/<id> for others (e.g. replica IDs "3-R0")."""
+    ids = ids.astype(str)
+    numeric = ids.str.fullmatch(r"\d+")
+    return "MB/" + ids.where(~numeric, ids.str.zfill(3))
+
+
+def build_form_8(frame: pd.DataFrame, ctx: FormContext) -> FormTable:
+    df = pd.DataFrame(
+        {
+            "Date": ctx.on_date.strftime("%d/%m/%Y"),
+            "MB Page": _mb_pages(frame["id"]),
+            "Item Description": frame["item"].astype(str).str.slice(0, 40),
+            "Length": frame["length"],
+            "Breadth": frame["breadth"],
+            "Depth": frame["depth"],
+            "Content": frame["quantity"],
+            "Unit": frame["unit"].astype(str),
+            "Initials": "RKS/Checked & Verified",
+        },
+        index=frame.index,
+    )
+    return FormTable(
+        key="8",
+        title="CPWD FORM 8 - MEASUREMENT BOOK",
+        data=df,
+        formats={"Length": "{:.2f} m", "Breadth": "{:.2f} m", "Depth": "{:.3f} m", "Content": "{:.3f}"},
+        file_stem="MB_Form8",
+    )
+
+
+def build_form_8_mb(entries: pd.DataFrame, bill_no: int) -> FormTable:
+    """Form 8 from measurement-book entries (real dates and MB pages)."""
+    df = pd.DataFrame(
+        {
+            "Date": [d.strftime("%d/%m/%Y") for d in entries["on_date"]],
+            "MB Page": entries["page"],
+            "Item No": entries["item_id"].astype(str),
+            "Item Description": entries["description"].astype(str).str.slice(0, 40),
+            "Length": entries["length"],
+            "Breadth": entries["breadth"],
+            "Depth": entries["depth"],
+            "Content": entries["quantity"],
+            "Unit": entries["unit"],
+            "Remarks": entries["remarks"],
+        }
+    )
+    return FormTable(
+        key="8",
+        title=f"CPWD FORM 8 - MEASUREMENT BOOK (RA Bill {bill_no})",
+        data=df,
+        formats={"Length": "{:.2f} m", "Breadth": "{:.2f} m", "Depth": "{:.3f} m", "Content": "{:.3f}"},
+        file_stem=f"MB_Form8_Bill{bill_no}",
+    )
+
+
+def build_form_31(gross: float, previous: float = 0.0, bill_no: int | None = None) -> FormTable:
+    upto_date = gross + previous
+    tax = gross * INCOME_TAX_RATE
+    cess = gross * LABOUR_CESS_RATE
+    net = gross - tax - cess
+    df = pd.DataFrame(
+        {
+            "S.No.": [1, 2, 3, 4, 5, 6, 7],
+            "Particulars": [
+                "Gross value of work measured (this bill)",
+                "Work done - previous bills",
+                "Total value of work done (1+2)",
+                "Deductions:",
+                f"Income Tax @{INCOME_TAX_RATE:.0%}",
+                f"Labour Cess @{LABOUR_CESS_RATE:.0%}",
+                "**NET AMOUNT PAYABLE**",
+            ],
+            "Amount (₹)": [gross, previous, upto_date, np.nan, tax, cess, net],
+        }
+    )
+    return FormTable(
+        key="31",
+        title="CPWD FORM 31 - RUNNING ACCOUNT BILL" + (f" No. {bill_no}" if bill_no else ""),
+        data=df,
+        formats={"Amount (₹)": RUPEES},
+        file_stem=f"RAB_Form31_Bill{bill_no}" if bill_no else "RAB_Form31",
+        totals={"gross": gross, "previous": previous, "upto_date": upto_date, "net": net},
+    )
+
+
+def build_pwd6(grand_total: float, ctx: FormContext) -> FormTable:
+    completion = ctx.on_date + timedelta(days=CONTRACT_DAYS)
+    df = pd.DataFrame(
+        {
+            "S.No.": list(range(1, 10)),
+            "Particulars": [
+                "Name of Work",
+                "Location",
+                "Probable Amount of Contract",
+                f"Earnest Money Deposit ({EMD_RATE:.0%})",
+                f"Security Deposit ({SECURITY_DEPOSIT_RATE:.0%})",
+                "Time Allowed",
+                "Date of Commencement",
+                "Scheduled Completion Date",
+                f"Performance Guarantee ({PERFORMANCE_GUARANTEE_RATE:.0%})",
+            ],
+            "Details": pd.Series(
+                [
+                    ctx.project,
+                    ctx.location,
+                    grand_total,
+                    grand_total * EMD_RATE,
+                    grand_total * SECURITY_DEPOSIT_RATE,
+                    "6 (Six) Months",
+                    ctx.on_date.strftime("%d/%m/%Y"),
+                    completion.strftime("%d/%m/%Y"),
+                    grand_total * PERFORMANCE_GUARANTEE_RATE,
+                ],
+                dtype=object,
+            ),
+        }
+    )
+    return FormTable(
+        key="PWD6",
+        title="PWD FORM 6 - WORK ORDER",
+        data=df,
+        formats={"Details": RUPEES},
+        file_stem="WorkOrder_PWD6",
+        totals={"grand_total": float(grand_total), "completion": completion},
+    )
+
+
+# -----------------------------
+# Revision-keyed cache
+# -----------------------------
+class FormCache:
+    """
+    Per-revision cache of the items frame and built forms.
+
+    Keep one instance in st.session_state. One table is kept per form;
+    everything is dropped as soon as a newer revision is requested.
+    """
+
+    def __init__(self):
+        self.revision: Optional[int] = None
+        self._frame: Optional[pd.DataFrame] = None
+        self._tables: Dict[str, Tuple[tuple, FormTable]] = {}    # form → (key, table)
+        self.builds = 0
+
+    def _sync(self, revision: int) -> None:
+        if revision != self.revision:
+            self.revision = revision
+            self._frame = None
+            self._tables.clear()
+
+    def frame(self, items: Callable[[], Iterable[Mapping]] | Iterable[Mapping], revision: int) -> pd.DataFrame:
+        """Shared numeric items frame for this revision."""
+        self._sync(revision)
+        if self._frame is None:
+            self._frame = items_frame(items() if callable(items) else items)
+        return self._frame
+
+    def get(
+        self,
+        form: str,
+        *,
+        revision: int,
+        items: Callable[[], Iterable[Mapping]] | Iterable[Mapping],
+        tree,
+        ctx: Optional[FormContext] = None,
+        mb=None,
+    ) -> FormTable:
+        """
+        Form table for the estimate at revision.
+
+        items is only consumed if the items frame has not been built for
+        this revision (pass a callable or a generator to keep it lazy).
+        With a MeasurementBook (mb), Forms 8 and 31 show the RA bill
+        ctx.bill_no from the book instead of the whole estimate. Without
+        ctx the forms are dated today.
+        """
+        if form not in FORM_KEYS:
+            raise KeyError(f"Unknown form '{form}' (expected one of {FORM_KEYS})")
+        if ctx is None:
+            ctx = FormContext()
+        self._sync(revision)
+        use_mb = mb is not None and form in ("8", "31")
+        key = (ctx, id(mb), mb.version) if use_mb else (ctx,)
+        cached = self._tables.get(form)
+        if cached is not None and cached[0] == key:
+            return cached[1]
+
+        total = float(tree.total)
+        if form == "5A":
+            table = build_form_5a(tree)
+        elif form == "7":
+            table = build_form_7(self.frame(items, revision), total)
+        elif form == "8" and use_mb:
+            bill = mb.bill_summary(ctx.bill_no).bill_no
+            table = build_form_8_mb(mb.entries_frame(bill), bill)
+        elif form == "8":
+            table = build_form_8(self.frame(items, revision), ctx)
+        elif form == "31" and use_mb:
+            summary = mb.bill_summary(ctx.bill_no)
+            table = build_form_31(summary.this_bill, summary.previous, summary.bill_no)
+        elif form == "31":
+            table = build_form_31(total)
+        else:
+            table = build_pwd6(total, ctx)
+        self._tables[form] = (key, table)
+        self.builds += 1
+        return table
@@ -0,0 +1,365 @@
+# dsr_ingest.py
+
+"""
+Streaming ingestion of full CPWD DSR / State SoR exports.
+
+The official schedules are usually converted from PDF to CSV, which
+leaves a file that is large (40+ MB), has descriptions broken over
+several physical lines or rows, and splits items into a heading row
+(e.g. 2.8 "Earth work in excavation ...") followed by sub-item rows
+(e.g. 2.8.1 "All kinds of soil") that only make sense together.
+
+DSRStreamIngestor reads such a file in fixed-size chunks so the parsing
+working set stays bounded, and:
+- resolves column names ("Item No", "Rate (Rs.)", ...) to code/description/unit/rate
+- joins continuation rows (blank code) onto the record above them
+- prefixes sub-item descriptions with their parent heading
+- normalises units (Cum, Sqm, Kg, ...) and rates ("1,234.50", "Rs. 250")
+- reports every rejected row with its row number and reason
+
+The accepted rows are emitted as a DataFrame ready for
+DSRParser.load_records(), which builds the parser's code index.
+"""
+
+from __future__ import annotations
+
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Tuple
+
+import pandas as pd
+
+from units import REGISTRY as UNIT_REGISTRY
+
+
+# ---------------------------------------------------------------------------
+# Column vocabulary
+# ---------------------------------------------------------------------------
+
+COLUMN_ALIASES: Dict[str, Tuple[str, ...]] = {
+    "code": ("code", "item no", "item no.", "item_no", "dsr code", "dsr_code", "dsr no", "dsr no."),
+    "description": ("description", "description of item", "item description", "particulars"),
+    "unit": ("unit", "units", "uom"),
+    "rate": ("rate", "rate (rs.)", "rate (₹)", "rate in rs", "rate_rs"),
+}
+
+class DSRIngestError(ValueError):
+    """Raised when a DSR file cannot be ingested at all (e.g. missing columns)."""
+
+
+# ---------------------------------------------------------------------------
+# Report containers
+# ---------------------------------------------------------------------------
+
+@dataclass
+class IngestReject:
+    """One rejected data row (row_no is 1-based, excluding the header)."""
+
+    row_no: int
+    code: str
+    reason: str
+    raw: str = ""
+
+
+@dataclass
+class IngestReport:
+    """Summary of one ingestion run."""
+
+    source: str
+    rows_read: int = 0
+    rows_accepted: int = 0
+    headings: int = 0
+    continuation_rows: int = 0
+    chunks: int = 0
+    rejects: List[IngestReject] = field(default_factory=list)
+    reject_count: int = 0
+
+    def rejects_frame(self) -> pd.DataFrame:
+        """Row-level rejects as a DataFrame (row_no, code, reason, raw); capped at max_rejects rows."""
+        df = pd.DataFrame(
+            [r.__dict__ for r in self.rejects],
+            columns=["row_no", "code", "reason", "raw"],
+        )
+        return df.sort_values("row_no", kind="stable", ignore_index=True)
+
+    def summary(self) -> Dict[str, int | str]:
+        return {
+            "source": self.source,
+            "rows_read": self.rows_read,
+            "rows_accepted": self.rows_accepted,
+            "headings": self.headings,
+            "continuation_rows": self.continuation_rows,
+            "rejects": self.reject_count,
+            "chunks": self.chunks,
+        }
+
+
+# ---------------------------------------------------------------------------
+# Vectorised normalisers
+# ---------------------------------------------------------------------------
+
+def normalise_unit_series(units: pd.Series) -> pd.Series:
+    """Map unit spellings to their canonical display form (unknown units kept as typed)."""
+    return UNIT_REGISTRY.canonical(units)
+
+
+def parse_rate_series(rates: pd.Series) -> pd.Series:
+    """
+    Parse rates such as "1,234.50", "1,23,456", "Rs. 250", "₹ 80.00".
+
+    Unparseable values become NaN; the caller decides whether that is a reject.
+    """
+    cleaned = (
+        rates.str.replace(r"(?i)rs\.?|₹|inr|/-", "", regex=True)
+        .str.replace(",", "", regex=False)
+        .str.replace(r"\s+", "", regex=True)
+    )
+    return pd.to_numeric(cleaned, errors="coerce")
+
+
+def _collapse_ws(text: pd.Series) -> pd.Series:
+    return text.str.replace(r"\s+", " ", regex=True).str.strip()
+
+
+# ---------------------------------------------------------------------------
+# Ingestor
+# ---------------------------------------------------------------------------
+
+class DSRStreamIngestor:
+    """
+    Chunked DSR/SoR CSV reader.
+
+    Parameters
+    ----------
+    path : str or Path
+        CSV file to read.
+    chunksize : int
+        Physical CSV records parsed per chunk (bounds peak memory).
+    max_rejects : int
+        Rejects kept in the report; further rejects are only counted.
+    encoding : str
+        File encoding (utf-8-sig also accepts plain UTF-8).
+    """
+
+    def __init__(
+        self,
+        path: str | Path,
+        chunksize: int = 50_000,
+        max_rejects: int = 10_000,
+        encoding: str = "utf-8-sig",
+    ):
+        self.path = Path(path)
+        self.chunksize = max(int(chunksize), 1)
+        self.max_rejects = max_rejects
+        self.encoding = encoding
+        self.report = IngestReport(source=str(self.path))
+
+        # Sequential state carried between chunks
+        self._headings: Dict[str, Tuple[str, str]] = {}
+        self._seen_codes: set[str] = set()
+        self._carry: Optional[pd.DataFrame] = None
+
+    # -----------------------------
+    # Column resolution
+    # -----------------------------
+    def _resolve_columns(self) -> Dict[str, str]:
+        """Map canonical names to the header names actually present in the file."""
+        header = pd.read_csv(self.path, nrows=0, encoding=self.encoding).columns
+        lookup = {str(c).lower().strip(): c for c in header}
+        resolved: Dict[str, str] = {}
+        for canon, aliases in COLUMN_ALIASES.items():
+            for alias in aliases:
+                if alias in lookup:
+                    resolved[canon] = lookup[alias]
+                    break
+        missing = set(COLUMN_ALIASES) - set(resolved)
+        if missing:
+            raise DSRIngestError(f"{self.path.name} is missing columns: {sorted(missing)}")
+        return resolved
+
+    # -----------------------------
+    # Reject bookkeeping
+    # -----------------------------
+    def _reject(self, rows: pd.DataFrame, reason: str) -> None:
+        if rows.empty:
+            return
+        self.report.reject_count += len(rows)
+        room = max(self.max_rejects - len(self.report.rejects), 0)
+        for row in rows.head(room).itertuples(index=False):
+            raw = f"{row.description[:60]} | {row.unit} | {row.rate}"
+            self.report.rejects.append(
+                IngestReject(row_no=int(row.row_no), code=row.code, reason=reason, raw=raw)
+            )
+
+    # -----------------------------
+    # Chunk processing
+    # -----------------------------
+    def _split_records(self, df: pd.DataFrame, final: bool) -> pd.DataFrame:
+        """
+        Fold continuation rows into their record and return one row per record.
+
+        The last record of a non-final chunk is held back, because its
+        continuation rows may start the next chunk.
+        """
+        if self._carry is not None:
+            df = pd.concat([self._carry, df], ignore_index=True)
+            self._carry = None
+
+        has_code = df["code"] != ""
+        group = has_code.cumsum()
+
+        orphan = group == 0
+        self._reject(df[orphan & ((df["description"] != "") | (df["rate"] != ""))],
+                     "continuation row without a preceding item")
+        df, has_code, group = df[~orphan], has_code[~orphan], group[~orphan]
+
+        if not final and has_code.any():
+            last = group.iloc[-1]
+            tail = group == last
+            self._carry = df[tail]
+            df, has_code, group = df[~tail], has_code[~tail], group[~tail]
+
+        cont = ~has_code
+        self._reject(df[cont & (df["rate"] != "")], "rate row without item code")
+        text_cont = cont & (df["rate"] == "") & (df["description"] != "")
+        self.report.continuation_rows += int(text_cont.sum())
+
+        heads = df[has_code].copy()
+        if text_cont.any():
+            extra = df[text_cont].groupby(group[text_cont])["description"].agg(" ".join)
+            tail_text = group[has_code].map(extra)
+            heads["description"] = heads["description"].str.cat(tail_text, sep=" ", na_rep="").str.rstrip()
+        heads["description"] = _collapse_ws(heads["description"])
+        return heads
+
+    def _parent_descriptions(self, codes: pd.Series) -> Tuple[pd.Series, pd.Series]:
+        """Nearest heading description/unit for each code (walks up to 3 levels)."""
+        parent_desc = codes.map({})
+        parent_unit = codes.map({})
+        if not self._headings:
+            return parent_desc, parent_unit
+        desc_map = {k: v[0] for k, v in self._headings.items()}
+        unit_map = {k: v[1] for k, v in self._headings.items() if v[1]}
+        prefix = codes
+        for _ in range(3):
+            prefix = prefix.str.rpartition(".")[0]
+            todo = parent_desc.isna() & (prefix != "")
+            if not todo.any():
+                break
+            parent_unit = parent_unit.where(~todo, prefix.map(unit_map))
+            parent_desc = parent_desc.where(~todo, prefix.map(desc_map))
+        return parent_desc, parent_unit
+
+    def _process(self, chunk: pd.DataFrame, final: bool) -> Optional[pd.DataFrame]:
+        recs = self._split_records(chunk, final)
+        if recs.empty:
+            return None
+
+        # Headings: code but no rate. Remember them for sub-items (possibly in later chunks).
+        is_heading = recs["rate"] == ""
+        headings = recs[is_heading]
+        self.report.headings += len(headings)
+        for code, desc, unit in zip(headings["code"], headings["description"], headings["unit"]):
+            self._headings[code] = (desc, unit)
+
+        items = recs[~is_heading].copy()
+        if items.empty:
+            return None
+
+        parent_desc, parent_unit = self._parent_descriptions(items["code"])
+        # Some exports already repeat the heading text on each sub-item
+        lead = parent_desc.fillna("").str[:40]
+        repeated = pd.Series(
+            [p != "" and d.startswith(p) for d, p in zip(items["description"], lead)],
+            index=items.index,
+        )
+        has_parent = parent_desc.notna() & ~repeated
+        items.loc[has_parent, "description"] = (
+            parent_desc[has_parent].astype(str) + " - " + items.loc[has_parent, "description"]
+        )
+        no_unit = items["unit"] == ""
+        items.loc[no_unit, "unit"] = parent_unit[no_unit].fillna("").astype(str)
+
+        rate = parse_rate_series(items["rate"])
+        unit = normalise_unit_series(items["unit"])
+
+        bad_rate = rate.isna()
+        neg_rate = rate < 0
+        no_unit = unit == ""
+        dup = items["code"].duplicated() | items["code"].isin(self._seen_codes)
+
+        self._reject(items[bad_rate], "unparseable rate")
+        self._reject(items[~bad_rate & neg_rate], "negative rate")
+        self._reject(items[~bad_rate & ~neg_rate & no_unit], "missing unit")
+        ok = ~(bad_rate | neg_rate | no_unit)
+        self._reject(items[ok & dup], "duplicate code")
+        ok &= ~dup
+
+        out = pd.DataFrame(
+            {
+                "code": items.loc[ok, "code"],
+                "description": items.loc[ok, "description"],
+                "unit": unit[ok],
+                "rate": rate[ok].astype("float64"),
+            }
+        )
+        self._seen_codes.update(out["code"])
+        self.report.rows_accepted += len(out)
+        return out
+
+    # -----------------------------
+    # Public API
+    # -----------------------------
+    def iter_chunks(self) -> Iterator[pd.DataFrame]:
+        """Yield accepted (code, description, unit, rate) frames chunk by chunk."""
+        cols = self._resolve_columns()
+        rename = {src: canon for canon, src in cols.items()}
+        reader = pd.read_csv(
+            self.path,
+            usecols=list(cols.values()),
+            dtype=str,
+            keep_default_na=False,
+            chunksize=self.chunksize,
+            encoding=self.encoding,
+            encoding_errors="replace",
+            skipinitialspace=True,
+        )
+        row_no = 0
+        pending: Optional[pd.DataFrame] = None
+        for chunk in reader:
+            chunk = chunk.rename(columns=rename)
+            for c in ("code", "description", "unit", "rate"):
+                chunk[c] = chunk[c].str.strip()
+            chunk.insert(0, "row_no", range(row_no + 1, row_no + len(chunk) + 1))
+            row_no += len(chunk)
+            self.report.rows_read += len(chunk)
+            self.report.chunks += 1
+
+            # Process one chunk behind so we know which chunk is the last.
+            if pending is not None:
+                out = self._process(pending, final=False)
+                if out is not None and not out.empty:
+                    yield out
+            pending = chunk
+
+        final = pending if pending is not None else pd.DataFrame(
+            columns=["row_no", "code", "description", "unit", "rate"]
+        )
+        out = self._process(final, final=True)
+        if out is not None and not out.empty:
+            yield out
+
+    def ingest(self) -> pd.DataFrame:
+        """Read the whole file and return the accepted rows as one DataFrame."""
+        parts = list(self.iter_chunks())
+        if not parts:
+            return pd.DataFrame(
+                {"code": pd.Series(dtype=str), "description": pd.Series(dtype=str),
+                 "unit": pd.Series(dtype=str), "rate": pd.Series(dtype="float64")}
+            )
+        return pd.concat(parts, ignore_index=True)
+
+    def ingest_into(self, parser) -> IngestReport:
+        """Ingest and load the result directly into a DSRParser's indexed store."""
+        parser.load_records(self.ingest(), report=self.report)
+        return self.report
@@ -2,6 +2,10 @@ import pandas as pd
 from pathlib import Path
 import streamlit as st
 
+from dsr_ingest import DSRIngestError, DSRStreamIngestor, IngestReport
+from instrumentation import timed
+from units import REGISTRY as UNIT_REGISTRY, UNKNOWN as UNKNOWN_UNIT
+
 
 class DSRParser:
     """
@@ -9,20 +13,26 @@ class DSRParser:
 
     - Expects a CSV file named 'dsr_items.csv' in the repo root (same folder as streamlit_app.py)
     - CSV columns: code, description, unit, rate
+    - Large CPWD/SoR exports are streamed in chunks by DSRStreamIngestor
     - Supports:
         * get_all_items()
         * find_matches(keyword, unit=None)
         * get_rate_for_code(code)
+        * load_records(df)  (indexed store, e.g. from DSRStreamIngestor)
     """
 
-    def __init__(self, csv_name: str = "dsr_items.csv"):
+    def __init__(self, csv_name: str = "dsr_items.csv", chunksize: int = 50_000):
         # CSV is expected in the same directory as this script / main app
         self.csv_name = csv_name
+        self.chunksize = chunksize
         self._df: pd.DataFrame | None = None
+        self._code_index: dict[str, int] = {}
+        self.ingest_report: IngestReport | None = None
 
     # -----------------------------
     # Internal loader
     # -----------------------------
+    @timed("dsr.load_dsr")
     def _load_dsr(self) -> pd.DataFrame:
         """
         Load DSR data from dsr_items.csv into a DataFrame.
@@ -41,32 +51,54 @@ class DSRParser:
 
         if path.is_file():
             try:
-                df = pd.read_csv(path)
+                DSRStreamIngestor(path, chunksize=self.chunksize).ingest_into(self)
+            except DSRIngestError as e:
+                st.warning(f"{e}. Using sample DSR items instead.")
+                self.load_records(self._sample_dsr())
             except Exception as e:
                 st.warning(f"Unable to read {self.csv_name}, using sample DSR data instead. Error: {e}")
-                df = self._sample_dsr()
+                self.load_records(self._sample_dsr())
+            else:
+                if self.ingest_report is not None and self.ingest_report.reject_count:
+                    st.warning(
+                        f"{self.csv_name}: {self.ingest_report.reject_count} row(s) rejected "
+                        "(see DSRParser.ingest_report for details)."
+                    )
+                if self._df is not None and self._df.empty:
+                    st.warning(f"{self.csv_name} has no valid rows. Using sample DSR items instead.")
+                    self.load_records(self._sample_dsr())
         else:
             st.info(f"DSR CSV '{self.csv_name}' not found in repo root. Using sample DSR items.")
-            df = self._sample_dsr()
+            self.load_records(self._sample_dsr())
+
+        return self._df
 
-        # Normalize columns
-        required_cols = {"code", "description", "unit", "rate"}
-        missing = required_cols - set(df.columns.str.lower())
-        if missing:
-            st.warning(f"{self.csv_name} is missing columns: {missing}. Using sample DSR items instead.")
-            df = self._sample_dsr()
+    @timed("dsr.load_records")
+    def load_records(self, df: pd.DataFrame, report: IngestReport | None = None) -> None:
+        """
+        Replace the DSR store with df and rebuild the code index.
 
-        # Standardize column names
-        df.columns = [c.lower().strip() for c in df.columns]
+        df must have columns code, description, unit, rate (any case);
+        a unit_id column (units.REGISTRY IDs) is added.
+        The first occurrence of a code wins in get_rate_for_code().
+        """
+        df = df.copy()
+        df.columns = [str(c).lower().strip() for c in df.columns]
 
         # Cast types
         df["code"] = df["code"].astype(str)
         df["description"] = df["description"].astype(str)
         df["unit"] = df["unit"].astype(str)
         df["rate"] = pd.to_numeric(df["rate"], errors="coerce")
+        df = df.reset_index(drop=True)
+        # Integer-coded units so unit filters are integer comparisons
+        df["unit_id"] = UNIT_REGISTRY.encode(df["unit"])
 
+        codes = df["code"]
+        first = ~codes.duplicated()
+        self._code_index = dict(zip(codes[first], df.index[first]))
         self._df = df
-        return self._df
+        self.ingest_report = report
 
     def _sample_dsr(self) -> pd.DataFrame:
         """
@@ -116,19 +148,21 @@ class DSRParser:
     # -----------------------------
     # Public API
     # -----------------------------
+    @timed("dsr.get_all_items")
     def get_all_items(self) -> pd.DataFrame:
         """
         Return the full DSR table as a DataFrame.
         """
         return self._load_dsr().copy()
 
+    @timed("dsr.find_matches")
     def find_matches(self, keyword: str, unit: str | None = None) -> pd.DataFrame:
         """
         Find DSR items that match a keyword and optional unit.
 
         Parameters:
         - keyword : part of description to search (case-insensitive)
-        - unit    : optional unit filter (e.g., 'Cum', 'Sqm')
+        - unit    : optional unit filter (e.g., 'Cum', 'cu.m.', 'Sqm'; any spelling)
 
         Returns:
         - DataFrame subset with matching rows.
@@ -140,10 +174,15 @@ class DSRParser:
         mask = df["description"].str.contains(keyword, case=False, na=False)
 
         if unit:
-            mask &= df["unit"].str.lower().eq(unit.lower())
+            uid = UNIT_REGISTRY.unit_id(unit)
+            if uid != UNKNOWN_UNIT:
+                mask &= df["unit_id"].eq(uid)
+            else:
+                mask &= df["unit"].str.lower().eq(unit.lower().strip())
 
         return df[mask].copy()
 
+    @timed("dsr.get_rate_for_code")
     def get_rate_for_code(self, code: str) -> float | None:
         """
         Get rate (₹) for a given DSR code.
@@ -151,11 +190,12 @@ class DSRParser:
         Returns None if code not found or rate invalid.
         """
         df = self._load_dsr()
-        row = df[df["code"].astype(str) == str(code)]
-        if row.empty:
+        pos = self._code_index.get(str(code))
+        if pos is None:
             return None
-        rate_val = row.iloc[0].get("rate", None)
+        rate_val = df.at[pos, "rate"]
         try:
-            return float(rate_val)
+            rate = float(rate_val)
         except (TypeError, ValueError):
             return None
+        return None if pd.isna(rate) else rate
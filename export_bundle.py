@@ -0,0 +1,289 @@
+# export_bundle.py
+
+"""
+One-pass export bundle for an estimate.
+
+The estimate is walked once into the shared numeric items frame
+(FormCache.frame); every government form, the BOQ and the Abstract are
+derived from that frame and from the WBS tree's cached subtotals, then
+written into a single zip:
+
+    forms/Form5A.csv ... forms/PWD6.csv     formatted, as shown in the app
+    BOQ_Abstract.xlsx                       BOQGenerator.to_excel_bytes()
+    Forms.xlsx                              numeric form tables, one sheet each
+    parquet/*.parquet                       numeric tables (only if pyarrow is installed)
+    Forms.pdf                               plain-text PDF of all forms
+
+The PDF is written by a small built-in writer (standard Courier font,
+no external dependency); since standard PDF fonts have no ₹ glyph,
+amounts are printed with "Rs.".
+"""
+
+from __future__ import annotations
+
+import time
+import zipfile
+from dataclasses import dataclass, field
+from io import BytesIO
+from typing import Callable, Dict, Iterable, List, Mapping, Sequence
+
+import pandas as pd
+from openpyxl import Workbook
+
+from boq_generator import BOQGenerator
+from cpwd_forms import FORM_KEYS, FormCache, FormContext, FormTable
+from instrumentation import timed
+
+try:  # optional: Parquet output
+    import pyarrow  # noqa: F401
+except ImportError:  # pragma: no cover - depends on environment
+    pyarrow = None
+
+EXPORT_FORMATS = ("csv", "xlsx", "parquet", "pdf")
+
+FORM_FILE_NAMES = {"5A": "Form5A", "7": "Form7", "8": "Form8", "31": "Form31", "PWD6": "PWD6"}
+
+IS_REFERENCE = "IS 1200"
+RATE_SOURCE = "CPWD DSR 2023"
+
+
+def parquet_available() -> bool:
+    return pyarrow is not None
+
+
+# -----------------------------
+# Minimal PDF writer
+# -----------------------------
+class SimplePDF:
+    """
+    Text-only PDF (Courier, landscape A4) built from lines of text.
+
+    Only what export needs: fixed-pitch lines, automatic page breaks,
+    a title per section. Text is reduced to Latin-1.
+    """
+
+    PAGE_W, PAGE_H = 842, 595
+    MARGIN = 36
+    FONT_SIZE = 7
+    LEADING = 9
+
+    def __init__(self):
+        self.pages: List[List[str]] = []
+        self._lines_per_page = int((self.PAGE_H - 2 * self.MARGIN) / self.LEADING)
+
+    @staticmethod
+    def _clean(text: str) -> str:
+        text = text.replace("₹", "Rs.").replace("**", "")
+        return text.encode("latin-1", "replace").decode("latin-1")
+
+    def add_section(self, title: str, lines: Iterable[str]) -> None:
+        """Start a new page with title, then the lines (paginated)."""
+        page: List[str] = [title, "=" * len(title), ""]
+        for line in lines:
+            if len(page) >= self._lines_per_page:
+                self.pages.append(page)
+                page = [f"{title} (contd.)", ""]
+            page.append(line)
+        self.pages.append(page)
+
+    def add_table(self, title: str, df: pd.DataFrame, max_width: int = 40) -> None:
+        """Fixed-width text rendering of a (formatted) table."""
+        text = df.astype(str).apply(lambda s: s.map(self._clean).str.slice(0, max_width))
+        headers = [self._clean(str(c))[:max_width] for c in text.columns]
+        widths = [
+            max(len(h), int(text[c].str.len().max()) if len(text) else 0)
+            for h, c in zip(headers, text.columns)
+        ]
+        fmt = "  ".join(f"{{:<{w}}}" for w in widths)
+        lines = [fmt.format(*headers), "-" * (sum(widths) + 2 * (len(widths) - 1))]
+        lines.extend(fmt.format(*row) for row in text.itertuples(index=False, name=None))
+        self.add_section(self._clean(title), lines)
+
+    @staticmethod
+    def _escape(line: str) -> str:
+        return line.replace("\\", "\\\\").replace("(", "\\(").replace(")", "\\)")
+
+    def to_bytes(self) -> bytes:
+        objects: List[bytes] = []
+
+        def add(obj: bytes) -> int:
+            objects.append(obj)
+            return len(objects)
+
+        catalog = add(b"")            # filled below
+        pages_obj = add(b"")
+        font = add(b"<< /Type /Font /Subtype /Type1 /BaseFont /Courier /Encoding /WinAnsiEncoding >>")
+        kids = []
+        top = self.PAGE_H - self.MARGIN
+        for page in self.pages or [[""]]:
+            body = [f"BT /F1 {self.FONT_SIZE} Tf {self.LEADING} TL {self.MARGIN} {top} Td"]
+            body += [f"({self._escape(self._clean(line))}) '" for line in page]
+            body.append("ET")
+            stream = "\n".join(body).encode("latin-1", "replace")
+            content = add(b"<< /Length %d >>\nstream\n" % len(stream) + stream + b"\nendstream")
+            kids.append(
+                add(
+                    b"<< /Type /Page /Parent %d 0 R /MediaBox [0 0 %d %d] "
+                    b"/Resources << /Font << /F1 %d 0 R >> >> /Contents %d 0 R >>"
+                    % (pages_obj, self.PAGE_W, self.PAGE_H, font, content)
+                )
+            )
+        objects[catalog - 1] = b"<< /Type /Catalog /Pages %d 0 R >>" % pages_obj
+        objects[pages_obj - 1] = b"<< /Type /Pages /Kids [%s] /Count %d >>" % (
+            b" ".join(b"%d 0 R" % k for k in kids), len(kids)
+        )
+
+        out = BytesIO()
+        out.write(b"%PDF-1.4\n")
+        offsets = []
+        for i, obj in enumerate(objects, start=1):
+            offsets.append(out.tell())
+            out.write(b"%d 0 obj\n" % i + obj + b"\nendobj\n")
+        xref = out.tell()
+        out.write(b"xref\n0 %d\n0000000000 65535 f \n" % (len(objects) + 1))
+        out.write(b"".join(b"%010d 00000 n \n" % off for off in offsets))
+        out.write(
+            b"trailer\n<< /Size %d /Root %d 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (len(objects) + 1, catalog, xref)
+        )
+        return out.getvalue()
+
+
+# -----------------------------
+# Bundle
+# -----------------------------
+def boq_frame(frame: pd.DataFrame) -> pd.DataFrame:
+    """BOQ sheet (BOQGenerator.generate_dataframe layout) from the numeric items frame."""
+    return pd.DataFrame(
+        {
+            "Item No": frame["id"],
+            "Description of Item": frame["item"],
+            "Unit": frame["unit"],
+            "Quantity": frame["quantity"],
+            "Rate (₹)": frame["rate"],
+            "Amount (₹)": frame["amount"],
+            "WBS Level 1": frame["phase"],
+            "WBS Level 2": frame["item"],
+            "IS Reference": IS_REFERENCE,
+            "Rate Source": RATE_SOURCE,
+            "Note": "",
+        }
+    )
+
+
+@dataclass
+class ExportBundle:
+    """Zip bytes plus a manifest (file name, bytes, seconds spent)."""
+
+    data: bytes
+    manifest: List[dict] = field(default_factory=list)
+
+    @property
+    def seconds(self) -> float:
+        return sum(m["seconds"] for m in self.manifest)
+
+    def manifest_frame(self) -> pd.DataFrame:
+        return pd.DataFrame(self.manifest, columns=["file", "bytes", "seconds"])
+
+
+@timed("export.build_export_bundle")
+def build_export_bundle(
+    cache: FormCache,
+    *,
+    revision: int,
+    items: Callable[[], Iterable[Mapping]] | Iterable[Mapping],
+    tree,
+    ctx: FormContext | None = None,
+    formats: Sequence[str] = EXPORT_FORMATS,
+    contingency_pct: float | None = None,
+    cost_index: float | None = None,
+    dsr_year: str = "2023",
+    mb=None,
+) -> ExportBundle:
+    """
+    Build every form plus BOQ/Abstract and write them into one zip.
+
+    Forms come from (and are left in) the FormCache, so a bundle built
+    after viewing forms in the app reuses them, and vice versa.
+    With a MeasurementBook (mb), Forms 8 and 31 cover RA bill ctx.bill_no.
+    Without ctx the forms are dated today.
+    """
+    unknown = set(formats) - set(EXPORT_FORMATS)
+    if unknown:
+        raise ValueError(f"Unknown export formats: {sorted(unknown)}")
+    if ctx is None:
+        ctx = FormContext()
+
+    manifest: List[dict] = []
+    buf = BytesIO()
+
+    def timed_write(zf: zipfile.ZipFile, name: str, make: Callable[[], bytes | str]) -> None:
+        t0 = time.perf_counter()
+        payload = make()
+        zf.writestr(name, payload)
+        size = len(payload.encode("utf-8") if isinstance(payload, str) else payload)
+        manifest.append({"file": name, "bytes": size, "seconds": time.perf_counter() - t0})
+
+    t0 = time.perf_counter()
+    frame = cache.frame(items, revision)
+    forms: Dict[str, FormTable] = {
+        key: cache.get(key, revision=revision, items=items, tree=tree, ctx=ctx, mb=mb) for key in FORM_KEYS
+    }
+    manifest.append({"file": "(build forms)", "bytes": 0, "seconds": time.perf_counter() - t0})
+
+    with zipfile.ZipFile(buf, "w", compression=zipfile.ZIP_DEFLATED) as zf:
+        if "csv" in formats:
+            for key, form in forms.items():
+                timed_write(zf, f"forms/{FORM_FILE_NAMES[key]}.csv", form.to_csv)
+
+        if "xlsx" in formats:
+            boq = boq_frame(frame)
+
+            def boq_xlsx() -> bytes:
+                return BOQGenerator().to_excel_bytes(
+                    boq,
+                    section_totals=tree.section_totals("phase"),
+                    base_total=float(tree.total),
+                    contingency_pct=contingency_pct,
+                    cost_index=cost_index,
+                    dsr_year=dsr_year,
+                )
+
+            def forms_xlsx() -> bytes:
+                # write-only workbook: rows are streamed, no cell objects kept
+                wb = Workbook(write_only=True)
+                for key, form in forms.items():
+                    ws = wb.create_sheet(FORM_FILE_NAMES[key])
+                    ws.append([str(c) for c in form.data.columns])
+                    data = form.data.astype(object).where(form.data.notna(), None)
+                    for row in data.itertuples(index=False, name=None):
+                        ws.append(row)
+                out = BytesIO()
+                wb.save(out)
+                return out.getvalue()
+
+            timed_write(zf, "BOQ_Abstract.xlsx", boq_xlsx)
+            timed_write(zf, "Forms.xlsx", forms_xlsx)
+
+        if "parquet" in formats and parquet_available():
+            def to_parquet(df: pd.DataFrame) -> Callable[[], bytes]:
+                def make() -> bytes:
+                    out = BytesIO()
+                    # mixed label/number columns (e.g. PWD6 details) are stored as text
+                    df.astype({c: str for c in df.columns if df[c].dtype == object}).to_parquet(out, index=False)
+                    return out.getvalue()
+                return make
+
+            timed_write(zf, "parquet/items.parquet", to_parquet(frame))
+            for key, form in forms.items():
+                timed_write(zf, f"parquet/{FORM_FILE_NAMES[key]}.parquet", to_parquet(form.data))
+
+        if "pdf" in formats:
+            def pdf() -> bytes:
+                doc = SimplePDF()
+                for form in forms.values():
+                    doc.add_table(f"{form.title} - {ctx.project}", form.display())
+                return doc.to_bytes()
+
+            timed_write(zf, "Forms.pdf", pdf)
+
+    return ExportBundle(buf.getvalue(), manifest)
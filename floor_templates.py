@@ -0,0 +1,260 @@
+# floor_templates.py
+
+"""
+Typical-floor replication.
+
+High-rise estimates repeat the same floor 15–30 times. Instead of
+re-measuring each repeat, one floor is measured once and saved as a
+FloorTemplate (a tuple of item IDs). Each repeat is a FloorReplica – a
+lightweight reference (template name, floor label, multiplier).
+
+Nothing is copied:
+- totals are template subtotals × multiplier, summed over replicas
+- the WBS tree gets one weighted entry per (replica, phase, element)
+- forms/exports iterate ReplicatedItem views that read through to the
+  measured item dict and scale quantity/amount on access
+
+When measured items are edited or deleted, forget_items() drops deleted
+IDs from the templates and refresh_tree() re-registers the replicas'
+WBS entries from the current items.
+"""
+
+from __future__ import annotations
+
+from collections.abc import Mapping
+from dataclasses import dataclass, replace
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from wbs_tree import item_path
+
+GetItem = Callable[[int], dict]
+
+
+def replica_item_id(base_id, index: int) -> str:
+    """ID of a measured item's view on replica index (e.g. "3-R0")."""
+    return f"{base_id}-R{index}"
+
+
+@dataclass(frozen=True)
+class FloorTemplate:
+    name: str
+    building: str
+    source_floor: str
+    item_ids: Tuple[int, ...]
+
+
+@dataclass(frozen=True)
+class FloorReplica:
+    template: str
+    floor: str
+    multiplier: float = 1.0
+
+
+class ReplicatedItem(Mapping):
+    """
+    Read-only view of a measured item as it appears on a replicated floor.
+
+    quantity and amount are scaled by the replica multiplier; id, floor and
+    building describe the replica. All other keys read through to the
+    measured item dict.
+    """
+
+    __slots__ = ("_base", "_replica", "_building", "_index")
+
+    _OVERRIDES = ("id", "floor", "building", "quantity", "amount", "replica_of")
+
+    def __init__(self, base: dict, replica: FloorReplica, building: str, index: int):
+        self._base = base
+        self._replica = replica
+        self._building = building
+        self._index = index
+
+    def __getitem__(self, key):
+        if key == "quantity":
+            return float(self._base["quantity"]) * self._replica.multiplier
+        if key == "amount":
+            return float(self._base["amount"]) * self._replica.multiplier
+        if key == "floor":
+            return self._replica.floor
+        if key == "building":
+            return self._building
+        if key == "id":
+            return replica_item_id(self._base["id"], self._index)
+        if key == "replica_of":
+            return self._base["id"]
+        return self._base[key]
+
+    def __iter__(self):
+        yield from self._base
+        for k in self._OVERRIDES:
+            if k not in self._base:
+                yield k
+
+    def __len__(self) -> int:
+        return len(set(self._base) | set(self._OVERRIDES))
+
+
+class FloorReplicator:
+    """Templates and replicas for one estimate."""
+
+    def __init__(self):
+        self.templates: Dict[str, FloorTemplate] = {}
+        self.replicas: List[FloorReplica] = []
+        # template → (per (phase, element) (count, amount), total amount) at _summary_revision
+        self._summary_cache: Dict[str, Tuple[Dict[Tuple[str, str], Tuple[int, float]], float]] = {}
+        self._summary_revision: Optional[int] = None
+        # replica index → WBS entry keys registered by register_in_tree()
+        self._tree_keys: Dict[int, List[tuple]] = {}
+
+    # -----------------------------
+    # Definition
+    # -----------------------------
+    def define_template(self, name: str, items: Iterable[dict]) -> FloorTemplate:
+        """Save the given measured items (one floor) as a template."""
+        items = list(items)
+        if not items:
+            raise ValueError("A floor template needs at least one measured item")
+        if name in self.templates:
+            raise ValueError(f"Template '{name}' already exists")
+        # same defaults as the measured items' WBS paths, so replicas land under the same building
+        building, source_floor, _, _ = item_path(items[0])
+        tpl = FloorTemplate(
+            name=name,
+            building=building,
+            source_floor=source_floor,
+            item_ids=tuple(it["id"] for it in items),
+        )
+        self.templates[name] = tpl
+        return tpl
+
+    def replicate(self, template: str, floors: Iterable[str], multiplier: float = 1.0) -> List[int]:
+        """Add one replica per floor label; returns their indices."""
+        if template not in self.templates:
+            raise KeyError(f"Unknown floor template '{template}'")
+        if multiplier <= 0:
+            raise ValueError("Replica multiplier must be positive")
+        start = len(self.replicas)
+        for floor in floors:
+            self.replicas.append(FloorReplica(template, str(floor), float(multiplier)))
+        return list(range(start, len(self.replicas)))
+
+    # -----------------------------
+    # Lazy aggregates
+    # -----------------------------
+    def template_summary(
+        self, name: str, get_item: GetItem, revision: int = 0
+    ) -> Tuple[Dict[Tuple[str, str], Tuple[int, float]], float]:
+        """((phase, element) → (count, amount), total) for one template, cached per revision."""
+        if revision != self._summary_revision:
+            self._summary_cache.clear()
+            self._summary_revision = revision
+        cached = self._summary_cache.get(name)
+        if cached is not None:
+            return cached
+        groups: Dict[Tuple[str, str], Tuple[int, float]] = {}
+        total = 0.0
+        for item_id in self.templates[name].item_ids:
+            it = get_item(item_id)
+            amt = float(it["amount"])
+            g = (str(it["phase"]), str(it["item"]))
+            c, a = groups.get(g, (0, 0.0))
+            groups[g] = (c + 1, a + amt)
+            total += amt
+        self._summary_cache[name] = (groups, total)
+        return groups, total
+
+    def replica_total(self, index: int, get_item: GetItem, revision: int = 0) -> float:
+        rep = self.replicas[index]
+        return self.template_summary(rep.template, get_item, revision)[1] * rep.multiplier
+
+    def total(self, get_item: GetItem, revision: int = 0) -> float:
+        """Amount added by all replicas (excluding the measured floors)."""
+        return sum(self.replica_total(i, get_item, revision) for i in range(len(self.replicas)))
+
+    def replica_item_count(self) -> int:
+        return sum(len(self.templates[r.template].item_ids) for r in self.replicas)
+
+    def register_in_tree(self, tree, index: int, get_item: GetItem, revision: int = 0) -> None:
+        """Add one weighted WBS entry per (phase, element) of the replica's template."""
+        rep = self.replicas[index]
+        tpl = self.templates[rep.template]
+        groups, _ = self.template_summary(rep.template, get_item, revision)
+        keys = self._tree_keys.setdefault(index, [])
+        for (phase, element), (count, amount) in groups.items():
+            key = ("replica", index, phase, element)
+            tree.add_item(
+                key,
+                (tpl.building, rep.floor, phase, element),
+                amount * rep.multiplier,
+                count=count,
+            )
+            keys.append(key)
+
+    def refresh_tree(self, tree, get_item: GetItem, revision: int = 0) -> None:
+        """Re-register every replica's WBS entries (after measured items changed)."""
+        for index in range(len(self.replicas)):
+            for key in self._tree_keys.pop(index, ()):
+                if key in tree:
+                    tree.remove_item(key)
+            self.register_in_tree(tree, index, get_item, revision)
+
+    # -----------------------------
+    # Edits to measured items
+    # -----------------------------
+    def replica_ids(self, item_ids: Iterable[int]) -> List[str]:
+        """IDs of the replica views of the given measured items."""
+        wanted = set(item_ids)
+        return [
+            replica_item_id(item_id, index)
+            for index, rep in enumerate(self.replicas)
+            for item_id in self.templates[rep.template].item_ids
+            if item_id in wanted
+        ]
+
+    def views_of(self, item_ids: Iterable[int], get_item: GetItem) -> List[ReplicatedItem]:
+        """Replica views of the given measured items (as they read now)."""
+        wanted = set(item_ids)
+        return [
+            ReplicatedItem(get_item(item_id), rep, self.templates[rep.template].building, index)
+            for index, rep in enumerate(self.replicas)
+            for item_id in self.templates[rep.template].item_ids
+            if item_id in wanted
+        ]
+
+    def forget_items(self, item_ids: Iterable[int]) -> None:
+        """Drop deleted measured items from every template (their replicas shrink with them)."""
+        gone = set(item_ids)
+        for name, tpl in self.templates.items():
+            if gone.intersection(tpl.item_ids):
+                self.templates[name] = replace(tpl, item_ids=tuple(i for i in tpl.item_ids if i not in gone))
+        self._summary_cache.clear()
+
+    # -----------------------------
+    # Lazy expansion
+    # -----------------------------
+    def replica_items(self, index: int, get_item: GetItem) -> Iterator[ReplicatedItem]:
+        """Item views of one replica."""
+        rep = self.replicas[index]
+        tpl = self.templates[rep.template]
+        for item_id in tpl.item_ids:
+            yield ReplicatedItem(get_item(item_id), rep, tpl.building, index)
+
+    def iter_items(self, get_item: GetItem) -> Iterator[ReplicatedItem]:
+        """Replicated item views, floor by floor (no dicts are copied)."""
+        for index in range(len(self.replicas)):
+            yield from self.replica_items(index, get_item)
+
+    def summary(self, get_item: GetItem, revision: int = 0) -> List[dict]:
+        """One row per replica for display."""
+        rows = []
+        for i, rep in enumerate(self.replicas):
+            rows.append(
+                {
+                    "template": rep.template,
+                    "floor": rep.floor,
+                    "multiplier": rep.multiplier,
+                    "items": len(self.templates[rep.template].item_ids),
+                    "amount": self.replica_total(i, get_item, revision),
+                }
+            )
+        return rows
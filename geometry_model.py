@@ -0,0 +1,363 @@
+# geometry_model.py
+
+"""
+Lightweight building geometry model.
+
+Instead of typing L/B/D for every wall, floor and slab, the building is
+described once:
+
+- grid lines (named x / y offsets) to place points, e.g. ("A", "1")
+- walls as centreline segments with thickness, height and finished faces
+- openings hosted on walls (see openings.py)
+- rooms and slabs as polygons
+
+and the IS 1200 quantities are derived from it in one vectorised pass:
+
+    masonry   centreline length × thickness × height, less openings
+    plaster   centreline length × height × faces, less openings
+    flooring  room polygon area (shoelace)
+    skirting  room perimeter × skirting height
+    slab      polygon area × thickness; formwork = soffit + edges
+
+Junction correction: a wall ending against another one (T or cross
+junction) overlaps it by half the thickness of the wall it meets, and
+that overlap is deducted from the ending wall. Junctions are found where
+walls share an endpoint and where a wall's endpoint lies partway along
+another wall (the latter is split there). At each junction the thickest
+straight run through it (a split wall, or two collinear walls ending
+back to back) is the wall met; without one, the thickest wall. L corners
+need no correction with centreline measurement.
+
+    >>> m = BuildingModel()
+    >>> m.add_walls(pd.DataFrame({"wall": ["W1", "W2", "W3", "W4", "W5"],
+    ...     "x0": [0, 10, 10, 0, 5], "y0": [0, 0, 8, 8, 0], "x1": [10, 10, 0, 0, 5], "y1": [0, 8, 8, 0, 8],
+    ...     "thickness": [0.23, 0.23, 0.23, 0.23, 0.115]}))
+    >>> m.wall_table()["junction_correction"].round(3).tolist()
+    [0.0, 0.0, 0.0, 0.0, 0.23]
+
+(python -m doctest geometry_model.py)
+"""
+
+from __future__ import annotations
+
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from openings import opening_deductions
+
+Point = Tuple[float, float]
+
+# Derived quantity kind → CPWD_BASE_DSR_2023 item name (app catalogue)
+DEFAULT_ITEM_MAP: Dict[str, str] = {
+    "masonry": "Brickwork 230mm (6.1.1)",
+    "plaster": "Plaster 12mm 1:6 (11.1.1)",
+    "flooring": "Vitrified Tiles 600x600 (14.1.1)",
+    "skirting": "Vitrified Tiles 600x600 (14.1.1)",
+    "slab_concrete": "RCC M25 Slab 150mm (13.4.1)",
+    "slab_formwork": "Centering & shuttering for beams & slabs",
+}
+
+DEFAULT_SKIRTING_HEIGHT = 0.10
+
+
+class GeometryError(ValueError):
+    """Raised for invalid geometry (unknown grid lines, degenerate polygons...)."""
+
+
+def polygon_metrics(xs: np.ndarray, ys: np.ndarray, ptr: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Areas and perimeters of many polygons stored CSR-style.
+
+    Polygon i has vertices xs[ptr[i]:ptr[i+1]] (no repeated closing vertex).
+    """
+    n = len(ptr) - 1
+    if n == 0:
+        return np.zeros(0), np.zeros(0)
+    counts = np.diff(ptr)
+    group = np.repeat(np.arange(n), counts)
+    nxt = np.arange(len(xs)) + 1
+    nxt[ptr[1:] - 1] = ptr[:-1]                     # wrap to each polygon's first vertex
+    cross = xs * ys[nxt] - xs[nxt] * ys
+    area = np.abs(np.bincount(group, weights=cross, minlength=n)) / 2.0
+    edge = np.hypot(xs[nxt] - xs, ys[nxt] - ys)
+    perimeter = np.bincount(group, weights=edge, minlength=n)
+    return area, perimeter
+
+
+class BuildingModel:
+    """
+    Walls, openings, rooms and slabs of one building / floor.
+
+    Elements are appended to plain lists; arrays are built on demand, so
+    adding elements is cheap and derivation is a single vectorised pass.
+    """
+
+    def __init__(self, tolerance: float = 1e-3):
+        self.tolerance = tolerance
+        self.grid_x: Dict[str, float] = {}
+        self.grid_y: Dict[str, float] = {}
+        self._walls: Dict[str, list] = {c: [] for c in ("wall", "x0", "y0", "x1", "y1", "thickness", "height", "sides")}
+        self._openings: Dict[str, list] = {c: [] for c in ("type", "w", "h", "count", "wall")}
+        self._polys: Dict[str, Dict[str, list]] = {
+            kind: {"name": [], "xs": [], "ys": [], "ptr": [0], "param": []} for kind in ("room", "slab")
+        }
+
+    # -----------------------------
+    # Grid
+    # -----------------------------
+    def add_grid(self, name: str, axis: str, offset: float) -> None:
+        """Named grid line: axis "x" (vertical line at x = offset) or "y"."""
+        if axis not in ("x", "y"):
+            raise GeometryError(f"Grid axis must be 'x' or 'y', got {axis!r}")
+        (self.grid_x if axis == "x" else self.grid_y)[str(name)] = float(offset)
+
+    def point(self, ref) -> Point:
+        """(x, y) from coordinates or a (x grid, y grid) name pair such as ("A", "1")."""
+        a, b = ref
+        try:
+            x = float(a) if not isinstance(a, str) else self.grid_x[a]
+            y = float(b) if not isinstance(b, str) else self.grid_y[b]
+        except KeyError as exc:
+            raise GeometryError(f"Unknown grid line {exc.args[0]!r}") from None
+        return x, y
+
+    # -----------------------------
+    # Elements
+    # -----------------------------
+    def add_wall(
+        self, start, end, thickness: float = 0.23, height: float = 3.0, sides: int = 2,
+        wall_id: Optional[str] = None,
+    ) -> str:
+        (x0, y0), (x1, y1) = self.point(start), self.point(end)
+        if np.hypot(x1 - x0, y1 - y0) <= self.tolerance:
+            raise GeometryError("Wall has zero length")
+        wall_id = str(wall_id or f"W{len(self._walls['wall']) + 1}")
+        for c, v in zip(self._walls, (wall_id, x0, y0, x1, y1, float(thickness), float(height), int(sides))):
+            self._walls[c].append(v)
+        return wall_id
+
+    def add_walls(self, walls: pd.DataFrame) -> None:
+        """Bulk add: columns x0, y0, x1, y1 and optional wall, thickness, height, sides."""
+        missing = [c for c in ("x0", "y0", "x1", "y1") if c not in walls]
+        if missing:
+            raise GeometryError(f"Wall schedule needs columns {missing}")
+        start = len(self._walls["wall"])
+        auto_ids = pd.Series([f"W{start + i + 1}" for i in range(len(walls))], index=walls.index)
+        ids = walls["wall"] if "wall" in walls else auto_ids
+        ids = ids.where(ids.notna() & (ids.astype(str).str.strip() != ""), auto_ids)
+        self._walls["wall"].extend(ids.astype(str).tolist())
+        for c, default in (("x0", 0.0), ("y0", 0.0), ("x1", 0.0), ("y1", 0.0),
+                           ("thickness", 0.23), ("height", 3.0), ("sides", 2)):
+            col = pd.to_numeric(walls[c], errors="coerce") if c in walls else pd.Series(default, index=walls.index)
+            self._walls[c].extend(col.fillna(default).tolist())
+
+    def add_opening(self, wall_id: str, w: float, h: float, count: int = 1, type: str = "") -> None:
+        for c, v in zip(self._openings, (type, float(w), float(h), float(count), str(wall_id))):
+            self._openings[c].append(v)
+
+    def add_openings(self, openings: pd.DataFrame) -> None:
+        """Bulk add: columns type, w, h, count, wall."""
+        df = openings.reindex(columns=list(self._openings))
+        for c in self._openings:
+            self._openings[c].extend(df[c].tolist())
+
+    def _add_polygon(self, kind: str, name: str, vertices: Iterable, param: float) -> None:
+        pts = [self.point(v) for v in vertices]
+        if len(pts) < 3:
+            raise GeometryError(f"{kind.title()} '{name}' needs at least 3 vertices")
+        if np.hypot(pts[0][0] - pts[-1][0], pts[0][1] - pts[-1][1]) <= self.tolerance:
+            pts = pts[:-1]                                  # closing vertex repeated
+        store = self._polys[kind]
+        store["name"].append(str(name))
+        store["xs"].extend(p[0] for p in pts)
+        store["ys"].extend(p[1] for p in pts)
+        store["ptr"].append(store["ptr"][-1] + len(pts))
+        store["param"].append(float(param))
+
+    def add_room(self, name: str, vertices: Iterable, skirting_height: float = DEFAULT_SKIRTING_HEIGHT) -> None:
+        self._add_polygon("room", name, vertices, skirting_height)
+
+    def add_slab(self, name: str, vertices: Iterable, thickness: float = 0.15) -> None:
+        self._add_polygon("slab", name, vertices, thickness)
+
+    # -----------------------------
+    # Derivation
+    # -----------------------------
+    def wall_table(self) -> pd.DataFrame:
+        """
+        Per wall: centreline length, junction correction, net length,
+        plaster and masonry gross / deduction / net.
+        """
+        w = {c: np.asarray(v) for c, v in self._walls.items()}
+        n = len(w["wall"])
+        if n == 0:
+            return pd.DataFrame(
+                columns=["wall", "length", "junction_correction", "net_length", "thickness", "height", "sides"]
+            )
+        x0, y0, x1, y1 = (w[c].astype(float) for c in ("x0", "y0", "x1", "y1"))
+        thick = w["thickness"].astype(float)
+        length = np.hypot(x1 - x0, y1 - y0)
+
+        correction = self._junction_corrections(x0, y0, x1, y1, thick, length)
+        net_length = np.maximum(length - correction, 0.0)
+
+        return pd.DataFrame(
+            {
+                "wall": w["wall"].astype(str),
+                "length": length,
+                "junction_correction": correction,
+                "net_length": net_length,
+                "thickness": thick,
+                "height": w["height"].astype(float),
+                "sides": w["sides"].astype(int),
+            }
+        )
+
+    def _junction_corrections(self, x0, y0, x1, y1, thick, length) -> np.ndarray:
+        """Centreline overlap to deduct per wall (half the met wall's thickness per junction end)."""
+        n = len(length)
+        ux, uy = (x1 - x0) / length, (y1 - y0) / length
+        # incidences: each wall end (pointing into the wall) ...
+        px, py = np.r_[x0, x1], np.r_[y0, y1]
+        inc_wall = np.r_[np.arange(n), np.arange(n)]
+        inc_dx, inc_dy = np.r_[ux, -ux], np.r_[uy, -uy]
+        inc_end = np.ones(2 * n, dtype=bool)
+
+        # ... plus both halves of a wall split where another wall's endpoint lies on it
+        hit_pt, hit_wall = self._endpoints_on_walls(px, py, x0, y0, x1, y1, ux, uy, length)
+        if len(hit_pt):
+            px, py = np.r_[px, px[hit_pt], px[hit_pt]], np.r_[py, py[hit_pt], py[hit_pt]]
+            inc_wall = np.r_[inc_wall, hit_wall, hit_wall]
+            inc_dx = np.r_[inc_dx, ux[hit_wall], -ux[hit_wall]]
+            inc_dy = np.r_[inc_dy, uy[hit_wall], -uy[hit_wall]]
+            inc_end = np.r_[inc_end, np.zeros(2 * len(hit_pt), dtype=bool)]
+
+        # nodes: incidence points snapped to the tolerance grid
+        pts = np.round(np.column_stack([px, py]) / self.tolerance).astype(np.int64)
+        _, node = np.unique(pts, axis=0, return_inverse=True)
+        node = node.ravel()
+        degree = np.bincount(node)
+        correction = np.zeros(n)
+        junction = np.flatnonzero(degree[node] >= 3)
+        if not len(junction):
+            return correction
+        junction = junction[np.argsort(node[junction], kind="stable")]
+        starts = np.flatnonzero(np.r_[True, np.diff(node[junction]) != 0])
+        walls, ends = inc_wall.tolist(), inc_end.tolist()
+        for group in np.split(junction, starts[1:]):
+            t = thick[inc_wall[group]].tolist()
+            dx, dy = inc_dx[group].tolist(), inc_dy[group].tolist()
+            group = group.tolist()
+            # the wall met: thickest straight run through the node (opposite, collinear incidences)
+            through, t_met = (), -1.0
+            for a in range(len(group)):
+                for b in range(a + 1, len(group)):
+                    straight = abs(dx[a] * dy[b] - dy[a] * dx[b]) <= 1e-6 and dx[a] * dx[b] + dy[a] * dy[b] < 0
+                    if straight and max(t[a], t[b]) > t_met:
+                        through, t_met = (a, b), max(t[a], t[b])
+            if not through:
+                a = t.index(max(t))
+                through, t_met = (a,), t[a]
+            for k, inc in enumerate(group):
+                if k not in through and ends[inc]:
+                    correction[walls[inc]] += t_met / 2.0
+        return correction
+
+    def _endpoints_on_walls(self, px, py, x0, y0, x1, y1, ux, uy, length) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        (endpoint, wall) pairs where an endpoint lies inside a wall. Only the
+        endpoints within each wall's bounding box are tested, looked up in
+        the x- or y-sorted endpoints, whichever gives fewer candidates.
+        """
+        tol = self.tolerance
+        ox, oy = np.argsort(px, kind="stable"), np.argsort(py, kind="stable")
+        sx, sy = px[ox], py[oy]
+        lo_x = np.searchsorted(sx, np.minimum(x0, x1) - tol, "left")
+        hi_x = np.searchsorted(sx, np.maximum(x0, x1) + tol, "right")
+        lo_y = np.searchsorted(sy, np.minimum(y0, y1) - tol, "left")
+        hi_y = np.searchsorted(sy, np.maximum(y0, y1) + tol, "right")
+        use_x = hi_x - lo_x <= hi_y - lo_y
+        lo = np.where(use_x, lo_x, lo_y)
+        count = np.where(use_x, hi_x - lo_x, hi_y - lo_y)
+
+        wall = np.repeat(np.arange(len(length)), count)
+        pos = np.repeat(lo, count) + np.arange(int(count.sum())) - np.repeat(np.cumsum(count) - count, count)
+        pt = np.where(np.repeat(use_x, count), ox[pos], oy[pos])
+        along = (px[pt] - x0[wall]) * ux[wall] + (py[pt] - y0[wall]) * uy[wall]
+        off = np.abs((px[pt] - x0[wall]) * uy[wall] - (py[pt] - y0[wall]) * ux[wall])
+        on = (off <= tol) & (along > tol) & (along < length[wall] - tol)
+        return pt[on], wall[on]
+
+    def wall_quantities(self) -> pd.DataFrame:
+        """wall_table() joined with plaster / masonry from opening_deductions()."""
+        walls = self.wall_table()
+        per_wall, _ = opening_deductions(
+            walls.rename(columns={"length": "centreline", "net_length": "length"}), pd.DataFrame(self._openings)
+        )
+        return walls.merge(per_wall, on="wall", how="left")
+
+    def _polygon_table(self, kind: str, param_name: str) -> pd.DataFrame:
+        store = self._polys[kind]
+        area, perimeter = polygon_metrics(
+            np.asarray(store["xs"], float), np.asarray(store["ys"], float), np.asarray(store["ptr"], np.int64)
+        )
+        return pd.DataFrame(
+            {"name": store["name"], "area": area, "perimeter": perimeter, param_name: np.asarray(store["param"], float)}
+        )
+
+    def room_table(self) -> pd.DataFrame:
+        df = self._polygon_table("room", "skirting_height")
+        df["skirting_area"] = df["perimeter"] * df["skirting_height"]
+        return df
+
+    def slab_table(self) -> pd.DataFrame:
+        df = self._polygon_table("slab", "thickness")
+        df["concrete"] = df["area"] * df["thickness"]
+        df["formwork"] = df["area"] + df["perimeter"] * df["thickness"]     # soffit + edges
+        return df
+
+    def quantities(self, item_map: Optional[Dict[str, str]] = None) -> pd.DataFrame:
+        """
+        Derived quantities: kind, description, quantity, unit, item (catalogue name).
+        """
+        item_map = DEFAULT_ITEM_MAP if item_map is None else item_map
+        rows: List[dict] = []
+        walls = self.wall_quantities()
+        if len(walls):
+            for t, grp in walls.groupby("thickness", sort=True):
+                rows.append({"kind": "masonry", "description": f"Masonry {t * 1000:.0f} mm walls ({len(grp)})",
+                             "quantity": round(grp["masonry_net"].sum(), 3), "unit": "cum"})
+            rows.append({"kind": "plaster", "description": f"Wall plaster ({len(walls)} walls)",
+                         "quantity": round(walls["finish_net"].sum(), 2), "unit": "sqm"})
+        rooms = self.room_table()
+        if len(rooms):
+            rows.append({"kind": "flooring", "description": f"Flooring ({len(rooms)} rooms)",
+                         "quantity": round(rooms["area"].sum(), 2), "unit": "sqm"})
+            rows.append({"kind": "skirting", "description": f"Skirting {rooms['perimeter'].sum():.2f} m",
+                         "quantity": round(rooms["skirting_area"].sum(), 2), "unit": "sqm"})
+        slabs = self.slab_table()
+        if len(slabs):
+            rows.append({"kind": "slab_concrete", "description": f"Slab concrete ({len(slabs)} slabs)",
+                         "quantity": round(slabs["concrete"].sum(), 3), "unit": "cum"})
+            rows.append({"kind": "slab_formwork", "description": "Slab formwork (soffit + edges)",
+                         "quantity": round(slabs["formwork"].sum(), 2), "unit": "sqm"})
+        df = pd.DataFrame(rows, columns=["kind", "description", "quantity", "unit"])
+        df["item"] = df["kind"].map(item_map)
+        return df
+
+
+def parse_vertices(text: str) -> List[Point]:
+    """'0,0; 5,0; 5,4; 0,4' → [(0, 0), (5, 0), (5, 4), (0, 4)]."""
+    pts = []
+    for part in str(text).split(";"):
+        part = part.strip()
+        if not part:
+            continue
+        try:
+            x, y = (float(v) for v in part.split(","))
+        except ValueError:
+            raise GeometryError(f"Bad vertex '{part}' (expected 'x,y')") from None
+        pts.append((x, y))
+    return pts
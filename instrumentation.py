@@ -0,0 +1,221 @@
+# instrumentation.py
+
+"""
+Lightweight hot-path instrumentation.
+
+    from instrumentation import timed, section, count
+
+    @timed("dsr.find_matches")
+    def find_matches(...): ...
+
+    with section("tab4.forms"):
+        ...
+
+    count("rcc.expansions")
+
+Timers and counters are process-wide and aggregated per name (calls,
+total, min, max). Instrumentation is off unless the environment variable
+ESTIMATOR_INSTRUMENT is set to 1 / true / yes, or enable() is called.
+While off, a @timed function costs one flag check on top of the call,
+section() returns a shared no-op context manager and count() returns
+immediately, so the decorators can stay on hot paths.
+
+report() returns the aggregate as a DataFrame (slowest first) for the
+developer panel in the app; snapshot() returns plain dicts.
+
+A per-thread hook (set_hook) additionally receives enter / exit events
+for every section and timed call on that thread, even while the
+aggregate timers are off; profiling.py uses it for per-rerun breakdowns.
+"""
+
+from __future__ import annotations
+
+import functools
+import os
+import threading
+import time
+from contextlib import contextmanager, nullcontext
+from dataclasses import dataclass
+from typing import Callable, Dict, Iterator, Optional
+
+import pandas as pd
+
+ENV_VAR = "ESTIMATOR_INSTRUMENT"
+_TRUE = {"1", "true", "yes", "on"}
+
+
+class _State:
+    __slots__ = ("enabled", "hooks", "active")
+
+    def __init__(self):
+        self.enabled = os.environ.get(ENV_VAR, "").strip().lower() in _TRUE
+        self.hooks = 0              # threads with a hook installed
+        self.active = self.enabled  # enabled or any hook: the one flag hot paths check
+
+    def refresh(self) -> None:
+        self.active = self.enabled or self.hooks > 0
+
+
+_state = _State()
+_local = threading.local()
+_lock = threading.Lock()
+_NULL = nullcontext()
+
+
+@dataclass
+class TimerStat:
+    calls: int = 0
+    total: float = 0.0
+    min: float = float("inf")
+    max: float = 0.0
+
+    def add(self, seconds: float) -> None:
+        self.calls += 1
+        self.total += seconds
+        if seconds < self.min:
+            self.min = seconds
+        if seconds > self.max:
+            self.max = seconds
+
+
+_timers: Dict[str, TimerStat] = {}
+_counters: Dict[str, float] = {}
+
+
+# -----------------------------
+# Switch
+# -----------------------------
+def is_enabled() -> bool:
+    return _state.enabled
+
+
+def enable(on: bool = True) -> None:
+    _state.enabled = bool(on)
+    _state.refresh()
+
+
+def disable() -> None:
+    enable(False)
+
+
+def set_hook(hook) -> None:
+    """
+    Install (or with None remove) this thread's hook: an object with
+    enter(name) and exit(name, seconds) methods.
+    """
+    old = getattr(_local, "hook", None)
+    _local.hook = hook
+    with _lock:
+        _state.hooks += (hook is not None) - (old is not None)
+        _state.refresh()
+
+
+def reset() -> None:
+    with _lock:
+        _timers.clear()
+        _counters.clear()
+
+
+# -----------------------------
+# Recording
+# -----------------------------
+def record(name: str, seconds: float) -> None:
+    """Add one timing for name (used by timed / section, or for externally measured spans)."""
+    with _lock:
+        stat = _timers.get(name)
+        if stat is None:
+            stat = _timers[name] = TimerStat()
+        stat.add(seconds)
+
+
+def count(name: str, n: float = 1) -> None:
+    if not _state.enabled:
+        return
+    with _lock:
+        _counters[name] = _counters.get(name, 0) + n
+
+
+@contextmanager
+def _timed_section(name: str) -> Iterator[None]:
+    hook = getattr(_local, "hook", None)
+    if hook is not None:
+        hook.enter(name)
+    t0 = time.perf_counter()
+    try:
+        yield
+    finally:
+        dt = time.perf_counter() - t0
+        if _state.enabled:
+            record(name, dt)
+        if hook is not None:
+            hook.exit(name, dt)
+
+
+def section(name: str):
+    """Context manager timing its block under name (no-op while disabled)."""
+    if not _state.active:
+        return _NULL
+    return _timed_section(name)
+
+
+def timed(name: Optional[str] = None) -> Callable[[Callable], Callable]:
+    """
+    Decorator timing every call of the function under name
+    (default: module.qualname). Put it under @staticmethod / @classmethod.
+    """
+
+    def wrap(func: Callable) -> Callable:
+        label = name or f"{func.__module__}.{func.__qualname__}"
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if not _state.active:
+                return func(*args, **kwargs)
+            with _timed_section(label):
+                return func(*args, **kwargs)
+
+        return wrapper
+
+    return wrap
+
+
+# -----------------------------
+# Reporting
+# -----------------------------
+def snapshot() -> Dict[str, Dict]:
+    """{"timers": {name: {calls, total_s, min_s, max_s}}, "counters": {name: value}}."""
+    with _lock:
+        timers = {
+            name: {"calls": s.calls, "total_s": s.total, "min_s": s.min, "max_s": s.max}
+            for name, s in _timers.items()
+        }
+        counters = dict(_counters)
+    return {"timers": timers, "counters": counters}
+
+
+def report() -> pd.DataFrame:
+    """One row per timer: calls, total / mean / max ms and share of the largest total."""
+    timers = snapshot()["timers"]
+    df = pd.DataFrame(
+        [
+            {
+                "name": name,
+                "calls": s["calls"],
+                "total_ms": s["total_s"] * 1e3,
+                "mean_ms": s["total_s"] / s["calls"] * 1e3 if s["calls"] else 0.0,
+                "max_ms": s["max_s"] * 1e3,
+            }
+            for name, s in timers.items()
+        ],
+        columns=["name", "calls", "total_ms", "mean_ms", "max_ms"],
+    )
+    if df.empty:
+        return df.assign(share=pd.Series(dtype=float))
+    df = df.sort_values("total_ms", ascending=False, ignore_index=True)
+    df["share"] = df["total_ms"] / df["total_ms"].max()
+    return df
+
+
+def counters_frame() -> pd.DataFrame:
+    counters = snapshot()["counters"]
+    return pd.DataFrame(sorted(counters.items()), columns=["counter", "value"])
@@ -29,6 +29,16 @@ from __future__ import annotations
 from dataclasses import dataclass, field
 from typing import List, Dict, Optional
 
+import numpy as np
+
+from instrumentation import timed
+from units import REGISTRY as UNIT_REGISTRY
+
+# Opening size bands (area of one opening on one face, sqm)
+MASONRY_SMALL_OPENING_LIMIT = 0.10   # masonry: no deduction up to this
+FINISH_SMALL_OPENING_LIMIT = 0.50    # plaster/paint: no deduction up to this
+FINISH_MEDIUM_OPENING_LIMIT = 3.00   # plaster/paint: deduct one face up to this, all faces above
+
 
 # ---------------------------------------------------------------------------
 # Internal helper dataclass for consistent results
@@ -60,7 +70,7 @@ class MeasureResult:
         return out
 
 
-def _round_for_unit(value: float, unit: str) -> float:
+def _round_for_unit(value: float, unit: str | int) -> float:
     """
     IS‑1200 style rounding:
     - Linear (m): 2 decimals
@@ -68,17 +78,20 @@ def _round_for_unit(value: float, unit: str) -> float:
     - Volume (cum): 3 decimals
     - Weight (kg): 2 decimals
     Default: 3 decimals
+
+    unit may be any spelling known to units.REGISTRY or a unit ID.
+    An array is rounded elementwise.
     """
-    unit = unit.lower().strip()
-    if unit in ("m", "rm", "rmt"):
-        return round(value, 2)
-    if unit in ("sqm", "m2", "sq.m", "sq.m."):
-        return round(value, 2)
-    if unit in ("cum", "m3", "cu.m", "cu.m."):
-        return round(value, 3)
-    if unit in ("kg", "kilogram", "kilograms"):
-        return round(value, 2)
-    return round(value, 3)
+    if isinstance(value, np.ndarray):
+        return np.round(value, UNIT_REGISTRY.round_decimals(unit))
+    return round(value, UNIT_REGISTRY.round_decimals(unit))
+
+
+def _non_negative(value):
+    """max(value, 0) for a number, elementwise for an array."""
+    if isinstance(value, np.ndarray):
+        return np.maximum(value, 0.0)
+    return max(value, 0.0)
 
 
 def _normalise_openings(openings: Optional[List[Dict]]) -> List[Dict]:
@@ -128,6 +141,7 @@ class IS1200Engine:
     # GENERIC VOLUME – EARTHWORK, CONCRETE, BRICKWORK
     # ---------------------------------------------------------------------
     @staticmethod
+    @timed("is1200.volume")
     def volume(
         L: float,
         B: float,
@@ -174,6 +188,7 @@ class IS1200Engine:
     # EARTHWORK – TRENCH EXCAVATION WITH SIDE SLOPES
     # ---------------------------------------------------------------------
     @staticmethod
+    @timed("is1200.trench_excavation")
     def trench_excavation(
         length: float,
         breadth_bottom: float,
@@ -214,12 +229,13 @@ class IS1200Engine:
     # BRICKWORK – WALL VOLUME WITH OPENING DEDUCTIONS
     # ---------------------------------------------------------------------
     @staticmethod
+    @timed("is1200.brickwork_wall")
     def brickwork_wall(
         length: float,
         thickness: float,
         height: float,
         openings: Optional[List[Dict]] = None,
-        small_opening_limit: float = 0.10,   # sqm (typical IS‑1200)
+        small_opening_limit: float = MASONRY_SMALL_OPENING_LIMIT,
         unit: str = "cum",
     ) -> Dict[str, float]:
         """
@@ -262,13 +278,14 @@ class IS1200Engine:
     # PLASTER / PAINT – WALL FINISH AREA WITH OPENINGS
     # ---------------------------------------------------------------------
     @staticmethod
+    @timed("is1200.wall_finish_area")
     def wall_finish_area(
         length: float,
         height: float,
         sides: int = 2,
         openings: Optional[List[Dict]] = None,
-        small_opening_limit: float = 0.50,   # no deduction
-        medium_opening_limit: float = 3.00,  # deduct one face only
+        small_opening_limit: float = FINISH_SMALL_OPENING_LIMIT,    # no deduction
+        medium_opening_limit: float = FINISH_MEDIUM_OPENING_LIMIT,  # deduct one face only
         unit: str = "sqm",
     ) -> Dict[str, float]:
         """
@@ -321,6 +338,7 @@ class IS1200Engine:
     # FLOORING / TILING AREA
     # ---------------------------------------------------------------------
     @staticmethod
+    @timed("is1200.floor_area")
     def floor_area(
         length: float,
         breadth: float,
@@ -347,8 +365,11 @@ class IS1200Engine:
 
     # ---------------------------------------------------------------------
     # RCC FORMWORK AREAS
+    # (dimensions may also be numpy arrays – TakeoffImporter passes whole
+    # columns – and the areas then come back as an array)
     # ---------------------------------------------------------------------
     @staticmethod
+    @timed("is1200.formwork_column_area")
     def formwork_column_area(
         L: float,
         B: float,
@@ -363,15 +384,16 @@ class IS1200Engine:
 
         Returns
         -------
-        float : area in sqm (rounded as per unit).
+        float (array for array dimensions) : area in sqm (rounded as per unit).
         """
-        L = max(L, 0.0)
-        B = max(B, 0.0)
-        H = max(H, 0.0)
+        L = _non_negative(L)
+        B = _non_negative(B)
+        H = _non_negative(H)
         area = 2.0 * (L + B) * H
         return _round_for_unit(area, unit)
 
     @staticmethod
+    @timed("is1200.formwork_beam_area")
     def formwork_beam_area(
         breadth: float,
         depth: float,
@@ -384,13 +406,14 @@ class IS1200Engine:
         Approx as:
             (2 × depth + breadth) × length
         """
-        breadth = max(breadth, 0.0)
-        depth = max(depth, 0.0)
-        length = max(length, 0.0)
+        breadth = _non_negative(breadth)
+        depth = _non_negative(depth)
+        length = _non_negative(length)
         area = (2.0 * depth + breadth) * length
         return _round_for_unit(area, unit)
 
     @staticmethod
+    @timed("is1200.formwork_slab_area")
     def formwork_slab_area(
         length: float,
         breadth: float,
@@ -402,8 +425,8 @@ class IS1200Engine:
         Approx as:
             length × breadth
         """
-        length = max(length, 0.0)
-        breadth = max(breadth, 0.0)
+        length = _non_negative(length)
+        breadth = _non_negative(breadth)
         area = length * breadth
         return _round_for_unit(area, unit)
 
@@ -411,6 +434,7 @@ class IS1200Engine:
     # SIMPLE REBAR UTILITIES (OPTIONAL)
     # ---------------------------------------------------------------------
     @staticmethod
+    @timed("is1200.steel_from_kg_per_cum")
     def steel_from_kg_per_cum(
         concrete_volume_cum: float,
         kg_per_cum: float,
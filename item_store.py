@@ -0,0 +1,273 @@
+# item_store.py
+
+"""
+Measured SOQ items with stable IDs.
+
+IDs used to be 1-based positions in st.session_state.qto_items
+(len(qto_items) + 1), which breaks as soon as anything is deleted.
+ItemStore keeps the item dicts in entry order and owns the IDs:
+
+- IDs are allocated from a monotonically increasing counter and never
+  reused, so WBS nodes, revision deltas, MB entries and floor templates
+  that refer to an ID stay valid after deletions;
+- an ID → position map makes get() O(1);
+- RCC component rows (steel, formwork) carry "parent_id", and a
+  parent → children map lets bulk operations cascade to them.
+
+The store is a read-only Sequence of item dicts (positional indexing and
+slicing work as on the old list) plus append() / extend() for new items.
+Bulk operations change thousands of items in one call and return a
+BulkChange describing what happened, which the app applies to the WBS
+tree, revision history and SOQ view in one step:
+
+    change = store.rerate(ids, factor=1.05)
+    change = store.edit(ids, phase="3️⃣ SUPERSTRUCTURE")
+    change = store.delete(ids)
+
+With cascade=True (the default) the linked component rows follow their
+parent: they are deleted with it, moved with it, re-rated by the same
+factor and scaled with its quantity (reinforcement kg and formwork area
+are proportional to the concrete measured).
+"""
+
+from __future__ import annotations
+
+import re
+from collections.abc import Sequence
+from dataclasses import dataclass, field
+from typing import Dict, Iterable, Iterator, List, Mapping, Optional
+
+LOCATION_FIELDS = ("building", "floor", "phase")
+DIMENSION_FIELDS = ("length", "breadth", "depth")
+
+
+class ItemStoreError(ValueError):
+    """Invalid bulk operation or ID selection."""
+
+
+def parse_id_ranges(text: str) -> List[int]:
+    """'4, 7-10 12' → [4, 7, 8, 9, 10, 12] (order kept, duplicates dropped)."""
+    ids: Dict[int, None] = {}
+    for token in re.split(r"[,\s]+", text.strip()):
+        if not token:
+            continue
+        m = re.fullmatch(r"(\d+)(?:\s*[-–]\s*(\d+))?", token)
+        if m is None:
+            raise ItemStoreError(f"'{token}' is not an item ID or range (e.g. 12 or 12-40)")
+        lo = int(m.group(1))
+        hi = int(m.group(2) or lo)
+        if hi < lo:
+            raise ItemStoreError(f"Range '{token}' runs backwards")
+        ids.update(dict.fromkeys(range(lo, hi + 1)))
+    return list(ids)
+
+
+@dataclass
+class BulkChange:
+    """
+    Result of one bulk operation (item dicts as they are now / were).
+    cascade: whether linked rows were meant to follow the changed items.
+    """
+
+    label: str
+    updated: List[dict] = field(default_factory=list)
+    removed: List[dict] = field(default_factory=list)
+    cascade: bool = True
+
+    @property
+    def removed_ids(self) -> List[int]:
+        return [it["id"] for it in self.removed]
+
+    @property
+    def updated_ids(self) -> List[int]:
+        return [it["id"] for it in self.updated]
+
+    def __len__(self) -> int:
+        return len(self.updated) + len(self.removed)
+
+
+class ItemStore(Sequence):
+    """Measured items in entry order; IDs are stable and never reused."""
+
+    def __init__(self, items: Iterable[Mapping] = ()):
+        self._items: List[dict] = []
+        self._pos: Dict[int, int] = {}
+        self._children: Dict[int, List[int]] = {}
+        self.next_id = 1
+        self.extend(items)
+
+    # -----------------------------
+    # Sequence protocol (positional)
+    # -----------------------------
+    def __len__(self) -> int:
+        return len(self._items)
+
+    def __getitem__(self, index):
+        return self._items[index]
+
+    def __iter__(self) -> Iterator[dict]:
+        return iter(self._items)
+
+    # -----------------------------
+    # Adding
+    # -----------------------------
+    def append(self, item: Mapping) -> dict:
+        """
+        Store one item and return the stored dict. Items without an "id"
+        get the next free ID; items with one (e.g. a loaded estimate)
+        keep it.
+        """
+        item_id = item.get("id")
+        if item_id is None:
+            item = {"id": self.next_id, **item}
+        else:
+            item = dict(item)
+            item_id = item["id"] = int(item_id)
+            if item_id in self._pos:
+                raise ItemStoreError(f"Item ID {item_id} is already in use")
+        self._pos[item["id"]] = len(self._items)
+        self._items.append(item)
+        self.next_id = max(self.next_id, item["id"] + 1)
+        parent = item.get("parent_id")
+        if parent is not None:
+            self._children.setdefault(parent, []).append(item["id"])
+        return item
+
+    def extend(self, items: Iterable[Mapping]) -> List[dict]:
+        return [self.append(it) for it in items]
+
+    # -----------------------------
+    # Lookup
+    # -----------------------------
+    def get(self, item_id) -> dict:
+        """Item by ID (KeyError if unknown or deleted)."""
+        return self._items[self._pos[int(item_id)]]
+
+    def has_id(self, item_id) -> bool:
+        return int(item_id) in self._pos
+
+    def position(self, item_id) -> int:
+        return self._pos[int(item_id)]
+
+    def children(self, item_id) -> List[int]:
+        """IDs of the component rows linked to an item (RCC steel / formwork)."""
+        return list(self._children.get(int(item_id), ()))
+
+    def select(self, ids: Iterable, cascade: bool = True) -> List[int]:
+        """Known IDs in store order, plus their linked rows if cascade (unknown IDs raise)."""
+        chosen = set()
+        for item_id in ids:
+            item_id = int(item_id)
+            if item_id not in self._pos:
+                raise KeyError(f"No item with ID {item_id}")
+            chosen.add(item_id)
+            if cascade:
+                chosen.update(self._children.get(item_id, ()))
+        return sorted(chosen, key=self._pos.__getitem__)
+
+    # -----------------------------
+    # Bulk operations
+    # -----------------------------
+    def delete(self, ids: Iterable, cascade: bool = True) -> BulkChange:
+        """Remove the items (and their linked rows) in one pass over the store."""
+        drop = set(self.select(ids, cascade))
+        change = BulkChange(label=f"Deleted {len(drop)} item(s)", cascade=cascade)
+        if not drop:
+            return change
+        first = min(self._pos[i] for i in drop)
+        kept = self._items[:first]
+        for it in self._items[first:]:
+            if it["id"] in drop:
+                change.removed.append(it)
+                del self._pos[it["id"]]
+            else:
+                self._pos[it["id"]] = len(kept)
+                kept.append(it)
+        self._items = kept
+        for it in change.removed:
+            self._children.pop(it["id"], None)
+            parent = it.get("parent_id")
+            if parent in self._children and parent not in drop:
+                self._children[parent].remove(it["id"])
+        return change
+
+    def edit(self, ids: Iterable, cascade: bool = True, **fields) -> BulkChange:
+        """
+        Set building / floor / phase, length / breadth / depth and / or
+        quantity / rate on the items. Location fields go to linked rows
+        too; a new quantity scales the linked rows' quantities by the same
+        ratio. amount = quantity × rate.
+        """
+        unknown = set(fields) - set(LOCATION_FIELDS) - set(DIMENSION_FIELDS) - {"quantity", "rate"}
+        if unknown:
+            raise ItemStoreError(f"Cannot bulk-edit {sorted(unknown)}")
+        for name in ("quantity", "rate"):
+            if name in fields and float(fields[name]) < 0:
+                raise ItemStoreError(f"{name.title()} cannot be negative")
+        location = {k: fields[k] for k in LOCATION_FIELDS if k in fields}
+        plain = {**location, **{k: float(fields[k]) for k in DIMENSION_FIELDS if k in fields}}
+        selected = self.select(ids, cascade=False)
+        chosen = set(selected)
+        updates: Dict[int, dict] = {}
+        for item_id in selected:
+            it = self.get(item_id)
+            ratio = None
+            if "quantity" in fields:
+                old = float(it["quantity"])
+                ratio = float(fields["quantity"]) / old if old else None
+            self._update(updates, item_id, plain, quantity=fields.get("quantity"), rate=fields.get("rate"))
+            if cascade:
+                for child in self._children.get(item_id, ()):
+                    if child in chosen:
+                        continue
+                    scaled = float(self.get(child)["quantity"]) * ratio if ratio is not None else None
+                    self._update(updates, child, location, quantity=scaled)
+        return BulkChange(label=f"Edited {len(updates)} item(s)", updated=list(updates.values()), cascade=cascade)
+
+    def scale_quantity(self, ids: Iterable, factor: float, cascade: bool = True) -> BulkChange:
+        """Multiply quantities (and linked rows' quantities) by factor."""
+        if factor < 0:
+            raise ItemStoreError("Quantity factor cannot be negative")
+        updates: Dict[int, dict] = {}
+        for item_id in self.select(ids, cascade):
+            self._update(updates, item_id, quantity=float(self.get(item_id)["quantity"]) * factor)
+        return BulkChange(
+            label=f"Scaled quantities of {len(updates)} item(s) × {factor:g}", updated=list(updates.values()), cascade=cascade
+        )
+
+    def rerate(
+        self, ids: Iterable, factor: Optional[float] = None, rate: Optional[float] = None, cascade: bool = True
+    ) -> BulkChange:
+        """
+        Re-rate items: multiply rates by factor (linked rows too, if
+        cascade) or set one rate (selected items only – components have
+        other units).
+        """
+        if (factor is None) == (rate is None):
+            raise ItemStoreError("Give either a rate factor or a new rate")
+        if (factor if factor is not None else rate) < 0:
+            raise ItemStoreError("Rates cannot be negative")
+        updates: Dict[int, dict] = {}
+        if rate is not None:
+            for item_id in self.select(ids, cascade=False):
+                self._update(updates, item_id, rate=rate)
+            label = f"Re-rated {len(updates)} item(s) at ₹{rate:,.2f}"
+        else:
+            for item_id in self.select(ids, cascade):
+                self._update(updates, item_id, rate=float(self.get(item_id)["rate"]) * factor)
+            label = f"Re-rated {len(updates)} item(s) by {(factor - 1) * 100:+.1f}%"
+        return BulkChange(label=label, updated=list(updates.values()), cascade=cascade)
+
+    def _update(
+        self, updates: Dict[int, dict], item_id: int, fields: Mapping = (), *,
+        quantity: Optional[float] = None, rate: Optional[float] = None,
+    ) -> None:
+        it = self.get(item_id)
+        it.update(fields)
+        if quantity is not None:
+            it["quantity"] = float(quantity)
+        if rate is not None:
+            it["rate"] = float(rate)
+        if quantity is not None or rate is not None:
+            it["amount"] = float(it["quantity"]) * float(it["rate"])
+        updates[item_id] = it
@@ -0,0 +1,260 @@
+# measurement_book.py
+
+"""
+Measurement Book (CPWD Form 8) with running-bill tracking.
+
+Measurements are dated entries against estimate items, recorded into
+the currently open RA bill. The book keeps:
+
+- entries in append-only columns; bills are contiguous entry ranges,
+  so one bill's Form 8 is a slice, not a scan
+- a cumulative-to-date quantity per item (dict, updated per entry)
+- per closed bill, its value and the running total of values, so the
+  "previous bills" figure for bill N is one list lookup
+- per item, the (bill, cumulative quantity) pairs at each bill close it
+  took part in, so previous / up-to-date quantities for any past bill
+  are a bisect
+
+Recording an entry or closing a bill is O(1) in the number of earlier
+measurements; generating bill #40 touches only bill #40's entries.
+"""
+
+from __future__ import annotations
+
+from bisect import bisect_right
+from dataclasses import dataclass
+from datetime import date
+from typing import Dict, Hashable, List, Optional, Tuple
+
+import pandas as pd
+
+ENTRY_COLUMNS = (
+    "entry_no", "bill_no", "on_date", "page", "item_id", "description",
+    "length", "breadth", "depth", "quantity", "unit", "rate", "amount", "remarks",
+)
+
+
+class MeasurementError(ValueError):
+    """Raised for measurements that would make a cumulative quantity negative."""
+
+
+@dataclass(frozen=True)
+class BillSummary:
+    bill_no: int
+    is_open: bool
+    entries: int
+    this_bill: float          # value measured in this bill
+    previous: float           # value of all earlier bills
+    closed_on: Optional[date] = None
+
+    @property
+    def upto_date(self) -> float:
+        return self.this_bill + self.previous
+
+
+class MeasurementBook:
+    """
+    One measurement book for a contract.
+
+    Parameters
+    ----------
+    book_no : str
+        Used in page references (e.g. "MB-1/0007").
+    lines_per_page : int
+        Entries per MB page; pages are assigned in recording order.
+    """
+
+    def __init__(self, book_no: str = "MB-1", lines_per_page: int = 20):
+        self.book_no = book_no
+        self.lines_per_page = lines_per_page
+        self._cols: Dict[str, list] = {c: [] for c in ENTRY_COLUMNS}
+
+        self.current_bill = 1
+        self._bill_start: List[int] = [0]          # entry index where each bill starts
+        self._bill_closed_on: List[date] = []
+        self._bill_values: List[float] = []        # closed bills
+        self._cum_values: List[float] = []         # running total after each closed bill
+        self._open_value = 0.0
+
+        self._cum_qty: Dict[Hashable, float] = {}
+        self._open_qty: Dict[Hashable, float] = {}
+        # item → ([bill_no at close], [cumulative qty after that bill])
+        self._item_history: Dict[Hashable, Tuple[List[int], List[float]]] = {}
+        self._item_meta: Dict[Hashable, Tuple[str, str, float]] = {}   # description, unit, rate
+
+        self.version = 0          # bumped on every change (form cache key)
+
+    # -----------------------------
+    # Recording
+    # -----------------------------
+    def __len__(self) -> int:
+        return len(self._cols["entry_no"])
+
+    def record(
+        self,
+        item_id: Hashable,
+        quantity: float,
+        rate: float,
+        on_date: date | None = None,
+        *,
+        description: str = "",
+        unit: str = "",
+        length: float = 0.0,
+        breadth: float = 0.0,
+        depth: float = 0.0,
+        remarks: str = "",
+    ) -> int:
+        """
+        Record one measurement in the open bill; returns its entry number.
+
+        Negative quantities are allowed as corrections, as long as the
+        item's cumulative quantity stays non-negative.
+        """
+        quantity = float(quantity)
+        cum = self._cum_qty.get(item_id, 0.0) + quantity
+        if cum < -1e-9:
+            raise MeasurementError(
+                f"Item {item_id!r}: correction of {quantity:g} exceeds the {cum - quantity:g} measured so far"
+            )
+        entry_no = len(self) + 1
+        amount = quantity * float(rate)
+        row = {
+            "entry_no": entry_no,
+            "bill_no": self.current_bill,
+            "on_date": on_date or date.today(),
+            "page": f"{self.book_no}/{(entry_no - 1) // self.lines_per_page + 1:04d}",
+            "item_id": item_id,
+            "description": description,
+            "length": float(length),
+            "breadth": float(breadth),
+            "depth": float(depth),
+            "quantity": quantity,
+            "unit": unit,
+            "rate": float(rate),
+            "amount": amount,
+            "remarks": remarks,
+        }
+        for c in ENTRY_COLUMNS:
+            self._cols[c].append(row[c])
+
+        self._cum_qty[item_id] = cum
+        self._open_qty[item_id] = self._open_qty.get(item_id, 0.0) + quantity
+        self._item_meta[item_id] = (description, unit, float(rate))
+        self._open_value += amount
+        self.version += 1
+        return entry_no
+
+    def record_item(self, item, quantity: float | None = None, on_date: date | None = None, remarks: str = "") -> int:
+        """Record a measurement for an estimate item (full balance if quantity is None)."""
+        if quantity is None:
+            quantity = max(float(item["quantity"]) - self.cumulative(item["id"]), 0.0)
+        return self.record(
+            item["id"],
+            quantity,
+            float(item["rate"]),
+            on_date,
+            description=str(item["item"]),
+            unit=str(item["unit"]),
+            length=float(item.get("length", 0.0) or 0.0),
+            breadth=float(item.get("breadth", 0.0) or 0.0),
+            depth=float(item.get("depth", 0.0) or 0.0),
+            remarks=remarks,
+        )
+
+    def close_bill(self, on_date: date | None = None) -> BillSummary:
+        """Close the open bill, snapshot its totals and open the next one."""
+        bill = self.current_bill
+        self._bill_values.append(self._open_value)
+        self._cum_values.append((self._cum_values[-1] if self._cum_values else 0.0) + self._open_value)
+        self._bill_closed_on.append(on_date or date.today())
+        for item_id in self._open_qty:
+            bills, cums = self._item_history.setdefault(item_id, ([], []))
+            bills.append(bill)
+            cums.append(self._cum_qty[item_id])
+
+        summary = self.bill_summary(bill)
+        self.current_bill += 1
+        self._bill_start.append(len(self))
+        self._open_qty = {}
+        self._open_value = 0.0
+        self.version += 1
+        return summary
+
+    # -----------------------------
+    # Queries
+    # -----------------------------
+    def cumulative(self, item_id: Hashable) -> float:
+        """Quantity measured to date (all bills including the open one)."""
+        return self._cum_qty.get(item_id, 0.0)
+
+    def _check_bill(self, bill_no: Optional[int]) -> int:
+        bill_no = self.current_bill if bill_no is None else int(bill_no)
+        if not 1 <= bill_no <= self.current_bill:
+            raise KeyError(f"Bill {bill_no} does not exist (bills 1–{self.current_bill})")
+        return bill_no
+
+    def _entry_range(self, bill_no: int) -> Tuple[int, int]:
+        start = self._bill_start[bill_no - 1]
+        end = self._bill_start[bill_no] if bill_no < self.current_bill else len(self)
+        return start, end
+
+    def bill_summary(self, bill_no: int | None = None) -> BillSummary:
+        bill_no = self._check_bill(bill_no)
+        start, end = self._entry_range(bill_no)
+        previous = self._cum_values[bill_no - 2] if bill_no >= 2 else 0.0
+        is_open = bill_no == self.current_bill
+        return BillSummary(
+            bill_no=bill_no,
+            is_open=is_open,
+            entries=end - start,
+            this_bill=self._open_value if is_open else self._bill_values[bill_no - 1],
+            previous=previous,
+            closed_on=None if is_open else self._bill_closed_on[bill_no - 1],
+        )
+
+    def quantity_upto(self, item_id: Hashable, bill_no: int) -> float:
+        """Cumulative quantity of item at the end of bill_no (closed or open)."""
+        bill_no = self._check_bill(bill_no)
+        if bill_no == self.current_bill:
+            return self.cumulative(item_id)
+        bills, cums = self._item_history.get(item_id, ([], []))
+        i = bisect_right(bills, bill_no)
+        return cums[i - 1] if i else 0.0
+
+    def entries_frame(self, bill_no: int | None = None) -> pd.DataFrame:
+        """Form 8 rows for one bill (all bills if bill_no == 0)."""
+        if bill_no == 0:
+            start, end = 0, len(self)
+        else:
+            start, end = self._entry_range(self._check_bill(bill_no))
+        return pd.DataFrame({c: self._cols[c][start:end] for c in ENTRY_COLUMNS}, columns=list(ENTRY_COLUMNS))
+
+    def bill_abstract(self, bill_no: int | None = None) -> pd.DataFrame:
+        """
+        Per-item previous / this bill / up-to-date quantities and amounts
+        for items measured in bill_no.
+        """
+        bill_no = self._check_bill(bill_no)
+        start, end = self._entry_range(bill_no)
+        this_qty: Dict[Hashable, float] = {}
+        for item_id, q in zip(self._cols["item_id"][start:end], self._cols["quantity"][start:end]):
+            this_qty[item_id] = this_qty.get(item_id, 0.0) + q
+
+        rows = []
+        for item_id, q in this_qty.items():
+            upto = self.quantity_upto(item_id, bill_no)
+            desc, unit, rate = self._item_meta[item_id]
+            rows.append(
+                {
+                    "item_id": item_id, "description": desc, "unit": unit, "rate": rate,
+                    "previous_qty": upto - q, "this_bill_qty": q, "upto_date_qty": upto,
+                    "this_bill_amount": q * rate, "upto_date_amount": upto * rate,
+                }
+            )
+        return pd.DataFrame(
+            rows,
+            columns=[
+                "item_id", "description", "unit", "rate", "previous_qty", "this_bill_qty",
+                "upto_date_qty", "this_bill_amount", "upto_date_amount",
+            ],
+        )
@@ -0,0 +1,169 @@
+# openings.py
+
+"""
+Door / window schedules and vectorised IS 1200 opening deductions.
+
+Walls and openings are held as columns (DataFrames / arrays), not one
+dict per opening. Every opening is classified into its size band in one
+np.select over the whole schedule, and deductions are summed per host
+wall with np.bincount, so plaster and masonry deductions for a whole
+building are one grouped operation.
+
+Bands follow IS1200Engine.wall_finish_area() / brickwork_wall():
+
+    plaster / paint (area of one opening on one face A):
+        A <= FINISH_SMALL_OPENING_LIMIT          no deduction
+        A <= FINISH_MEDIUM_OPENING_LIMIT         deduct A on one face
+        larger                                   deduct A on every finished face
+    masonry:
+        A <= MASONRY_SMALL_OPENING_LIMIT         no deduction
+        larger                                   deduct A × wall thickness
+"""
+
+from __future__ import annotations
+
+from typing import Dict, Tuple
+
+import numpy as np
+import pandas as pd
+
+from is1200_rules import (
+    FINISH_MEDIUM_OPENING_LIMIT,
+    FINISH_SMALL_OPENING_LIMIT,
+    MASONRY_SMALL_OPENING_LIMIT,
+)
+
+WALL_COLUMNS = ("wall", "length", "height", "thickness", "sides")
+OPENING_COLUMNS = ("type", "w", "h", "count", "wall")
+
+# Common opening types (w, h in m) used to pre-fill schedules
+OPENING_TYPES: Dict[str, Tuple[float, float]] = {
+    "D1 (main door)": (1.0, 2.1),
+    "D2 (internal door)": (0.9, 2.1),
+    "D3 (toilet door)": (0.75, 2.1),
+    "W1 (window)": (1.5, 1.2),
+    "W2 (window)": (1.2, 1.2),
+    "V1 (ventilator)": (0.6, 0.45),
+    "O (opening)": (1.2, 2.1),
+}
+
+BAND_NONE, BAND_ONE_FACE, BAND_ALL_FACES = 0, 1, 2
+BAND_NAMES = np.array(["no deduction", "one face", "all faces"], dtype=object)
+
+
+class OpeningScheduleError(ValueError):
+    """Raised for duplicate wall IDs or openings hosted on unknown walls."""
+
+
+def empty_openings() -> pd.DataFrame:
+    return pd.DataFrame({"type": pd.Series(dtype=str), "w": [], "h": [], "count": [], "wall": pd.Series(dtype=str)})
+
+
+def _clean_walls(walls: pd.DataFrame) -> pd.DataFrame:
+    df = walls.reindex(columns=list(WALL_COLUMNS)).dropna(subset=["wall"])
+    df = df.assign(wall=df["wall"].astype(str))
+    for c, default in (("length", 0.0), ("height", 0.0), ("thickness", 0.0), ("sides", 2)):
+        df[c] = pd.to_numeric(df[c], errors="coerce").fillna(default).clip(lower=0)
+    if df["wall"].duplicated().any():
+        dup = sorted(set(df.loc[df["wall"].duplicated(), "wall"]))
+        raise OpeningScheduleError(f"Duplicate wall IDs in schedule: {dup}")
+    return df.reset_index(drop=True)
+
+
+def _clean_openings(openings: pd.DataFrame) -> pd.DataFrame:
+    df = openings.reindex(columns=list(OPENING_COLUMNS))
+    # a known type with blank size takes the type's standard size
+    sizes = df["type"].map(OPENING_TYPES)
+    known = sizes.notna()
+    df.loc[known, "w"] = pd.to_numeric(df.loc[known, "w"], errors="coerce").fillna(sizes[known].str[0])
+    df.loc[known, "h"] = pd.to_numeric(df.loc[known, "h"], errors="coerce").fillna(sizes[known].str[1])
+    for c, default in (("w", 0.0), ("h", 0.0), ("count", 1.0)):
+        df[c] = pd.to_numeric(df[c], errors="coerce").fillna(default)
+    df = df[(df["w"] > 0) & (df["h"] > 0) & (df["count"] > 0)]
+    return df.assign(wall=df["wall"].astype(str), type=df["type"].fillna("").astype(str)).reset_index(drop=True)
+
+
+def classify_openings(
+    area: np.ndarray,
+    finish_small: float = FINISH_SMALL_OPENING_LIMIT,
+    finish_medium: float = FINISH_MEDIUM_OPENING_LIMIT,
+) -> np.ndarray:
+    """Plaster/paint band per opening (BAND_NONE / BAND_ONE_FACE / BAND_ALL_FACES)."""
+    return np.select([area <= finish_small, area <= finish_medium], [BAND_NONE, BAND_ONE_FACE], BAND_ALL_FACES)
+
+
+def opening_deductions(
+    walls: pd.DataFrame,
+    openings: pd.DataFrame,
+    *,
+    finish_small: float = FINISH_SMALL_OPENING_LIMIT,
+    finish_medium: float = FINISH_MEDIUM_OPENING_LIMIT,
+    masonry_small: float = MASONRY_SMALL_OPENING_LIMIT,
+) -> Tuple[pd.DataFrame, pd.DataFrame]:
+    """
+    Plaster and masonry quantities for every wall at once.
+
+    Parameters
+    ----------
+    walls : DataFrame with wall, length, height, thickness, sides
+    openings : DataFrame with type, w, h, count, wall (host wall ID)
+
+    Returns
+    -------
+    (per_wall, per_opening)
+        per_wall: wall, finish_gross, finish_deduction, finish_net (sqm, 2 dp),
+                  masonry_gross, masonry_deduction, masonry_net (cum, 3 dp)
+        per_opening: the cleaned schedule with area, band, finish_deduction,
+                  masonry_deduction
+    """
+    walls = _clean_walls(walls)
+    openings = _clean_openings(openings)
+
+    widx = pd.Index(walls["wall"]).get_indexer(openings["wall"])
+    if (widx < 0).any():
+        missing = sorted(set(openings.loc[widx < 0, "wall"]))
+        raise OpeningScheduleError(f"Openings refer to unknown walls: {missing}")
+
+    length = walls["length"].to_numpy(float)
+    height = walls["height"].to_numpy(float)
+    thick = walls["thickness"].to_numpy(float)
+    sides = walls["sides"].to_numpy(float)
+
+    area = openings["w"].to_numpy(float) * openings["h"].to_numpy(float)
+    count = openings["count"].to_numpy(float)
+    band = classify_openings(area, finish_small, finish_medium)
+
+    faces = np.select([band == BAND_NONE, band == BAND_ONE_FACE], [0.0, 1.0], sides[widx])
+    finish_ded = area * faces * count
+    masonry_ded = np.where(area > masonry_small, area * thick[widx] * count, 0.0)
+
+    n = len(walls)
+    finish_gross = length * height * sides
+    masonry_gross = length * height * thick
+    finish_total = np.bincount(widx, weights=finish_ded, minlength=n)
+    masonry_total = np.bincount(widx, weights=masonry_ded, minlength=n)
+
+    per_wall = pd.DataFrame(
+        {
+            "wall": walls["wall"],
+            "finish_gross": finish_gross.round(2),
+            "finish_deduction": finish_total.round(2),
+            "finish_net": np.maximum(finish_gross.round(2) - finish_total.round(2), 0.0).round(2),
+            "masonry_gross": masonry_gross.round(3),
+            "masonry_deduction": masonry_total.round(3),
+            "masonry_net": np.maximum(masonry_gross.round(3) - masonry_total.round(3), 0.0).round(3),
+        }
+    )
+    per_opening = openings.assign(
+        area=area,
+        band=BAND_NAMES[band],
+        finish_deduction=finish_ded,
+        masonry_deduction=masonry_ded,
+    )
+    return per_wall, per_opening
+
+
+def building_totals(per_wall: pd.DataFrame) -> Dict[str, float]:
+    """Building-wide sums of opening_deductions() per-wall results."""
+    cols = ["finish_gross", "finish_deduction", "finish_net", "masonry_gross", "masonry_deduction", "masonry_net"]
+    return {c: float(per_wall[c].sum()) for c in cols}
@@ -3,6 +3,13 @@ Professional Construction Phase Structure - 5 Phase Hierarchy
 Maps work items to Sub-Structure → Super-Structure → Finishing
 """
 
+import re
+from functools import lru_cache
+from typing import Iterable, Tuple
+
+import numpy as np
+import pandas as pd
+
 PHASES = {
     "PHASE_1_SUBSTRUCTURE": {
         "name": "1️⃣ Sub-Structure (Below Ground)",
@@ -12,7 +19,8 @@ PHASES = {
             "Site Clearance", "Dismantling", "Earthwork Excavation", 
             "PCC Foundation Bed", "RCC Footing", "Backfilling",
             "Dewatering"
-        ]
+        ],
+        "keywords": ["clearance", "dismantling", "excavation", "footing", "backfill"]
     },
     "PHASE_2_PLINTH": {
         "name": "2️⃣ Plinth Level (Transition)",
@@ -21,7 +29,8 @@ PHASES = {
         "items": [
             "Plinth Wall Masonry", "Plinth Beam RCC", "Damp Proof Course",
             "Plinth Filling Sand"
-        ]
+        ],
+        "keywords": ["plinth", "dpc"]
     },
     "PHASE_3_SUPERSTRUCTURE": {
         "name": "3️⃣ Super-Structure (Above Ground)",
@@ -30,7 +39,8 @@ PHASES = {
         "items": [
             "RCC Column", "RCC Beam", "RCC Slab", "Brick Masonry",
             "Lintels Chajjas"
-        ]
+        ],
+        "keywords": ["column", "beam", "slab", "masonry"]
     },
     "PHASE_4_FINISHING": {
         "name": "4️⃣ Finishing & Services",
@@ -39,13 +49,15 @@ PHASES = {
         "items": [
             "Plastering", "Flooring", "Painting", "Electrification Lumpsum",
             "Sanitary Lumpsum", "Doors Windows"
-        ]
+        ],
+        "keywords": ["plaster", "floor", "paint"]
     },
     "PHASE_5_ABSTRACT": {
         "name": "5️⃣ Abstract & Summary",
         "description": "Cost rollup, contingency, GST",
         "wbs_code": "AB",
-        "items": []
+        "items": [],
+        "keywords": []
     }
 }
 
@@ -80,21 +92,72 @@ WORKTYPE_TO_PHASE = {
     "default": "PHASE_3_SUPERSTRUCTURE"
 }
 
+# Keyword → phase rules from PHASES, in phase order (earlier phases win when several match)
+PHASE_KEYWORDS = tuple(
+    (phase_key, tuple(phase["keywords"])) for phase_key, phase in PHASES.items() if phase["keywords"]
+)
+
+
+def _compile_phase_pattern(rules) -> "re.Pattern[str]":
+    """
+    One combined regex for all keyword rules.
+
+    Each phase is a named group; the whole alternation sits in a lookahead so
+    finditer() reports every start position (overlapping keywords included),
+    and at a given position the higher-priority phase alternative wins.
+    """
+    groups = "|".join(
+        f"(?P<p{i}>" + "|".join(re.escape(k) for k in sorted(kws, key=len, reverse=True)) + ")"
+        for i, (_, kws) in enumerate(rules)
+    )
+    return re.compile(f"(?=(?:{groups}))", re.IGNORECASE)
+
+
+_PHASE_PATTERN = _compile_phase_pattern(PHASE_KEYWORDS)
+_PHASE_BY_GROUP = {f"p{i}": phase for i, (phase, _) in enumerate(PHASE_KEYWORDS)}
+_GROUP_RANK = {f"p{i}": i for i in range(len(PHASE_KEYWORDS))}
+
+
+@lru_cache(maxsize=65536)
 def classify_worktype_to_phase(worktype_name: str) -> str:
     """Auto-classify work item to phase based on name"""
-    worktype_lower = worktype_name.lower()
-    
-    if any(keyword in worktype_lower for keyword in ["clearance", "dismantling", "excavation", "footing", "backfill"]):
-        return "PHASE_1_SUBSTRUCTURE"
-    elif any(keyword in worktype_lower for keyword in ["plinth", "dpc"]):
-        return "PHASE_2_PLINTH"
-    elif any(keyword in worktype_lower for keyword in ["column", "beam", "slab", "masonry"]):
-        return "PHASE_3_SUPERSTRUCTURE"
-    elif any(keyword in worktype_lower for keyword in ["plaster", "floor", "paint"]):
-        return "PHASE_4_FINISHING"
-    
+    best = None
+    for m in _PHASE_PATTERN.finditer(worktype_name):
+        rank = _GROUP_RANK[m.lastgroup]
+        if best is None or rank < best:
+            best = rank
+            if rank == 0:
+                break
+    if best is not None:
+        return PHASE_KEYWORDS[best][0]
+
     return WORKTYPE_TO_PHASE.get(worktype_name, WORKTYPE_TO_PHASE["default"])
 
+
+def classify_with_wbs(worktype_name: str) -> Tuple[str, str]:
+    """(phase key, WBS code) for one work item name"""
+    phase = classify_worktype_to_phase(worktype_name)
+    return phase, get_phase_wbs(phase)
+
+
+def classify_many(names: Iterable[str]) -> pd.DataFrame:
+    """
+    Bulk WBS assignment for an imported BOQ.
+
+    Each distinct description is classified once (and memoised across
+    calls); the results are broadcast back to every row.
+
+    Returns a DataFrame aligned with names: columns phase, wbs_code.
+    """
+    series = names if isinstance(names, pd.Series) else pd.Series(list(names), dtype=object)
+    codes, uniques = pd.factorize(series.fillna("").astype(str), sort=False)
+    phase_arr = np.array([classify_worktype_to_phase(u) for u in uniques], dtype=object)
+    wbs_arr = np.array([get_phase_wbs(p) for p in phase_arr], dtype=object)
+    return pd.DataFrame(
+        {"phase": phase_arr[codes], "wbs_code": wbs_arr[codes]},
+        index=series.index,
+    )
+
 def get_phase_items(phase_key: str):
     """Get all work items belonging to a phase"""
     return PHASES[phase_key]["items"]
@@ -0,0 +1,200 @@
+# profiling.py
+
+"""
+Opt-in per-rerun profiling for the Streamlit app.
+
+Streamlit reruns the whole script on every widget change. In profiling
+mode each rerun is recorded as one JSON line:
+
+    {"time": ..., "rerun": 17, "items": 10000, "wall_ms": 812.4,
+     "traced_kb": ..., "alloc_kb": ..., "blocks": ...,
+     "sections": [{"name": "tab2.abstract", "calls": 1, "ms": 210.3,
+                   "alloc_kb": 512.0, "peak_kb": 2048.0}, ...]}
+
+Sections are the instrumentation sections and @timed calls already in
+the code (the profiler installs itself as the thread's instrumentation
+hook). Allocation figures come from tracemalloc: alloc_kb is the net
+change in traced memory over the section, peak_kb the highest traced
+memory above the section's starting point; per rerun, traced_kb is the
+traced memory at the end, alloc_kb its net growth over the rerun and
+blocks the number of live traced allocations. tracemalloc slows Python
+down noticeably, which is why the mode is opt-in (ESTIMATOR_PROFILE=1
+or ?profile=1 in the app URL), and it only runs while a profiled rerun
+is in progress: the first start() starts it, the last finish() stops it.
+finish() must run however the script ends (the app calls it from a
+finally block); it also removes the instrumentation hook.
+
+Records go to a size-rotated file (profiles/reruns.jsonl plus a few
+backups), so a long session never grows it without bound.
+"""
+
+from __future__ import annotations
+
+import json
+import logging
+import os
+import threading
+import time
+import tracemalloc
+from datetime import datetime
+from logging.handlers import RotatingFileHandler
+from pathlib import Path
+from typing import Dict, List, Optional
+
+import pandas as pd
+
+import instrumentation
+
+ENV_VAR = "ESTIMATOR_PROFILE"
+PROFILE_FILE = Path(__file__).resolve().parent / "profiles" / "reruns.jsonl"
+MAX_BYTES = 5_000_000
+BACKUP_COUNT = 3
+
+_logger: Optional[logging.Logger] = None
+_running = 0                 # profiled reruns in progress (all sessions)
+_running_lock = threading.Lock()
+_started_tracing = False     # tracemalloc was started here (and is stopped here)
+
+
+def enabled_from_env() -> bool:
+    return os.environ.get(ENV_VAR, "").strip().lower() in {"1", "true", "yes", "on"}
+
+
+def _profile_logger(path: Path) -> logging.Logger:
+    global _logger
+    if _logger is None:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        handler = RotatingFileHandler(path, maxBytes=MAX_BYTES, backupCount=BACKUP_COUNT, encoding="utf-8")
+        handler.setFormatter(logging.Formatter("%(message)s"))
+        _logger = logging.getLogger("estimator.profile")
+        _logger.setLevel(logging.INFO)
+        _logger.propagate = False
+        _logger.addHandler(handler)
+    return _logger
+
+
+class RerunProfiler:
+    """
+    Profile of one script run; start() at the top of the script,
+    finish() at every exit point (finish is idempotent).
+    """
+
+    def __init__(self, rerun: int, path: Path = PROFILE_FILE, count_blocks: bool = True):
+        self.rerun = rerun
+        self.path = path
+        self.count_blocks = count_blocks
+        self.sections: Dict[str, List[float]] = {}     # name -> [calls, ms, alloc_kb, peak_kb]
+        self._stack: List[list] = []                   # [name, mem at entry, peak seen]
+        self._t0 = 0.0
+        self.record: Optional[dict] = None
+
+    # -----------------------------
+    # instrumentation hook
+    # -----------------------------
+    def enter(self, name: str) -> None:
+        current, peak = tracemalloc.get_traced_memory()
+        if self._stack:
+            self._stack[-1][2] = max(self._stack[-1][2], peak)
+        tracemalloc.reset_peak()
+        self._stack.append([name, current, current])
+
+    def exit(self, name: str, seconds: float) -> None:
+        current, peak = tracemalloc.get_traced_memory()
+        _, start, seen = self._stack.pop()
+        seen = max(seen, peak)
+        if self._stack:
+            # the parent's peak includes this section's
+            self._stack[-1][2] = max(self._stack[-1][2], seen)
+        tracemalloc.reset_peak()
+        stat = self.sections.setdefault(name, [0, 0.0, 0.0, 0.0])
+        stat[0] += 1
+        stat[1] += seconds * 1e3
+        stat[2] += (current - start) / 1024
+        stat[3] = max(stat[3], (seen - start) / 1024)
+
+    # -----------------------------
+    # Rerun lifecycle
+    # -----------------------------
+    def start(self) -> "RerunProfiler":
+        global _running, _started_tracing
+        with _running_lock:
+            if not tracemalloc.is_tracing():
+                tracemalloc.start()
+                _started_tracing = True
+            _running += 1
+        tracemalloc.reset_peak()
+        self._start_mem = tracemalloc.get_traced_memory()[0]
+        self._t0 = time.perf_counter()
+        instrumentation.set_hook(self)
+        return self
+
+    def finish(self, items: int = 0) -> Optional[dict]:
+        """Stop profiling this rerun, write its record and return it."""
+        if self.record is not None:
+            return self.record
+        wall_ms = (time.perf_counter() - self._t0) * 1e3
+        instrumentation.set_hook(None)
+        try:
+            current = tracemalloc.get_traced_memory()[0]
+            blocks = len(tracemalloc.take_snapshot().traces) if self.count_blocks else None
+        finally:
+            _release_tracing()
+        self.record = {
+            "time": datetime.now().isoformat(timespec="seconds"),
+            "rerun": self.rerun,
+            "items": items,
+            "wall_ms": round(wall_ms, 3),
+            "traced_kb": round(current / 1024, 1),
+            "alloc_kb": round((current - self._start_mem) / 1024, 1),
+            "blocks": blocks,
+            "sections": [
+                {"name": name, "calls": int(c), "ms": round(ms, 3), "alloc_kb": round(a, 1), "peak_kb": round(p, 1)}
+                for name, (c, ms, a, p) in sorted(self.sections.items(), key=lambda kv: -kv[1][1])
+            ],
+        }
+        _profile_logger(self.path).info(json.dumps(self.record))
+        return self.record
+
+
+def _release_tracing() -> None:
+    """One profiled rerun fewer; stop tracemalloc when none is left."""
+    global _running, _started_tracing
+    with _running_lock:
+        _running = max(_running - 1, 0)
+        if _running == 0 and _started_tracing:
+            tracemalloc.stop()
+            _started_tracing = False
+
+
+# -----------------------------
+# Reading profiles back
+# -----------------------------
+def load_profiles(path: Path = PROFILE_FILE, last: Optional[int] = None) -> List[dict]:
+    """Rerun records, oldest first (current file only; backups hold older runs)."""
+    if not path.is_file():
+        return []
+    with path.open(encoding="utf-8") as fh:
+        records = [json.loads(line) for line in fh if line.strip()]
+    return records[-last:] if last else records
+
+
+def sections_frame(records: List[dict]) -> pd.DataFrame:
+    """One row per (rerun, section) with the rerun's item count and wall time."""
+    rows = [
+        {"rerun": r["rerun"], "time": r["time"], "items": r["items"], "wall_ms": r["wall_ms"], **s}
+        for r in records
+        for s in r["sections"]
+    ]
+    return pd.DataFrame(
+        rows, columns=["rerun", "time", "items", "wall_ms", "name", "calls", "ms", "alloc_kb", "peak_kb"]
+    )
+
+
+def section_trend(records: List[dict]) -> pd.DataFrame:
+    """Median section time (ms) per estimate size: which sections grow with the estimate."""
+    df = sections_frame(records)
+    if df.empty:
+        return df
+    return df.pivot_table(index="name", columns="items", values="ms", aggfunc="median").sort_values(
+        df["items"].max(), ascending=False
+    )
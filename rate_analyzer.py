@@ -1,20 +1,313 @@
+from __future__ import annotations
+
+from dataclasses import dataclass
+from typing import Dict, Iterable, List
+
+import numpy as np
+import pandas as pd
+
+
+# -----------------------------
+# Basic rates (resources)
+# -----------------------------
+@dataclass(frozen=True)
+class Resource:
+    key: str
+    name: str
+    unit: str
+    group: str      # material / labor / equipment
+    rate: float     # ₹ per unit
+
+
+# Illustrative basic rates – update from the current CPWD/State basic rates list.
+BASIC_RATES: Dict[str, Resource] = {
+    r.key: r
+    for r in [
+        # Materials
+        Resource("cement", "Cement OPC 43 grade", "Bag", "material", 420.0),
+        Resource("sand", "Coarse sand", "Cum", "material", 1800.0),
+        Resource("aggregate", "Stone aggregate 20 mm nominal", "Cum", "material", 1650.0),
+        Resource("steel", "TMT bars Fe500", "Kg", "material", 68.0),
+        Resource("binding_wire", "Binding wire", "Kg", "material", 90.0),
+        Resource("bricks", "First class bricks", "Nos", "material", 8.5),
+        Resource("tiles_vitrified", "Vitrified tiles 600x600", "Sqm", "material", 700.0),
+        Resource("tiles_ceramic", "Ceramic anti-skid tiles", "Sqm", "material", 450.0),
+        Resource("paint_acrylic", "Acrylic exterior paint", "Litre", "material", 320.0),
+        Resource("paint_emulsion", "Premium emulsion paint", "Litre", "material", 380.0),
+        Resource("primer", "Primer", "Litre", "material", 220.0),
+        Resource("putty", "Wall putty", "Kg", "material", 35.0),
+        Resource("shuttering", "Shuttering material (per use)", "Sqm", "material", 160.0),
+        # Labour
+        Resource("mason", "Mason", "Day", "labor", 950.0),
+        Resource("beldar", "Beldar / mazdoor", "Day", "labor", 700.0),
+        Resource("carpenter", "Carpenter", "Day", "labor", 950.0),
+        Resource("bar_bender", "Bar bender / fitter", "Day", "labor", 950.0),
+        Resource("painter", "Painter", "Day", "labor", 900.0),
+        # Equipment
+        Resource("mixer", "Concrete mixer 0.2 cum", "Day", "equipment", 1600.0),
+        Resource("vibrator", "Needle vibrator", "Day", "equipment", 650.0),
+        Resource("excavator", "Hydraulic excavator", "Hour", "equipment", 2400.0),
+    ]
+}
+
+# Resource coefficients per unit of DSR item (incl. wastage), one table per
+# catalogue: the same code can mean different items in different catalogues
+# (5.2.1 is PCC 1:2:4 in CPWD_BASE_DSR_2023 but RCC M20 in beams in
+# dsr_items.csv), so a code is only ever looked up in its own catalogue's table.
+BUILTIN = "builtin"      # CPWD_BASE_DSR_2023 in streamlit_app.py
+DSR_CSV = "dsr_csv"      # dsr_items.csv (DSRParser)
+
+_EARTHWORK = {"beldar": 0.25, "excavator": 0.03}
+_PCC_124 = {"cement": 6.34, "sand": 0.45, "aggregate": 0.90, "mason": 0.17, "beldar": 1.6, "mixer": 0.07, "vibrator": 0.07}
+_PCC_136 = {"cement": 4.40, "sand": 0.47, "aggregate": 0.94, "mason": 0.10, "beldar": 1.6, "mixer": 0.07}
+_PCC_148 = {"cement": 3.40, "sand": 0.48, "aggregate": 0.96, "mason": 0.10, "beldar": 1.6, "mixer": 0.07}
+_RCC_M20 = {"cement": 7.60, "sand": 0.44, "aggregate": 0.88, "mason": 0.24, "beldar": 2.5, "mixer": 0.07, "vibrator": 0.07}
+_RCC_M25 = {"cement": 8.00, "sand": 0.42, "aggregate": 0.84, "mason": 0.24, "beldar": 2.5, "mixer": 0.07, "vibrator": 0.07}
+_STEEL = {"steel": 1.05, "binding_wire": 0.01, "bar_bender": 0.0085, "beldar": 0.0085}
+_FORMWORK = {"shuttering": 1.0, "carpenter": 0.20, "beldar": 0.25}
+_BRICKWORK_16 = {"bricks": 500.0, "cement": 1.26, "sand": 0.28, "mason": 0.85, "beldar": 1.25}
+_PLASTER_12 = {"cement": 0.040, "sand": 0.0145, "mason": 0.065, "beldar": 0.08}
+_PLASTER_15 = {"cement": 0.050, "sand": 0.0180, "mason": 0.070, "beldar": 0.09}
+_PUTTY = {"putty": 1.0, "painter": 0.035, "beldar": 0.01}
+_VITRIFIED = {"tiles_vitrified": 1.03, "cement": 0.10, "sand": 0.022, "mason": 0.12, "beldar": 0.15}
+_CERAMIC = {"tiles_ceramic": 1.03, "cement": 0.10, "sand": 0.022, "mason": 0.12, "beldar": 0.15}
+_ACRYLIC = {"paint_acrylic": 0.14, "primer": 0.09, "painter": 0.025, "beldar": 0.01}
+_EMULSION = {"paint_emulsion": 0.13, "primer": 0.09, "painter": 0.025, "beldar": 0.01}
+
+ITEM_COEFFICIENTS: Dict[str, Dict[str, float]] = {
+    "2.5.1": _EARTHWORK,
+    "5.2.1": _PCC_124,
+    "13.1.1": _RCC_M25,
+    "13.2.1": _RCC_M25,
+    "13.3.1": _RCC_M25,
+    "13.4.1": _RCC_M25,
+    "5.xx.x": _STEEL,
+    "5.yy.y": _FORMWORK,
+    "5.yy.z": _FORMWORK,
+    "5.yy.w": _FORMWORK,
+    "6.1.1": _BRICKWORK_16,
+    "11.1.1": _PLASTER_12,
+    "13.zz.z": _PUTTY,
+    "14.1.1": _VITRIFIED,
+    "15.8.1": _ACRYLIC,
+}
+
+DSR_CSV_COEFFICIENTS: Dict[str, Dict[str, float]] = {
+    "2.8.1": _EARTHWORK,
+    "2.6.1": _EARTHWORK,
+    "4.1.3": _PCC_148,
+    "4.1.2": _PCC_136,
+    "5.1.2": _RCC_M25,
+    "5.2.1": _RCC_M20,
+    "6.1.1": _BRICKWORK_16,
+    "6.1.2": _BRICKWORK_16,
+    "13.1.2": _PLASTER_12,
+    "13.1.3": _PLASTER_15,
+    "11.41.2": _VITRIFIED,
+    "11.42.1": _CERAMIC,
+    "10.1.1": _FORMWORK,
+    "10.2.1": _FORMWORK,
+    "5.22.6": _STEEL,
+    "5.22.7": _STEEL,
+    "13.43.1": _ACRYLIC,
+    "13.42.1": _EMULSION,
+}
+
+CATALOGUE_COEFFICIENTS: Dict[str, Dict[str, Dict[str, float]]] = {
+    BUILTIN: ITEM_COEFFICIENTS,
+    DSR_CSV: DSR_CSV_COEFFICIENTS,
+}
+
+GROUPS = ("material", "labor", "equipment")
+
+
 class RateAnalyzer:
     """
-    Very simple rate breakdown helper.
-    For a given total rate, it splits into components using fixed percentages.
+    Rate analysis from resource coefficients and basic rates.
+
+    Each DSR code with an entry in the coefficient table is analysed as
+        Σ (coefficient × basic rate)  →  material / labour / equipment
+        + water charges % + contractor's profit & overheads %
+    Codes without coefficients fall back to the fixed percentage split.
+    Codes are those of one catalogue (default: the app's built-in one);
+    use RateAnalyzer(catalogue=DSR_CSV) for dsr_items.csv codes.
+
+    Coefficients are compiled into a sparse items × resources matrix
+    (CSR arrays), so resource totals for a whole estimate are one
+    bincount-based matrix product, not a per-line loop.
     """
 
-    def __init__(self):
-        # Percentages can be tuned as per your standard
+    def __init__(
+        self,
+        basic_rates: Dict[str, Resource] | None = None,
+        coefficients: Dict[str, Dict[str, float]] | None = None,
+        water_charges_pct: float = 1.0,
+        cpoh_pct: float = 15.0,
+        catalogue: str = BUILTIN,
+    ):
+        # Fallback split for codes without a rate analysis
         self.material_pct = 0.60
         self.labor_pct = 0.25
         self.equipment_pct = 0.10
         self.overhead_pct = 0.05
 
-    def simple_breakdown(self, total_rate: float) -> dict:
+        self.water_charges_pct = water_charges_pct
+        self.cpoh_pct = cpoh_pct
+        self.resources: Dict[str, Resource] = dict(basic_rates or BASIC_RATES)
+        if coefficients is None:
+            if catalogue not in CATALOGUE_COEFFICIENTS:
+                raise KeyError(f"Unknown catalogue '{catalogue}' (known: {sorted(CATALOGUE_COEFFICIENTS)})")
+            coefficients = CATALOGUE_COEFFICIENTS[catalogue]
+        self.catalogue = catalogue
+        self.coefficients: Dict[str, Dict[str, float]] = dict(coefficients)
+        self._compile()
+
+    # -----------------------------
+    # Compilation
+    # -----------------------------
+    def _compile(self) -> None:
+        """Build resource/code indices and the CSR coefficient matrix."""
+        self.resource_keys: List[str] = list(self.resources)
+        self.resource_index = pd.Index(self.resource_keys)
+        self.codes: List[str] = list(self.coefficients)
+        self.code_index = pd.Index(self.codes)
+
+        indptr = [0]
+        indices: List[int] = []
+        data: List[float] = []
+        for code in self.codes:
+            for key, coeff in self.coefficients[code].items():
+                if key not in self.resources:
+                    raise KeyError(f"Rate analysis for {code} uses unknown resource '{key}'")
+                indices.append(self.resource_index.get_loc(key))
+                data.append(float(coeff))
+            indptr.append(len(indices))
+
+        self.indptr = np.asarray(indptr, dtype=np.int64)
+        self.indices = np.asarray(indices, dtype=np.int64)
+        self.data = np.asarray(data, dtype=np.float64)
+        self.row_nnz = np.diff(self.indptr)
+        self.row_of_nnz = np.repeat(np.arange(len(self.codes)), self.row_nnz)
+
+        self.rates = np.array([self.resources[k].rate for k in self.resource_keys], dtype=np.float64)
+        self.group_ids = np.array([GROUPS.index(self.resources[k].group) for k in self.resource_keys])
+
+    @property
+    def markup(self) -> float:
+        """Multiplier for water charges and contractor's profit & overheads."""
+        return (1.0 + self.water_charges_pct / 100.0) * (1.0 + self.cpoh_pct / 100.0)
+
+    def set_basic_rate(self, key: str, rate: float) -> None:
+        """Change one basic rate (no recompilation needed)."""
+        res = self.resources[key]
+        self.resources[key] = Resource(res.key, res.name, res.unit, res.group, float(rate))
+        self.rates[self.resource_index.get_loc(key)] = float(rate)
+
+    def has_analysis(self, code: str) -> bool:
+        return str(code) in self.coefficients
+
+    # -----------------------------
+    # Vectorised core
+    # -----------------------------
+    def code_rows(self, codes: Iterable[str]) -> np.ndarray:
+        """Row index into the coefficient matrix per code (-1 if not analysed)."""
+        return self.code_index.get_indexer(pd.Index(pd.Series(codes, dtype=object).astype(str)))
+
+    def _group_costs(self, rates: np.ndarray | None = None) -> np.ndarray:
+        """(n_codes × 3) bare material/labour/equipment cost per unit of each code."""
+        rates = self.rates if rates is None else rates
+        out = np.zeros((len(self.codes), len(GROUPS)))
+        np.add.at(out, (self.row_of_nnz, self.group_ids[self.indices]), self.data * rates[self.indices])
+        return out
+
+    def analysed_rates(self, codes: Iterable[str] | None = None, rates: np.ndarray | None = None) -> np.ndarray:
+        """
+        Analysed ₹/unit per code (NaN for codes without analysis).
+
+        rates overrides the basic-rate vector (ordered as resource_keys).
+        """
+        rates = self.rates if rates is None else rates
+        per_code = np.bincount(
+            self.row_of_nnz, weights=self.data * rates[self.indices], minlength=len(self.codes)
+        ) * self.markup
+        if codes is None:
+            return per_code
+        rows = self.code_rows(codes)
+        return np.where(rows >= 0, per_code[rows], np.nan)
+
+    def quantities_per_code(self, codes: Iterable[str], quantities: Iterable[float]) -> tuple[np.ndarray, np.ndarray]:
+        """
+        Sum estimate quantities per analysed code.
+
+        Returns (qty_per_code, unanalysed_mask_per_line).
+        """
+        rows = self.code_rows(codes)
+        qty = np.asarray(quantities, dtype=np.float64)
+        ok = rows >= 0
+        per_code = np.bincount(rows[ok], weights=qty[ok], minlength=len(self.codes))
+        return per_code, ~ok
+
+    def expand_to_resources(self, per_code: np.ndarray) -> np.ndarray:
+        """Sparse product per_code^T × coefficients → resource totals (ordered as resource_keys)."""
+        return np.bincount(
+            self.indices,
+            weights=self.data * np.repeat(per_code, self.row_nnz),
+            minlength=len(self.resource_keys),
+        )
+
+    def resource_vector(self, codes: Iterable[str], quantities: Iterable[float]) -> np.ndarray:
+        """Resource totals (ordered as resource_keys) for aligned code/quantity lines."""
+        per_code, _ = self.quantities_per_code(codes, quantities)
+        return self.expand_to_resources(per_code)
+
+    # -----------------------------
+    # Public API
+    # -----------------------------
+    def analyse(self, code: str) -> pd.DataFrame:
+        """
+        Detailed rate analysis for one code (empty DataFrame if not analysed).
+
+        Columns: resource, name, unit, group, coefficient, rate, amount.
+        """
+        cols = ["resource", "name", "unit", "group", "coefficient", "rate", "amount"]
+        coeffs = self.coefficients.get(str(code))
+        if not coeffs:
+            return pd.DataFrame(columns=cols)
+        rows = []
+        for key, coeff in coeffs.items():
+            res = self.resources[key]
+            rows.append([key, res.name, res.unit, res.group, coeff, res.rate, coeff * res.rate])
+        return pd.DataFrame(rows, columns=cols)
+
+    def breakdown(self, code: str) -> dict | None:
+        """Analysed ₹/unit split for one code, or None if the code is not analysed."""
+        row = self.code_index.get_indexer([str(code)])[0]
+        if row < 0:
+            return None
+        material, labor, equipment = (float(v) for v in self._group_costs()[row])
+        bare = material + labor + equipment
+        water = bare * self.water_charges_pct / 100.0
+        cpoh = (bare + water) * self.cpoh_pct / 100.0
+        return {
+            "material": material,
+            "labor": labor,
+            "equipment": equipment,
+            "overheads": water + cpoh,
+            "rate": bare + water + cpoh,
+        }
+
+    def simple_breakdown(self, total_rate: float, code: str | None = None) -> dict:
         """
         Split total ₹/unit into components.
+
+        With a code that has a rate analysis, the split follows that
+        analysis (scaled to total_rate); otherwise fixed percentages are used.
         """
+        analysed = self.breakdown(code) if code is not None else None
+        if analysed and analysed["rate"] > 0:
+            scale = total_rate / analysed["rate"]
+            return {k: analysed[k] * scale for k in ("material", "labor", "equipment", "overheads")}
+
         material = total_rate * self.material_pct
         labor = total_rate * self.labor_pct
         equipment = total_rate * self.equipment_pct
@@ -26,3 +319,36 @@ class RateAnalyzer:
             "equipment": equipment,
             "overheads": overheads,
         }
+
+    def resource_totals(self, codes: Iterable[str], quantities: Iterable[float]) -> pd.DataFrame:
+        """
+        Resource totals for a whole estimate.
+
+        Parameters
+        ----------
+        codes, quantities : aligned sequences (one entry per estimate line)
+
+        Returns
+        -------
+        DataFrame with resource, name, unit, group, quantity, rate, amount
+        (only resources with a non-zero quantity). Lines whose code has no
+        analysis are ignored; df.attrs["unanalysed_lines"] gives their count.
+        """
+        codes = pd.Series(codes, dtype=object)
+        per_code, unanalysed = self.quantities_per_code(codes, quantities)
+        totals = self.expand_to_resources(per_code)
+        used = totals != 0
+        keys = [k for k, u in zip(self.resource_keys, used) if u]
+        df = pd.DataFrame(
+            {
+                "resource": keys,
+                "name": [self.resources[k].name for k in keys],
+                "unit": [self.resources[k].unit for k in keys],
+                "group": [self.resources[k].group for k in keys],
+                "quantity": totals[used],
+                "rate": self.rates[used],
+            }
+        )
+        df["amount"] = df["quantity"] * df["rate"]
+        df.attrs["unanalysed_lines"] = int(unanalysed.sum())
+        return df
@@ -0,0 +1,218 @@
+# resource_takeoff.py
+
+"""
+Bulk resource / material take-off for a whole estimate.
+
+Every QTO line (dsr_code, quantity, phase) is expanded into resource
+quantities through the RateAnalyzer coefficient matrix, then grouped by
+phase and resource in one vectorised pass. Monthly requirements are
+derived by spreading each phase's totals over its months in a simple
+phase schedule (start month, duration).
+
+Results are cached per estimate revision, so re-rendering the same
+estimate does not repeat the expansion.
+"""
+
+from __future__ import annotations
+
+from collections import OrderedDict
+from typing import Dict, Iterable, Mapping, Tuple
+
+import numpy as np
+import pandas as pd
+
+from rate_analyzer import RateAnalyzer
+from units import REGISTRY as UNIT_REGISTRY
+
+# Phase → (start month, duration in months); month 1 = start of work.
+DEFAULT_PHASE_SCHEDULE: Dict[str, Tuple[int, int]] = {
+    "1️⃣ SUBSTRUCTURE": (1, 2),
+    "2️⃣ PLINTH": (3, 1),
+    "3️⃣ SUPERSTRUCTURE": (4, 4),
+    "4️⃣ FINISHING": (8, 3),
+}
+
+# Units used for planning reports (resource unit → report unit)
+REPORT_UNITS: Dict[str, str] = {
+    "steel": "Tonne",
+    "binding_wire": "Kg",
+}
+
+
+class ResourceAggregator:
+    """
+    Resource take-off with a per-revision cache.
+
+    Parameters
+    ----------
+    analyzer : RateAnalyzer, optional
+        Source of the coefficient matrix (default: RateAnalyzer()).
+    schedule : dict, optional
+        Phase → (start_month, duration_months). Phases not listed are
+        placed in month 1 with a one-month duration.
+    cache_size : int
+        Number of revisions kept.
+    """
+
+    def __init__(
+        self,
+        analyzer: RateAnalyzer | None = None,
+        schedule: Mapping[str, Tuple[int, int]] | None = None,
+        cache_size: int = 8,
+    ):
+        self.analyzer = analyzer or RateAnalyzer()
+        self.schedule = dict(schedule or DEFAULT_PHASE_SCHEDULE)
+        self.cache_size = cache_size
+        self._cache: "OrderedDict[object, Tuple[list, np.ndarray, int]]" = OrderedDict()
+
+    # -----------------------------
+    # Core expansion
+    # -----------------------------
+    @staticmethod
+    def _columns(items: Iterable[dict] | pd.DataFrame) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        if isinstance(items, pd.DataFrame):
+            df = items
+        else:
+            # items may be dicts or read-only mappings (e.g. replicated-floor views)
+            items = list(items)
+            df = pd.DataFrame(
+                {
+                    "dsr_code": [it["dsr_code"] for it in items],
+                    "quantity": [it["quantity"] for it in items],
+                    "phase": [it["phase"] for it in items],
+                }
+            )
+        return (
+            df["dsr_code"].astype(str).to_numpy(),
+            pd.to_numeric(df["quantity"], errors="coerce").fillna(0.0).to_numpy(dtype=np.float64),
+            df["phase"].astype(str).to_numpy(),
+        )
+
+    def line_resources(self, items: Iterable[dict] | pd.DataFrame) -> pd.DataFrame:
+        """
+        Long table of resource quantities per QTO line.
+
+        Columns: line (position in items), phase, resource, quantity.
+        """
+        codes, qty, phases = self._columns(items)
+        an = self.analyzer
+        rows = an.code_rows(codes)
+        lines = np.flatnonzero(rows >= 0)
+        rows = rows[lines]
+
+        nnz = an.row_nnz[rows]
+        total = int(nnz.sum())
+        # position of each (line, resource) pair inside the CSR data arrays
+        first = np.repeat(an.indptr[rows] - (np.cumsum(nnz) - nnz), nnz)
+        pos = first + np.arange(total)
+        line_of = np.repeat(lines, nnz)
+
+        return pd.DataFrame(
+            {
+                "line": line_of,
+                "phase": phases[line_of],
+                "resource": np.asarray(an.resource_keys, dtype=object)[an.indices[pos]],
+                "quantity": an.data[pos] * qty[line_of],
+            }
+        )
+
+    def _phase_matrix(self, items, revision) -> Tuple[list, np.ndarray, int]:
+        """(phase labels, phases × resources quantity matrix, unanalysed line count), cached."""
+        if revision is not None and revision in self._cache:
+            self._cache.move_to_end(revision)
+            return self._cache[revision]
+
+        codes, qty, phases = self._columns(items)
+        an = self.analyzer
+        rows = an.code_rows(codes)
+        ok = rows >= 0
+        phase_ids, phase_labels = pd.factorize(phases[ok], sort=False)
+        n_codes = len(an.codes)
+
+        # group (phase, code) quantities, then phase × code  ·  code × resource
+        pc = np.bincount(
+            phase_ids * n_codes + rows[ok], weights=qty[ok], minlength=len(phase_labels) * n_codes
+        ).reshape(len(phase_labels), n_codes)
+        mat = np.vstack([an.expand_to_resources(r) for r in pc]) if len(phase_labels) else np.zeros(
+            (0, len(an.resource_keys))
+        )
+
+        result = (list(phase_labels), mat, int((~ok).sum()))
+        if revision is not None:
+            self._cache[revision] = result
+            while len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+        return result
+
+    # -----------------------------
+    # Reports
+    # -----------------------------
+    def _report_unit(self, key: str) -> Tuple[str, float]:
+        unit = self.analyzer.resources[key].unit
+        target = REPORT_UNITS.get(key)
+        if not target:
+            return unit, 1.0
+        return UNIT_REGISTRY.symbol(target), UNIT_REGISTRY.factor(unit, target)
+
+    def takeoff(self, items, revision=None) -> pd.DataFrame:
+        """
+        Resource quantities grouped by phase and resource.
+
+        Columns: phase, resource, name, unit, quantity, amount.
+        df.attrs["unanalysed_lines"] counts lines without a rate analysis.
+        """
+        labels, mat, unanalysed = self._phase_matrix(items, revision)
+        an = self.analyzer
+        p_idx, r_idx = np.nonzero(mat)
+        keys = [an.resource_keys[i] for i in r_idx]
+        units, factors = zip(*(self._report_unit(k) for k in keys)) if keys else ((), ())
+        qty = mat[p_idx, r_idx]
+        df = pd.DataFrame(
+            {
+                "phase": [labels[i] for i in p_idx],
+                "resource": keys,
+                "name": [an.resources[k].name for k in keys],
+                "unit": list(units),
+                "quantity": qty * np.asarray(factors, dtype=float),
+                "amount": qty * an.rates[r_idx],
+            }
+        )
+        df.attrs["unanalysed_lines"] = unanalysed
+        return df
+
+    def totals(self, items, revision=None) -> pd.DataFrame:
+        """Whole-project resource totals (takeoff summed over phases)."""
+        df = self.takeoff(items, revision)
+        out = df.groupby(["resource", "name", "unit"], sort=False, as_index=False)[["quantity", "amount"]].sum()
+        out.attrs = df.attrs
+        return out
+
+    def monthly(self, items, revision=None, resources: Iterable[str] | None = None) -> pd.DataFrame:
+        """
+        Month × resource requirement table (report units).
+
+        Each phase's quantities are spread evenly over its scheduled months.
+        """
+        labels, mat, _ = self._phase_matrix(items, revision)
+        an = self.analyzer
+        spans = [self.schedule.get(p, (1, 1)) for p in labels]
+        n_months = max((s + max(d, 1) - 1 for s, d in spans), default=0)
+
+        weights = np.zeros((len(labels), n_months))
+        for i, (start, dur) in enumerate(spans):
+            dur = max(int(dur), 1)
+            weights[i, start - 1 : start - 1 + dur] = 1.0 / dur
+        by_month = weights.T @ mat if len(labels) else np.zeros((0, len(an.resource_keys)))
+
+        keys = list(resources) if resources is not None else [
+            k for k, used in zip(an.resource_keys, mat.sum(axis=0) != 0) if used
+        ]
+        cols = {}
+        for k in keys:
+            unit, factor = self._report_unit(k)
+            cols[f"{an.resources[k].name} ({unit})"] = by_month[:, an.resource_index.get_loc(k)] * factor
+        df = pd.DataFrame(cols, index=pd.RangeIndex(1, n_months + 1, name="Month"))
+        return df
+
+    def clear_cache(self) -> None:
+        self._cache.clear()
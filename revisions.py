@@ -0,0 +1,281 @@
+# revisions.py
+
+"""
+Estimate revision history stored as deltas.
+
+Each revision records only what changed against its parent:
+
+- added   : item ID → full tracked fields
+- removed : item ID → full tracked fields (as they were)
+- changed : item ID → {field: (old, new)} for the fields that changed,
+            plus the item's new (phase, dsr_code, quantity, amount) for reports
+
+Only the head state (one dict of tracked fields per item) is kept in
+full; every earlier version exists only as a chain of deltas. Diffing
+revisions a and b composes the deltas between them, so the cost is the
+number of changes in between, not the size of the estimate.
+
+Items are matched by ID. The same records work for QTO item dicts
+(st.session_state.qto_items) and, via records_from_boq(), for
+BOQGenerator.items.
+"""
+
+from __future__ import annotations
+
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Dict, Hashable, Iterable, List, Mapping, Optional, Tuple
+
+import pandas as pd
+
+TRACKED_FIELDS = ("dsr_code", "phase", "item", "building", "floor", "quantity", "unit", "rate", "amount")
+NUMERIC_FIELDS = frozenset({"quantity", "rate", "amount"})
+CONTEXT_FIELDS = ("phase", "dsr_code", "quantity", "amount")
+_CONTEXT_POS = tuple(TRACKED_FIELDS.index(f) for f in CONTEXT_FIELDS)
+
+Fields = Tuple            # values in TRACKED_FIELDS order
+
+
+def _fields(item: Mapping) -> Fields:
+    return tuple(
+        float(item.get(f, 0.0) or 0.0) if f in NUMERIC_FIELDS else str(item.get(f, "") or "")
+        for f in TRACKED_FIELDS
+    )
+
+
+def _context(fields: Fields) -> Tuple:
+    return tuple(fields[i] for i in _CONTEXT_POS)
+
+
+def records_from_boq(items: Iterable) -> List[dict]:
+    """BOQGenerator.items as records for RevisionHistory.commit()."""
+    return [
+        {
+            "id": it.item_no, "dsr_code": it.item_no, "phase": it.wbs_level1, "item": it.description,
+            "quantity": it.quantity, "unit": it.unit, "rate": it.rate, "amount": it.amount,
+        }
+        for it in items
+    ]
+
+
+@dataclass
+class Revision:
+    rev_no: int
+    parent: Optional[int]
+    label: str
+    created: datetime
+    added: Dict[Hashable, Fields] = field(default_factory=dict)
+    removed: Dict[Hashable, Fields] = field(default_factory=dict)
+    changed: Dict[Hashable, Dict[str, Tuple[object, object]]] = field(default_factory=dict)
+    context: Dict[Hashable, Tuple] = field(default_factory=dict)     # changed items only
+
+    @property
+    def size(self) -> int:
+        return len(self.added) + len(self.removed) + len(self.changed)
+
+
+class RevisionHistory:
+    """Linear revision history of one estimate."""
+
+    def __init__(self, tolerance: float = 1e-9):
+        self.tolerance = tolerance
+        self.revisions: List[Revision] = [Revision(0, None, "Initial", datetime.now())]
+        self._head: Dict[Hashable, Fields] = {}
+
+    @property
+    def head(self) -> int:
+        return self.revisions[-1].rev_no
+
+    def __len__(self) -> int:
+        return len(self.revisions)
+
+    # -----------------------------
+    # Committing
+    # -----------------------------
+    def _differs(self, a, b, name: str) -> bool:
+        if name in NUMERIC_FIELDS:
+            return abs(a - b) > self.tolerance
+        return a != b
+
+    def _append(self, rev: Revision) -> Revision:
+        self.revisions.append(rev)
+        return rev
+
+    def commit(self, items: Iterable[Mapping], label: str = "") -> Revision:
+        """Commit the full current item list (O(items) comparison against head)."""
+        new_state = {it["id"]: _fields(it) for it in items}
+        rev = Revision(self.head + 1, self.head, label, datetime.now())
+        for item_id, new in new_state.items():
+            old = self._head.get(item_id)
+            if old is None:
+                rev.added[item_id] = new
+            elif old != new:
+                diffs = {
+                    name: (o, n)
+                    for name, o, n in zip(TRACKED_FIELDS, old, new)
+                    if self._differs(o, n, name)
+                }
+                if diffs:
+                    rev.changed[item_id] = diffs
+                    rev.context[item_id] = _context(new)
+        for item_id, old in self._head.items():
+            if item_id not in new_state:
+                rev.removed[item_id] = old
+        self._head = new_state
+        return self._append(rev)
+
+    def commit_changes(
+        self,
+        added: Iterable[Mapping] = (),
+        updated: Iterable[Mapping] = (),
+        removed: Iterable[Hashable] = (),
+        label: str = "",
+    ) -> Revision:
+        """
+        Commit known changes only (O(changes)): new items, updated items
+        (full records) and removed item IDs.
+        """
+        rev = Revision(self.head + 1, self.head, label, datetime.now())
+        for it in added:
+            if it["id"] in self._head:
+                raise KeyError(f"Item {it['id']!r} already exists")
+            rev.added[it["id"]] = self._head[it["id"]] = _fields(it)
+        for it in updated:
+            old = self._head[it["id"]]
+            new = _fields(it)
+            diffs = {n: (o, v) for n, o, v in zip(TRACKED_FIELDS, old, new) if self._differs(o, v, n)}
+            if diffs:
+                rev.changed[it["id"]] = diffs
+                rev.context[it["id"]] = _context(new)
+            self._head[it["id"]] = new
+        for item_id in removed:
+            rev.removed[item_id] = self._head.pop(item_id)
+        return self._append(rev)
+
+    # -----------------------------
+    # Diffing
+    # -----------------------------
+    def _compose(self, a: int, b: int) -> Dict[Hashable, list]:
+        """
+        Net effect of revisions a+1..b (a < b).
+
+        item ID → [existed_at_a, exists_at_b, old fields, new fields, context]
+        where old/new hold only the fields known from the deltas and context
+        is the latest (phase, dsr_code, quantity, amount) of a changed item.
+        """
+        net: Dict[Hashable, list] = {}
+        for rev in self.revisions[a + 1 : b + 1]:
+            for item_id, new in rev.added.items():
+                st = net.get(item_id)
+                if st is None:
+                    net[item_id] = [False, True, {}, dict(zip(TRACKED_FIELDS, new)), None]
+                else:                       # removed earlier in the range, re-added
+                    st[1] = True
+                    st[3] = dict(zip(TRACKED_FIELDS, new))
+            for item_id, diffs in rev.changed.items():
+                st = net.setdefault(item_id, [True, True, {}, {}, None])
+                for name, (o, n) in diffs.items():
+                    st[2].setdefault(name, o)
+                    st[3][name] = n
+                st[4] = rev.context.get(item_id)
+            for item_id, old in rev.removed.items():
+                st = net.get(item_id)
+                if st is None:
+                    net[item_id] = [True, False, dict(zip(TRACKED_FIELDS, old)), {}, None]
+                else:
+                    st[1] = False
+                    if st[0]:
+                        # fields never changed in the range still hold their removal-time value
+                        for name, value in zip(TRACKED_FIELDS, old):
+                            st[2].setdefault(name, value)
+                    st[3] = {}
+        return net
+
+    def _check(self, rev: int) -> int:
+        if not 0 <= rev <= self.head:
+            raise KeyError(f"Revision {rev} does not exist (0–{self.head})")
+        return rev
+
+    def diff(self, a: int, b: int | None = None) -> pd.DataFrame:
+        """
+        Changes from revision a to revision b (default: head).
+
+        One row per affected item: id, change (added / removed / changed),
+        phase, dsr_code, changed fields, quantity and amount before/after.
+        """
+        a = self._check(a)
+        b = self._check(self.head if b is None else b)
+        lo, hi = min(a, b), max(a, b)
+        net = self._compose(lo, hi)
+
+        rows = []
+        for item_id, (before, after, old, new, ctx) in net.items():
+            if before and after:
+                if ctx is not None:
+                    # new is partial: complete it from the context, then old from new
+                    new = {**dict(zip(CONTEXT_FIELDS, ctx)), **new}
+                old = {**new, **old}
+                new = {**old, **new}
+            if b < a:
+                before, after, old, new = after, before, new, old
+            if before and after:
+                fields = [n for n in TRACKED_FIELDS if n in old and n in new and self._differs(old[n], new[n], n)]
+                if not fields:
+                    continue
+                kind = "changed"
+            elif after:
+                kind, fields = "added", []
+            elif before:
+                kind, fields = "removed", []
+            else:
+                continue            # added and removed within the range
+            ref = new if after else old
+            rows.append(
+                {
+                    "id": item_id,
+                    "change": kind,
+                    "phase": ref.get("phase", ""),
+                    "dsr_code": ref.get("dsr_code", ""),
+                    "fields": ", ".join(fields),
+                    "quantity_old": float(old.get("quantity", 0.0)) if before else 0.0,
+                    "quantity_new": float(new.get("quantity", 0.0)) if after else 0.0,
+                    "amount_old": float(old.get("amount", 0.0)) if before else 0.0,
+                    "amount_new": float(new.get("amount", 0.0)) if after else 0.0,
+                }
+            )
+        df = pd.DataFrame(
+            rows,
+            columns=[
+                "id", "change", "phase", "dsr_code", "fields",
+                "quantity_old", "quantity_new", "amount_old", "amount_new",
+            ],
+        )
+        df["amount_change"] = df["amount_new"].astype(float) - df["amount_old"].astype(float)
+        return df
+
+    def phase_summary(self, a: int, b: int | None = None) -> pd.DataFrame:
+        """Per phase: items added / removed / changed and the net amount change."""
+        df = self.diff(a, b)
+        if df.empty:
+            return pd.DataFrame(columns=["phase", "added", "removed", "changed", "amount_change"])
+        counts = pd.crosstab(df["phase"], df["change"]).reindex(
+            columns=["added", "removed", "changed"], fill_value=0
+        )
+        counts["amount_change"] = df.groupby("phase")["amount_change"].sum()
+        return counts.reset_index().rename_axis(columns=None)
+
+    def log(self) -> pd.DataFrame:
+        """One row per revision with its delta size."""
+        return pd.DataFrame(
+            [
+                {
+                    "revision": r.rev_no,
+                    "label": r.label,
+                    "time": r.created.strftime("%d/%m/%Y %H:%M:%S"),
+                    "added": len(r.added),
+                    "removed": len(r.removed),
+                    "changed": len(r.changed),
+                }
+                for r in self.revisions
+            ]
+        )
@@ -0,0 +1,228 @@
+# rule_engine.py
+
+"""
+Declarative sequencing and audit rules, checked incrementally.
+
+analyse_dependencies() used to rebuild the sets of phases and categories
+present and loop over every item against FINISHING_DEPENDENCIES on each
+Tab 2 render, with the few rules it knew hardcoded. Here rules are data:
+
+    Requires(when=("phase", "4️⃣ FINISHING"), requires=("phase", "3️⃣ SUPERSTRUCTURE"), ...)
+    RatioBounds("Steel per cum of RCC", ("category", "reinforcement"),
+                ("category", "rcc_concrete"), low=60, high=250)
+
+and they only ever read aggregates (count, quantity, amount) of a key –
+("phase", p), ("category", c) or ("item", name). RuleEngine keeps those
+aggregates up to date as items are added, edited and deleted (O(1) per
+item) and compiles the rules into a key → rules index. evaluate()
+re-checks only the rules watching a key that changed since the last call
+and returns the current findings, so thousands of rules over 100k items
+cost next to nothing when little has changed.
+
+The app's tables (PHASE_DEPENDENCIES, FINISHING_DEPENDENCIES,
+QUANTITY_RATIO_CHECKS) are turned into rules with phase_rules(),
+dependency_rules() and ratio_rules().
+"""
+
+from __future__ import annotations
+
+from dataclasses import dataclass
+from typing import Dict, Iterable, List, Mapping, Optional, Set, Tuple
+
+Key = Tuple[str, str]          # ("phase" | "category" | "item", value)
+
+DEPENDENCY_HINT = "Example: no painting without plaster, no plaster without masonry."
+
+
+def item_keys(item: Mapping) -> Tuple[Key, Key, Key]:
+    """Aggregate keys an item contributes to."""
+    return ("phase", item["phase"]), ("category", item.get("category", "")), ("item", item["item"])
+
+
+class Aggregates:
+    """count / quantity / amount per key."""
+
+    def __init__(self):
+        self._data: Dict[Key, List[float]] = {}
+
+    def count(self, key: Key) -> int:
+        agg = self._data.get(key)
+        return int(agg[0]) if agg else 0
+
+    def quantity(self, key: Key) -> float:
+        agg = self._data.get(key)
+        return agg[1] if agg else 0.0
+
+    def amount(self, key: Key) -> float:
+        agg = self._data.get(key)
+        return agg[2] if agg else 0.0
+
+    def add(self, key: Key, sign: int, quantity: float, amount: float) -> None:
+        agg = self._data.setdefault(key, [0, 0.0, 0.0])
+        agg[0] += sign
+        agg[1] += sign * quantity
+        agg[2] += sign * amount
+        if agg[0] <= 0:
+            del self._data[key]
+
+
+# -----------------------------
+# Rule types
+# -----------------------------
+@dataclass(frozen=True)
+class Requires:
+    """If anything is measured under `when`, something must be measured under `requires`."""
+
+    when: Key
+    requires: Key
+    message: str
+
+    @property
+    def keys(self) -> Tuple[Key, ...]:
+        return (self.when, self.requires)
+
+    def check(self, aggs: Aggregates) -> Optional[str]:
+        if aggs.count(self.when) and not aggs.count(self.requires):
+            return self.message
+        return None
+
+
+@dataclass(frozen=True)
+class RatioBounds:
+    """quantity(numerator) / quantity(denominator) must lie within [low, high] when both are measured."""
+
+    label: str
+    numerator: Key
+    denominator: Key
+    low: Optional[float] = None
+    high: Optional[float] = None
+
+    @property
+    def keys(self) -> Tuple[Key, ...]:
+        return (self.numerator, self.denominator)
+
+    def check(self, aggs: Aggregates) -> Optional[str]:
+        base = aggs.quantity(self.denominator)
+        if base <= 0 or not aggs.count(self.numerator):
+            return None
+        ratio = aggs.quantity(self.numerator) / base
+        if self.low is not None and ratio < self.low:
+            return f"{self.label} is {ratio:,.2f}, below the usual minimum of {self.low:g}. Check the quantities."
+        if self.high is not None and ratio > self.high:
+            return f"{self.label} is {ratio:,.2f}, above the usual maximum of {self.high:g}. Check the quantities."
+        return None
+
+
+# -----------------------------
+# Rules from the app's tables
+# -----------------------------
+def phase_rules(table: Mapping[str, Mapping]) -> List[Requires]:
+    """{phase: {"requires_phases": [...], "message": ...}}"""
+    return [
+        Requires(("phase", phase), ("phase", required), spec["message"])
+        for phase, spec in table.items()
+        for required in spec.get("requires_phases", [])
+    ]
+
+
+def dependency_rules(table: Mapping[str, Mapping]) -> List[Requires]:
+    """{item name: {"requires_categories": [...]}} (FINISHING_DEPENDENCIES)"""
+    return [
+        Requires(
+            ("item", name),
+            ("category", category),
+            f"'{name}' added without any base item in category '{category}'. {DEPENDENCY_HINT}",
+        )
+        for name, spec in table.items()
+        for category in spec.get("requires_categories", [])
+    ]
+
+
+def ratio_rules(table: Mapping[str, Mapping]) -> List[RatioBounds]:
+    """{label: {"numerator": category, "denominator": category, "min": ..., "max": ...}}"""
+    return [
+        RatioBounds(
+            label,
+            ("category", spec["numerator"]),
+            ("category", spec["denominator"]),
+            spec.get("min"),
+            spec.get("max"),
+        )
+        for label, spec in table.items()
+    ]
+
+
+# -----------------------------
+# Engine
+# -----------------------------
+class RuleEngine:
+    """Aggregates of the measured items plus the rules watching them."""
+
+    def __init__(self, rules: Iterable):
+        self.rules = list(rules)
+        self._watch: Dict[Key, List[int]] = {}
+        for i, rule in enumerate(self.rules):
+            for key in rule.keys:
+                self._watch.setdefault(key, []).append(i)
+        self.aggregates = Aggregates()
+        self._rows: Dict[int, tuple] = {}                # item ID → (keys, quantity, amount) counted
+        self._dirty_keys: Set[Key] = set()
+        self._pending: Set[int] = set(range(len(self.rules)))
+        self._failing: Dict[int, str] = {}
+        self.checked = 0                                  # rule checks run so far
+
+    def __len__(self) -> int:
+        return len(self.rules)
+
+    # -----------------------------
+    # Keeping the aggregates in step
+    # -----------------------------
+    def add(self, items: Iterable[Mapping]) -> None:
+        for it in items:
+            self._count(it)
+
+    def update(self, items: Iterable[Mapping]) -> None:
+        """Re-count edited items (their previous contribution is taken back first)."""
+        for it in items:
+            self._uncount(it["id"])
+            self._count(it)
+
+    def remove(self, item_ids: Iterable[int]) -> None:
+        for item_id in item_ids:
+            self._uncount(item_id)
+
+    def _count(self, item: Mapping) -> None:
+        keys = item_keys(item)
+        quantity, amount = float(item.get("quantity", 0) or 0), float(item.get("amount", 0) or 0)
+        self._rows[item["id"]] = (keys, quantity, amount)
+        for key in keys:
+            self.aggregates.add(key, 1, quantity, amount)
+        self._dirty_keys.update(keys)
+
+    def _uncount(self, item_id: int) -> None:
+        row = self._rows.pop(item_id, None)
+        if row is None:
+            return
+        keys, quantity, amount = row
+        for key in keys:
+            self.aggregates.add(key, -1, quantity, amount)
+        self._dirty_keys.update(keys)
+
+    # -----------------------------
+    # Checking
+    # -----------------------------
+    def evaluate(self) -> List[str]:
+        """Findings of all rules, in rule order; only rules over changed keys are re-checked."""
+        pending = self._pending
+        for key in self._dirty_keys:
+            pending.update(self._watch.get(key, ()))
+        self._dirty_keys.clear()
+        for i in pending:
+            message = self.rules[i].check(self.aggregates)
+            if message is None:
+                self._failing.pop(i, None)
+            else:
+                self._failing[i] = message
+        self.checked += len(pending)
+        pending.clear()
+        return [self._failing[i] for i in sorted(self._failing)]
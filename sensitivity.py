@@ -0,0 +1,211 @@
+# sensitivity.py
+
+"""
+What-if sensitivity sweeps over basic resource rates.
+
+For analysed DSR codes an item's rate moves with its bare resource cost
+(coefficients × basic rates), so an estimate line's amount at perturbed
+basic rates is
+
+    amount × (bare cost at new rates) / (bare cost at base rates)
+
+and lines without a rate analysis stay fixed. Because that is linear in
+the basic rates, a whole grid of perturbations (e.g. steel ±20 % in 1 %
+steps × cement ±15 %) for a whole portfolio of estimates is a pair of
+matrix products:
+
+    ratio  (codes × grid)     = C · Pᵀ / b₀
+    totals (estimates × grid) = fixed + A · ratio
+
+where C is the codes × resources coefficient matrix, P the grid of basic
+rate vectors and A the estimates × codes amount matrix.
+"""
+
+from __future__ import annotations
+
+from dataclasses import dataclass, field
+from typing import List, Mapping, Tuple
+
+import numpy as np
+import pandas as pd
+
+from rate_analyzer import RateAnalyzer
+
+# (low, high, step) as fractions, e.g. (-0.20, 0.20, 0.01)
+Axis = Tuple[float, float, float]
+
+
+@dataclass
+class SweepResult:
+    """Output of SensitivityEngine.sweep()."""
+
+    estimates: List[str]
+    axis_names: List[str]
+    axis_values: List[np.ndarray]       # fractional change per axis
+    totals: np.ndarray                  # estimates × grid points
+    base_totals: np.ndarray             # estimates
+    item_rates: np.ndarray              # analysed codes × grid points (₹/unit incl. markups)
+    codes: List[str]
+    elasticity: pd.DataFrame = field(default_factory=pd.DataFrame)
+
+    @property
+    def grid_shape(self) -> Tuple[int, ...]:
+        return tuple(len(v) for v in self.axis_values)
+
+    def grid_frame(self) -> pd.DataFrame:
+        """One row per grid point with the percentage change on each axis."""
+        mesh = np.meshgrid(*self.axis_values, indexing="ij")
+        return pd.DataFrame({f"{n}_pct": (m.ravel() * 100.0).round(6) for n, m in zip(self.axis_names, mesh)})
+
+    def to_frame(self) -> pd.DataFrame:
+        """Long table: estimate, <axis>_pct..., total, change, change_pct."""
+        grid = self.grid_frame()
+        parts = []
+        for i, name in enumerate(self.estimates):
+            df = grid.copy()
+            df.insert(0, "estimate", name)
+            df["total"] = self.totals[i]
+            df["change"] = self.totals[i] - self.base_totals[i]
+            base = self.base_totals[i]
+            df["change_pct"] = (df["change"] / base * 100.0) if base else 0.0
+            parts.append(df)
+        return pd.concat(parts, ignore_index=True) if parts else grid
+
+    def surface(self, estimate: str, value: str = "change_pct") -> pd.DataFrame:
+        """
+        2-axis sweeps only: first axis as rows, second as columns.
+        """
+        if len(self.axis_names) != 2:
+            raise ValueError("surface() needs exactly two sweep axes")
+        df = self.to_frame()
+        df = df[df["estimate"] == estimate]
+        a, b = (f"{n}_pct" for n in self.axis_names)
+        return df.pivot(index=a, columns=b, values=value)
+
+    def item_rate_frame(self) -> pd.DataFrame:
+        """Analysed item rate per code (rows) at every grid point (columns)."""
+        cols = pd.MultiIndex.from_frame(self.grid_frame())
+        return pd.DataFrame(self.item_rates, index=pd.Index(self.codes, name="code"), columns=cols)
+
+
+class SensitivityEngine:
+    """
+    Broadcasted basic-rate sweeps on top of a RateAnalyzer.
+
+    Estimates are given as QTO item lists (dicts with dsr_code and amount)
+    or DataFrames with the same columns.
+    """
+
+    def __init__(self, analyzer: RateAnalyzer | None = None):
+        self.analyzer = analyzer or RateAnalyzer()
+
+    # -----------------------------
+    # Inputs
+    # -----------------------------
+    @staticmethod
+    def axis_values(axis: Axis) -> np.ndarray:
+        lo, hi, step = axis
+        if step <= 0:
+            raise ValueError("Sweep step must be positive")
+        n = int(round((hi - lo) / step)) + 1
+        return np.round(lo + step * np.arange(n), 10)
+
+    def _amount_matrix(self, estimates: Mapping[str, object]) -> Tuple[List[str], np.ndarray, np.ndarray]:
+        """(names, estimates × codes analysed amounts, fixed unanalysed amount per estimate)."""
+        an = self.analyzer
+        names = list(estimates)
+        n_codes = len(an.codes)
+        amounts = np.zeros((len(names), n_codes))
+        fixed = np.zeros(len(names))
+        for i, name in enumerate(names):
+            items = estimates[name]
+            if isinstance(items, pd.DataFrame):
+                df = items
+            else:
+                items = list(items)
+                df = pd.DataFrame(
+                    {"dsr_code": [it["dsr_code"] for it in items], "amount": [it["amount"] for it in items]}
+                )
+            rows = an.code_rows(df["dsr_code"])
+            amt = pd.to_numeric(df["amount"], errors="coerce").fillna(0.0).to_numpy(dtype=np.float64)
+            ok = rows >= 0
+            amounts[i] = np.bincount(rows[ok], weights=amt[ok], minlength=n_codes)
+            fixed[i] = amt[~ok].sum()
+        return names, amounts, fixed
+
+    def rate_grid(self, axes: Mapping[str, Axis]) -> Tuple[List[str], List[np.ndarray], np.ndarray]:
+        """(axis names, axis values, grid points × resources basic-rate matrix)."""
+        an = self.analyzer
+        names = list(axes)
+        for n in names:
+            if n not in an.resources:
+                raise KeyError(f"Unknown resource '{n}' in sweep axes")
+        values = [self.axis_values(axes[n]) for n in names]
+        mesh = np.meshgrid(*values, indexing="ij")
+
+        factors = np.ones((mesh[0].size if mesh else 1, len(an.resource_keys)))
+        for n, m in zip(names, mesh):
+            factors[:, an.resource_index.get_loc(n)] = 1.0 + m.ravel()
+        return names, values, factors * an.rates
+
+    # -----------------------------
+    # Sweep
+    # -----------------------------
+    def sweep(self, estimates: Mapping[str, object], axes: Mapping[str, Axis]) -> SweepResult:
+        """
+        Re-derive item rates and estimate totals at every grid point.
+
+        Parameters
+        ----------
+        estimates : mapping name → items
+        axes : mapping resource key → (low, high, step) fractional change,
+               e.g. {"steel": (-0.2, 0.2, 0.01), "cement": (-0.15, 0.15, 0.01)}
+        """
+        an = self.analyzer
+        names, amounts, fixed = self._amount_matrix(estimates)
+        axis_names, axis_values, P = self.rate_grid(axes)
+
+        # codes × resources (dense – the code table is small)
+        C = np.zeros((len(an.codes), len(an.resource_keys)))
+        C[an.row_of_nnz, an.indices] = an.data
+
+        bare = C @ P.T                                  # codes × grid
+        bare0 = C @ an.rates                            # codes
+        safe0 = np.where(bare0 > 0, bare0, 1.0)
+        ratio = np.where(bare0[:, None] > 0, bare / safe0[:, None], 1.0)
+
+        totals = fixed[:, None] + amounts @ ratio       # estimates × grid
+        base_totals = fixed + amounts.sum(axis=1)
+
+        # Point elasticity dlnT/dln(p_r) at base rates, for every resource
+        share = C * an.rates / safe0[:, None]           # codes × resources cost shares
+        with np.errstate(invalid="ignore", divide="ignore"):
+            elast = np.where(base_totals[:, None] > 0, (amounts @ share) / base_totals[:, None], 0.0)
+        used = elast.any(axis=0)
+        elasticity = pd.DataFrame(
+            elast[:, used], index=pd.Index(names, name="estimate"),
+            columns=[k for k, u in zip(an.resource_keys, used) if u],
+        )
+
+        return SweepResult(
+            estimates=names,
+            axis_names=axis_names,
+            axis_values=axis_values,
+            totals=totals,
+            base_totals=base_totals,
+            item_rates=bare * an.markup,
+            codes=list(an.codes),
+            elasticity=elasticity,
+        )
+
+    def elasticity_table(self, estimates: Mapping[str, object]) -> pd.DataFrame:
+        """
+        Long elasticity table: estimate, resource, elasticity, impact of +1 %.
+        """
+        result = self.sweep(estimates, {})
+        base = pd.Series(result.base_totals, index=result.elasticity.index)
+        df = result.elasticity.stack().rename("elasticity").reset_index()
+        df.columns = ["estimate", "resource", "elasticity"]
+        df["name"] = df["resource"].map({k: r.name for k, r in self.analyzer.resources.items()})
+        df["impact_per_1pct"] = df["elasticity"] * df["estimate"].map(base) / 100.0
+        return df.sort_values(["estimate", "elasticity"], ascending=[True, False], ignore_index=True)
@@ -0,0 +1,223 @@
+# soq_view.py
+
+"""
+Columnar, incrementally appended SOQ table with server-side filtering
+and pagination.
+
+The SOQ table in Tab 1 used to be rebuilt as a DataFrame from the whole
+qto_items list and sent to the browser in full on every rerun. SOQView
+keeps the displayed columns as growable numpy arrays instead:
+
+* numeric columns (id, quantity, rate, amount) as float / int arrays;
+* text columns (dsr_code, phase, item, category, unit) dictionary-encoded
+  as int32 codes plus a value list, so a filter is evaluated once per
+  distinct value and then applied as an integer mask.
+
+sync() appends only the items added since the last sync (amortised
+O(new items) thanks to capacity doubling) and falls back to a rebuild if
+the list shrank; update() rewrites edited rows in place. page()
+materialises a DataFrame for the visible window only, so the browser
+receives page_size rows however large the estimate.
+"""
+
+from __future__ import annotations
+
+from dataclasses import dataclass
+from typing import Dict, Iterable, List, Mapping, Optional, Sequence
+
+import numpy as np
+import pandas as pd
+
+NUMBER_COLUMNS = {"id": np.int64, "quantity": np.float64, "rate": np.float64, "amount": np.float64}
+TEXT_COLUMNS = ("dsr_code", "phase", "item", "category", "unit")
+DISPLAY_COLUMNS = ("id", "dsr_code", "phase", "item", "quantity", "unit", "rate", "amount")
+PAGE_SIZES = (25, 50, 100, 250)
+MIN_CAPACITY = 1024
+
+
+@dataclass(frozen=True)
+class SOQFilter:
+    """Server-side filter; empty fields match everything."""
+
+    phases: tuple = ()
+    categories: tuple = ()
+    code_prefix: str = ""
+    text: str = ""
+
+    @property
+    def active(self) -> bool:
+        return bool(self.phases or self.categories or self.code_prefix.strip() or self.text.strip())
+
+
+@dataclass
+class SOQPage:
+    """One window of the filtered table."""
+
+    frame: pd.DataFrame
+    page: int
+    pages: int
+    rows: int             # rows matching the filter
+    total_rows: int       # rows in the estimate
+    amount: float         # amount of the matching rows
+    first: int            # 1-based position of the first row shown (0 if none)
+
+    @property
+    def last(self) -> int:
+        return self.first + len(self.frame) - 1 if len(self.frame) else 0
+
+
+class SOQView:
+    """Columnar copy of the displayed SOQ columns, kept in step with qto_items."""
+
+    def __init__(self):
+        self.revision: Optional[int] = None
+        self._n = 0
+        self._numbers: Dict[str, np.ndarray] = {c: np.empty(0, dtype=t) for c, t in NUMBER_COLUMNS.items()}
+        self._codes: Dict[str, np.ndarray] = {c: np.empty(0, dtype=np.int32) for c in TEXT_COLUMNS}
+        self._values: Dict[str, List[str]] = {c: [] for c in TEXT_COLUMNS}
+        self._lookup: Dict[str, Dict[str, int]] = {c: {} for c in TEXT_COLUMNS}
+
+    def __len__(self) -> int:
+        return self._n
+
+    # -----------------------------
+    # Keeping in step with the estimate
+    # -----------------------------
+    def sync(self, items: Sequence[Mapping], revision: int) -> "SOQView":
+        """Append items added since the last sync (rebuild if the list shrank)."""
+        if revision == self.revision:
+            return self
+        if len(items) < self._n:
+            self.clear()
+        self.append(items[self._n:])
+        self.revision = revision
+        return self
+
+    def rebuild(self, items: Iterable[Mapping], revision: int) -> "SOQView":
+        """Re-read every item (after edits or deletions)."""
+        self.clear()
+        self.append(list(items))
+        self.revision = revision
+        return self
+
+    def clear(self) -> None:
+        self.__init__()
+
+    def append(self, items: Sequence[Mapping]) -> None:
+        k = len(items)
+        if not k:
+            return
+        self._reserve(self._n + k)
+        self._write(slice(self._n, self._n + k), items)
+        self._n += k
+
+    def update(self, positions: Sequence[int], items: Sequence[Mapping], revision: int) -> "SOQView":
+        """Rewrite the rows at positions (edited items, same order) in place."""
+        if len(positions):
+            self._write(np.asarray(positions, dtype=np.int64), items)
+        self.revision = revision
+        return self
+
+    def _write(self, rows, items: Sequence[Mapping]) -> None:
+        k = len(items)
+        for col, dtype in NUMBER_COLUMNS.items():
+            self._numbers[col][rows] = np.fromiter(
+                (it.get(col, 0) or 0 for it in items), dtype=dtype, count=k
+            )
+        for col in TEXT_COLUMNS:
+            lookup, values = self._lookup[col], self._values[col]
+            codes = np.empty(k, dtype=np.int32)
+            for i, it in enumerate(items):
+                value = str(it.get(col, "") or "")
+                code = lookup.get(value)
+                if code is None:
+                    code = lookup[value] = len(values)
+                    values.append(value)
+                codes[i] = code
+            self._codes[col][rows] = codes
+
+    def _reserve(self, size: int) -> None:
+        capacity = len(self._codes[TEXT_COLUMNS[0]])
+        if size <= capacity:
+            return
+        capacity = max(MIN_CAPACITY, capacity)
+        while capacity < size:
+            capacity *= 2
+        for store in (self._numbers, self._codes):
+            for col, arr in store.items():
+                grown = np.zeros(capacity, dtype=arr.dtype)
+                grown[: self._n] = arr[: self._n]
+                store[col] = grown
+
+    # -----------------------------
+    # Filtering and pagination
+    # -----------------------------
+    def options(self, column: str) -> List[str]:
+        """Distinct values present in a text column (sorted)."""
+        present = np.unique(self._codes[column][: self._n])
+        values = self._values[column]
+        return sorted(values[c] for c in present)
+
+    def _matching(self, column: str, keep) -> np.ndarray:
+        """Row mask for the rows whose value in column satisfies keep(value)."""
+        ok = np.fromiter((bool(keep(v)) for v in self._values[column]), dtype=bool, count=len(self._values[column]))
+        return ok[self._codes[column][: self._n]]
+
+    def mask(self, flt: SOQFilter) -> np.ndarray:
+        mask = np.ones(self._n, dtype=bool)
+        if flt.phases:
+            phases = set(flt.phases)
+            mask &= self._matching("phase", phases.__contains__)
+        if flt.categories:
+            categories = set(flt.categories)
+            mask &= self._matching("category", categories.__contains__)
+        prefix = flt.code_prefix.strip()
+        if prefix:
+            mask &= self._matching("dsr_code", lambda code: code.startswith(prefix))
+        text = flt.text.strip().lower()
+        if text:
+            mask &= self._matching("item", lambda name: text in name.lower())
+        return mask
+
+    def ids(self, flt: SOQFilter = SOQFilter()) -> List[int]:
+        """Item IDs of the rows matching the filter, in table order."""
+        ids = self._numbers["id"][: self._n]
+        return (ids[self.mask(flt)] if flt.active else ids).tolist()
+
+    def page(self, flt: SOQFilter = SOQFilter(), page: int = 1, page_size: int = PAGE_SIZES[1]) -> SOQPage:
+        """Rows page (1-based) of the filtered table, rounded for display."""
+        if flt.active:
+            mask = self.mask(flt)
+            rows_idx = np.flatnonzero(mask)
+            amount = float(self._numbers["amount"][: self._n][mask].sum())
+        else:
+            rows_idx = None
+            amount = float(self._numbers["amount"][: self._n].sum())
+        rows = self._n if rows_idx is None else len(rows_idx)
+        pages = max(1, -(-rows // page_size))
+        page = min(max(1, int(page)), pages)
+        start = (page - 1) * page_size
+        stop = min(start + page_size, rows)
+        window = np.arange(start, stop) if rows_idx is None else rows_idx[start:stop]
+        return SOQPage(
+            frame=self.frame(window),
+            page=page,
+            pages=pages,
+            rows=rows,
+            total_rows=self._n,
+            amount=amount,
+            first=start + 1 if stop > start else 0,
+        )
+
+    def frame(self, positions: Optional[np.ndarray] = None) -> pd.DataFrame:
+        """Display columns for the given row positions (all rows if None), rounded to 2 places."""
+        if positions is None:
+            positions = np.arange(self._n)
+        data = {}
+        for col in DISPLAY_COLUMNS:
+            if col in NUMBER_COLUMNS:
+                values = self._numbers[col][positions]
+                data[col] = values if col == "id" else values.round(2)
+            else:
+                data[col] = np.asarray(self._values[col], dtype=object)[self._codes[col][positions]]
+        return pd.DataFrame(data, columns=list(DISPLAY_COLUMNS))
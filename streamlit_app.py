@@ -5,6 +5,33 @@ import pandas as pd
 import numpy as np
 from datetime import datetime, timedelta
 
+from rate_analyzer import RateAnalyzer
+from resource_takeoff import ResourceAggregator
+from sensitivity import SensitivityEngine
+from takeoff_import import TakeoffImporter, TakeoffImportError
+from anomaly_detection import EstimateProfile, estimate_metrics, row_outliers
+from composite_items import CompositeModel
+from cpwd_forms import FormCache, FormContext
+from export_bundle import EXPORT_FORMATS, build_export_bundle, parquet_available
+from floor_templates import FloorReplicator
+import instrumentation
+import profiling
+from instrumentation import section, timed
+from geometry_model import DEFAULT_ITEM_MAP, BuildingModel, GeometryError, parse_vertices
+from item_store import ItemStore, ItemStoreError, parse_id_ranges
+from measurement_book import MeasurementBook, MeasurementError
+from openings import (
+    OPENING_TYPES,
+    OpeningScheduleError,
+    building_totals,
+    empty_openings,
+    opening_deductions,
+)
+from revisions import RevisionHistory
+from rule_engine import RuleEngine, dependency_rules, phase_rules, ratio_rules
+from soq_view import PAGE_SIZES, SOQFilter, SOQView
+from wbs_tree import DEFAULT_BUILDING, DEFAULT_FLOOR, WBSTree, item_path
+
 # =============================================================================
 # 🔥 CPWD DSR 2023 + MULTI-LOCATION INDICES
 # =============================================================================
@@ -173,6 +200,12 @@ PHASE_GROUPS = {
     ],
 }
 
+# Item → phase (the last phase listing an item wins, e.g. brickwork → superstructure)
+ITEM_PHASE = {name: ph for ph, names in PHASE_GROUPS.items() for name in names}
+
+# phases_structure WBS code → phase, for imported items not listed above
+WBS_PHASE = {"SS": "1️⃣ SUBSTRUCTURE", "PL": "2️⃣ PLINTH", "SU": "3️⃣ SUPERSTRUCTURE", "FN": "4️⃣ FINISHING"}
+
 # =============================================================================
 # 🧱 COMPOSITE DEFINITIONS – AUTO RCC EXPANSION
 # =============================================================================
@@ -195,6 +228,14 @@ RCC_COMPONENT_DEFAULTS = {
     },
 }
 
+# Phase sequencing
+PHASE_DEPENDENCIES = {
+    "4️⃣ FINISHING": {
+        "requires_phases": ["3️⃣ SUPERSTRUCTURE"],
+        "message": "Finishing items found but no superstructure items. Check sequencing.",
+    },
+}
+
 # Finishing dependencies (simplified)
 FINISHING_DEPENDENCIES = {
     "Plaster 12mm 1:6 (11.1.1)": {
@@ -208,6 +249,29 @@ FINISHING_DEPENDENCIES = {
     },
 }
 
+# Quantity ratios between categories (whole estimate; checked once both are measured)
+QUANTITY_RATIO_CHECKS = {
+    "Reinforcement per cum of RCC (kg/cum)": {
+        "numerator": "reinforcement", "denominator": "rcc_concrete", "min": 60.0, "max": 250.0,
+    },
+    "Formwork per cum of RCC (sqm/cum)": {
+        "numerator": "formwork", "denominator": "rcc_concrete", "max": 15.0,
+    },
+    "Plaster per cum of brickwork (sqm/cum)": {
+        "numerator": "plaster", "denominator": "brickwork", "max": 20.0,
+    },
+    "Putty per sqm of plaster": {
+        "numerator": "putty", "denominator": "plaster", "max": 1.05,
+    },
+}
+
+# Sequencing and audit rules (rule_engine), compiled once
+AUDIT_RULES = [
+    *phase_rules(PHASE_DEPENDENCIES),
+    *dependency_rules(FINISHING_DEPENDENCIES),
+    *ratio_rules(QUANTITY_RATIO_CHECKS),
+]
+
 PHASE_ORDER = {
     "1️⃣ SUBSTRUCTURE": 1,
     "2️⃣ PLINTH": 2,
@@ -303,34 +367,90 @@ def monte_carlo(base_cost: float, n: int = 1000):
     }
 
 
-def analyse_dependencies(qto_items):
-    messages = []
+@st.cache_resource
+def get_rate_analyzer() -> RateAnalyzer:
+    return RateAnalyzer()
 
-    if not qto_items:
-        return messages
 
-    phases_present = {item["phase"] for item in qto_items}
-    if "4️⃣ FINISHING" in phases_present and "3️⃣ SUPERSTRUCTURE" not in phases_present:
-        messages.append(
-            "Finishing items found but no superstructure items. Check sequencing."
-        )
+def sync_wbs_tree():
+    """Register items appended since the last sync; returns them."""
+    tree = st.session_state.wbs_tree
+    new_items = st.session_state.qto_items[st.session_state.wbs_synced:]
+    for item in new_items:
+        tree.add_item(item["id"], item_path(item), float(item["amount"]))
+    st.session_state.wbs_synced += len(new_items)
+    return new_items
 
-    cats_present = {item.get("category", "") for item in qto_items}
-
-    for item in qto_items:
-        name = item["item"]
-        deps = FINISHING_DEPENDENCIES.get(name)
-        if not deps:
-            continue
-        req_cats = deps.get("requires_categories", [])
-        for rc in req_cats:
-            if rc not in cats_present:
-                messages.append(
-                    f"'{name}' added without any base item in category '{rc}'. "
-                    "Example: no painting without plaster, no plaster without masonry."
-                )
 
-    return messages
+def bump_revision(label="Items added", added=()):
+    """Sync derived state after a change and record it in the revision history."""
+    new_items = sync_wbs_tree()
+    st.session_state.rule_engine.add(new_items)
+    st.session_state.revision_history.commit_changes(added=[*new_items, *added], label=label)
+    st.session_state.qto_revision += 1
+
+
+def apply_item_changes(change):
+    """Apply a bulk edit / delete (item_store.BulkChange) to the WBS tree, replicas, history and SOQ view."""
+    if not len(change):
+        return
+    store = st.session_state.qto_items
+    tree = st.session_state.wbs_tree
+    replicator = st.session_state.floor_replicator
+    composites = st.session_state.composites
+    composites.forget(change.removed_ids)
+    if change.cascade:
+        composites.touch(change.updated_ids)
+    if composites.dirty:
+        # linked steel / formwork rows re-derived from their (changed) parents
+        seen = set(change.updated_ids)
+        change.updated.extend(it for it in composites.recompute(store).updated if it["id"] not in seen)
+    for it in change.updated:
+        tree.update_item(it["id"], float(it["amount"]), item_path(it))
+    for item_id in change.removed_ids:
+        tree.remove_item(item_id)
+    st.session_state.rule_engine.update(change.updated)
+    st.session_state.rule_engine.remove(change.removed_ids)
+    st.session_state.wbs_synced = len(store)
+    removed_views = replicator.replica_ids(change.removed_ids)
+    replicator.forget_items(change.removed_ids)
+
+    view = st.session_state.soq_view
+    in_step = view.revision == st.session_state.qto_revision
+    st.session_state.qto_revision += 1
+    revision = st.session_state.qto_revision
+    if replicator.replicas:
+        replicator.refresh_tree(tree, get_item, revision)
+    st.session_state.revision_history.commit_changes(
+        updated=[*change.updated, *replicator.views_of(change.updated_ids, get_item)],
+        removed=[*change.removed_ids, *removed_views],
+        label=change.label,
+    )
+    if change.removed or not in_step:
+        view.clear()  # positions shifted: rebuilt on the next sync
+    else:
+        view.update([store.position(i) for i in change.updated_ids], change.updated, revision)
+
+
+def estimate_anomalies():
+    """Implausible rows (item_id, field, value vs. peers); checked once per saved revision."""
+    return revision_cached("row_anomalies", lambda: row_outliers(st.session_state.qto_items))
+
+
+def get_item(item_id):
+    """Measured item by its stable ID."""
+    return st.session_state.qto_items.get(item_id)
+
+
+def estimate_items():
+    """Measured items followed by replicated-floor views (expanded lazily)."""
+    yield from st.session_state.qto_items
+    yield from st.session_state.floor_replicator.iter_items(get_item)
+
+
+def analyse_dependencies():
+    """Sequencing and audit findings; only rules over categories / phases that changed are re-checked."""
+    return st.session_state.rule_engine.evaluate()
 
 
 # =============================================================================
@@ -340,8 +460,18 @@ st.set_page_config(
     page_title="CPWD DSR 2023 Pro", page_icon="🏗️", layout="wide"
 )
 
+# Measured items with stable IDs (a plain list, e.g. a loaded estimate, is wrapped)
 if "qto_items" not in st.session_state:
-    st.session_state.qto_items = []
+    st.session_state.qto_items = ItemStore()
+elif not isinstance(st.session_state.qto_items, ItemStore):
+    st.session_state.qto_items = ItemStore(st.session_state.qto_items)
+
+# Bumped on every change to qto_items; derived results are cached against it
+if "qto_revision" not in st.session_state:
+    st.session_state.qto_revision = 0
+
+if "resource_aggregator" not in st.session_state:
+    st.session_state.resource_aggregator = ResourceAggregator(get_rate_analyzer())
 
 if "project_info" not in st.session_state:
     st.session_state.project_info = {
@@ -350,6 +480,65 @@ if "project_info" not in st.session_state:
         "engineer": "Er. Ravi Sharma",
     }
 
+# Built CPWD/PWD form tables, cached per revision
+if "form_cache" not in st.session_state:
+    st.session_state.form_cache = FormCache()
+
+# Dated measurements and running-bill totals (Forms 8 and 31)
+if "measurement_book" not in st.session_state:
+    st.session_state.measurement_book = MeasurementBook()
+
+# Formula links from RCC concrete rows to their steel / formwork rows
+if "composites" not in st.session_state:
+    st.session_state.composites = CompositeModel(RCC_COMPONENT_DEFAULTS, IS1200Engine)
+
+# Columnar SOQ table (appended incrementally, paged for display)
+if "soq_view" not in st.session_state:
+    st.session_state.soq_view = SOQView()
+
+# Typical-floor templates and their replicas (references, not copies)
+if "floor_replicator" not in st.session_state:
+    st.session_state.floor_replicator = FloorReplicator()
+
+# WBS tree (project → building → floor → phase → element) with cached subtotals
+if "wbs_tree" not in st.session_state:
+    st.session_state.wbs_tree = WBSTree.from_items(
+        st.session_state.qto_items, st.session_state.project_info["name"]
+    )
+    st.session_state.wbs_synced = len(st.session_state.qto_items)
+
+# Estimate revisions as deltas (one per change)
+if "revision_history" not in st.session_state:
+    st.session_state.revision_history = RevisionHistory()
+    if st.session_state.qto_items:
+        st.session_state.revision_history.commit(st.session_state.qto_items, "Loaded")
+
+# Sequencing / audit rules over per-category aggregates (kept in step with the items)
+if "rule_engine" not in st.session_state:
+    st.session_state.rule_engine = RuleEngine(AUDIT_RULES)
+    st.session_state.rule_engine.add(st.session_state.qto_items)
+
+# Linked RCC rows left dirty by a coefficient change are re-derived here, once
+if st.session_state.composites.dirty:
+    apply_item_changes(st.session_state.composites.recompute(st.session_state.qto_items))
+
+# Metrics of earlier estimates recorded as references (anomaly_detection.HISTORY_FILE)
+if "estimate_profile" not in st.session_state:
+    st.session_state.estimate_profile = EstimateProfile.load()
+
+def start_rerun_profile():
+    """Per-rerun cost breakdown (opt-in: ESTIMATOR_PROFILE=1 or ?profile=1); None when off."""
+    if not (profiling.enabled_from_env() or st.query_params.get("profile") == "1"):
+        return None
+    st.session_state.profile_reruns = st.session_state.get("profile_reruns", 0) + 1
+    return profiling.RerunProfiler(st.session_state.profile_reruns).start()
+
+
+def finish_rerun_profile():
+    if rerun_profiler is not None:
+        st.session_state.last_rerun_profile = rerun_profiler.finish(len(st.session_state.qto_items))
+
+
 # =============================================================================
 # PROFESSIONAL UI
 # =============================================================================
@@ -363,54 +552,30 @@ st.markdown(
     unsafe_allow_html=True,
 )
 
-with st.sidebar:
-    st.header("🏛️ PROJECT")
-    for key in st.session_state.project_info:
-        st.session_state.project_info[key] = st.text_input(
-            key.replace("_", " ").title(),
-            value=st.session_state.project_info[key],
-        )
-
-    st.header("📍 LOCATION")
-    location = st.selectbox("Select City", list(LOCATION_INDICES.keys()))
-    cost_index = LOCATION_INDICES[location]
-    st.info(f"**{location}: {cost_index}%**")
-
-    st.header("⚙️ RATES")
-    contingency = st.slider("Contingency", 0.0, 10.0, 5.0)
-    escalation = st.slider("Escalation p.a.", 3.0, 8.0, 5.5)
-
-# Dashboard
-total_cost = sum(item.get("amount", 0.0) for item in st.session_state.qto_items)
-mc = monte_carlo(total_cost) if total_cost else {}
-cols = st.columns(5)
-cols[0].metric("💰 Base Cost", format_rupees(total_cost))
-cols[1].metric("📋 Items", len(st.session_state.qto_items))
-cols[2].metric("🎯 Index", f"{cost_index}%")
-cols[3].metric("📊 Sanction", format_rupees(total_cost * 1.075))
-cols[4].metric("🎯 P90", format_rupees(mc.get("p90", 0.0)))
-
-tab1, tab2, tab3, tab4 = st.tabs(["📏 SOQ", "📊 Abstract", "🎯 Risk", "📄 Formats"])
-
 # =============================================================================
 # HELPER: ADD RCC WITH COMPONENTS
 # =============================================================================
+@timed("app.add_rcc_with_components")
 def add_rcc_with_components(
-    base_item_name, base_item, phase, L, B, D, qto, cost_index
+    base_item_name, base_item, phase, L, B, D, qto, cost_index,
+    building=DEFAULT_BUILDING, floor=DEFAULT_FLOOR, formwork_area=None,
 ):
     """
     Auto-add RCC concrete + reinforcement + formwork for audit-safe estimate.
+    formwork_area overrides the IS 1200 area from L/B/D (e.g. summed imported elements).
+    Steel and formwork are linked to the concrete row: their quantities are
+    formulas over it (composite_items.CompositeModel).
     """
-    base_id_start = len(st.session_state.qto_items) + 1
     volume = float(qto["net"])
 
     # 1) Concrete
     rate_conc = base_item["rate"] * (cost_index / 100.0)
     amt_conc = volume * rate_conc
 
-    st.session_state.qto_items.append(
+    parent = st.session_state.qto_items.append(
         {
-            "id": base_id_start,
+            "building": building,
+            "floor": floor,
             "phase": phase,
             "item": base_item_name,
             "dsr_code": base_item["code"],
@@ -428,17 +593,21 @@ def add_rcc_with_components(
     comp_def = RCC_COMPONENT_DEFAULTS.get(base_item_name)
     if not comp_def:
         return
+    composites = st.session_state.composites
 
     # 2) Reinforcement
     steel_item_name = "Steel reinforcement for R.C.C. work (TMT Fe500)"
     steel_item = CPWD_BASE_DSR_2023[steel_item_name]
-    steel_kg = volume * comp_def["steel_kg_per_cum"]
+    steel_formula = composites.steel_formula()
+    steel_kg = composites.evaluate(steel_formula, parent)
     rate_steel = steel_item["rate"] * (cost_index / 100.0)
     amt_steel = steel_kg * rate_steel
 
-    st.session_state.qto_items.append(
+    steel = st.session_state.qto_items.append(
         {
-            "id": base_id_start + 1,
+            "parent_id": parent["id"],
+            "building": building,
+            "floor": floor,
             "phase": phase,
             "item": steel_item_name + f" (for {base_item_name})",
             "dsr_code": steel_item["code"],
@@ -452,27 +621,24 @@ def add_rcc_with_components(
             "category": steel_item.get("category", ""),
         }
     )
+    composites.link(parent, steel["id"], steel_formula)
 
     # 3) Formwork
     formwork_name = comp_def["formwork_type"]
     formwork_item = CPWD_BASE_DSR_2023[formwork_name]
 
-    if "Column" in base_item_name:
-        formwork_area = IS1200Engine.formwork_column_area(L, B, D)
-    elif "Beam" in base_item_name:
-        formwork_area = IS1200Engine.formwork_beam_area(B, D, L)
-    elif "Slab" in base_item_name:
-        formwork_area = IS1200Engine.formwork_slab_area(L, B)
-    else:
-        # Footings etc. – approx 4 vertical faces
-        formwork_area = IS1200Engine.formwork_column_area(L, B, D)
+    # IS 1200 area from L/B/D by member type (footings etc. – approx 4 vertical faces)
+    formwork_formula = composites.formwork_formula(base_item_name, L, B, D, formwork_area)
+    formwork_area = composites.evaluate(formwork_formula, parent)
 
     rate_fw = formwork_item["rate"] * (cost_index / 100.0)
     amt_fw = formwork_area * rate_fw
 
-    st.session_state.qto_items.append(
+    formwork = st.session_state.qto_items.append(
         {
-            "id": base_id_start + 2,
+            "parent_id": parent["id"],
+            "building": building,
+            "floor": floor,
             "phase": phase,
             "item": formwork_name + f" (for {base_item_name})",
             "dsr_code": formwork_item["code"],
@@ -486,24 +652,132 @@ def add_rcc_with_components(
             "category": formwork_item.get("category", ""),
         }
     )
+    composites.link(parent, formwork["id"], formwork_formula)
 
 
 # =============================================================================
-# TAB 1: SOQ – WITH IS 1200 & RCC AUTO-EXPANSION
+# RERUN SCOPING
 # =============================================================================
-with tab1:
-    st.header("📏 **CPWD FORM 7 - IS 1200 SOQ**")
+# Widgets inside @st.fragment panels rerun only their panel. A panel that
+# changes the estimate calls refresh_app(), which reruns the whole app so the
+# dashboard and the other tabs see the new revision. Tables derived from the
+# estimate are cached against qto_revision, so a full rerun with an unchanged
+# estimate only re-renders them.
+def revision_cached(key, build, *params):
+    """build() cached in session_state until qto_revision or params change."""
+    stamp = (st.session_state.qto_revision, *params)
+    hit = st.session_state.get(f"cached_{key}")
+    if hit is None or hit[0] != stamp:
+        hit = (stamp, build())
+        st.session_state[f"cached_{key}"] = hit
+    return hit[1]
+
+
+def refresh_app(message=None, balloons=False):
+    """Rerun the whole app (from inside a fragment); message is shown after the rerun."""
+    if message:
+        st.session_state.flash = (message, balloons)
+    st.rerun()
+
+
+def show_flash():
+    message, balloons = st.session_state.pop("flash", (None, False))
+    if message:
+        st.success(message)
+        if balloons:
+            st.balloons()
 
-    col1, col2 = st.columns([1, 3])
-    phase = col1.selectbox("Phase", list(PHASE_GROUPS.keys()))
-    selected_item = col2.selectbox("DSR Item", PHASE_GROUPS[phase])
 
-    if selected_item in CPWD_BASE_DSR_2023:
-        dsr_item = CPWD_BASE_DSR_2023[selected_item]
-        D = 0.0  # default depth
+# =============================================================================
+# TAB 1: SOQ – WITH IS 1200 & RCC AUTO-EXPANSION
+# =============================================================================
+@st.fragment
+@timed("soq.entry")
+def soq_entry_form(selected_item, phase, building, floor, cost_index):
+    """Dimensions, IS 1200 preview and ADD TO SOQ for one DSR item."""
+    dsr_item = CPWD_BASE_DSR_2023[selected_item]
+    D = 0.0  # default depth
+
+    if dsr_item["type"] == "volume":
+        c1, c2, c3, c4 = st.columns(4)
+        L = c1.number_input(
+            "Length (m)",
+            min_value=float(0.01),
+            max_value=float(100.0),
+            value=float(10.0),
+            step=float(0.1),
+        )
+        B = c2.number_input(
+            "Breadth (m)",
+            min_value=float(0.01),
+            max_value=float(100.0),
+            value=float(5.0),
+            step=float(0.1),
+        )
+        D = c3.number_input(
+            "Depth/Height (m)",
+            min_value=float(0.001),
+            max_value=float(5.0),
+            value=float(0.15),
+            step=float(0.01),
+        )
+        deductions = c4.number_input(
+            "Deductions (cum)",
+            min_value=float(0.0),
+            max_value=float(10.0),
+            value=float(0.0),
+            step=float(0.01),
+        )
+
+        qto = IS1200Engine.volume(L, B, D, deductions)
+        rate = dsr_item["rate"] * (cost_index / 100.0)
+        amount = qto["net"] * rate
 
-        if dsr_item["type"] == "volume":
-            c1, c2, c3, c4 = st.columns(4)
+    else:
+        # AREA ITEMS
+        c1, c2, c3 = st.columns(3)
+        if dsr_item.get("category") in ["plaster", "painting", "putty"]:
+            L = c1.number_input(
+                "Wall Length (m)",
+                min_value=float(0.01),
+                max_value=float(100.0),
+                value=float(10.0),
+                step=float(0.1),
+            )
+            H = c2.number_input(
+                "Wall Height (m)",
+                min_value=float(0.01),
+                max_value=float(10.0),
+                value=float(3.0),
+                step=float(0.1),
+            )
+            sides = c3.selectbox("Finished faces", [1, 2], index=1)
+
+            st.caption("Openings in this wall (IS 1200 size bands applied per opening)")
+            wall_openings = st.data_editor(
+                empty_openings().drop(columns="wall"),
+                num_rows="dynamic",
+                column_config={
+                    "type": st.column_config.SelectboxColumn("Type", options=list(OPENING_TYPES)),
+                    "w": st.column_config.NumberColumn("Width (m)", min_value=0.0, step=0.05),
+                    "h": st.column_config.NumberColumn("Height (m)", min_value=0.0, step=0.05),
+                    "count": st.column_config.NumberColumn("Nos", min_value=1, step=1, default=1),
+                },
+                key="wall_openings",
+                use_container_width=True,
+            )
+            per_wall, _ = opening_deductions(
+                pd.DataFrame({"wall": ["W"], "length": [L], "height": [H], "thickness": [0.0], "sides": [sides]}),
+                wall_openings.assign(wall="W"),
+            )
+            qto = {
+                "gross": float(per_wall["finish_gross"].iat[0]),
+                "net": float(per_wall["finish_net"].iat[0]),
+                "deductions": float(per_wall["finish_deduction"].iat[0]),
+            }
+            B = H  # store height in breadth for MB/formats
+        else:
+            # Flooring, tiles, formwork, etc.
             L = c1.number_input(
                 "Length (m)",
                 min_value=float(0.01),
@@ -518,230 +792,740 @@ with tab1:
                 value=float(5.0),
                 step=float(0.1),
             )
-            D = c3.number_input(
-                "Depth/Height (m)",
-                min_value=float(0.001),
-                max_value=float(5.0),
-                value=float(0.15),
-                step=float(0.01),
-            )
-            deductions = c4.number_input(
-                "Deductions (cum)",
+            openings_area = c3.number_input(
+                "Deductions (sqm)",
                 min_value=float(0.0),
-                max_value=float(10.0),
+                max_value=float(100.0),
                 value=float(0.0),
-                step=float(0.01),
+                step=float(0.1),
             )
+            gross = L * B
+            net = max(0.0, gross - openings_area)
+            qto = {
+                "gross": gross,
+                "net": net,
+                "deductions": openings_area,
+            }
 
-            qto = IS1200Engine.volume(L, B, D, deductions)
-            rate = dsr_item["rate"] * (cost_index / 100.0)
-            amount = qto["net"] * rate
+        rate = dsr_item["rate"] * (cost_index / 100.0)
+        amount = qto["net"] * rate
 
+    # RESULTS
+    c1, c2, c3, c4 = st.columns(4)
+    c1.metric(
+        "📐 Quantity", f"{qto['net']:.3f} {dsr_item['unit']}"
+    )
+    c2.metric("💰 Rate", f"₹{rate:,.0f}")
+    c3.metric("💵 Amount", format_rupees(amount))
+    c4.metric("🔢 DSR", dsr_item["code"])
+
+    with st.expander("🧮 Rate analysis (per unit)"):
+        analyzer = get_rate_analyzer()
+        analysis = analyzer.analyse(dsr_item["code"])
+        if analysis.empty:
+            st.caption("No coefficient analysis for this code – fixed percentage split shown.")
         else:
-            # AREA ITEMS
-            c1, c2, c3 = st.columns(3)
-            if dsr_item.get("category") in ["plaster", "painting", "putty"]:
-                L = c1.number_input(
-                    "Wall Length (m)",
-                    min_value=float(0.01),
-                    max_value=float(100.0),
-                    value=float(10.0),
-                    step=float(0.1),
-                )
-                H = c2.number_input(
-                    "Wall Height (m)",
-                    min_value=float(0.01),
-                    max_value=float(10.0),
-                    value=float(3.0),
-                    step=float(0.1),
-                )
-                openings_area = c3.number_input(
-                    "Area of large openings >0.5 sqm (sqm)",
-                    min_value=float(0.0),
-                    max_value=float(100.0),
-                    value=float(0.0),
-                    step=float(0.1),
-                )
+            st.dataframe(analysis.round(3), use_container_width=True, hide_index=True)
+        split = analyzer.simple_breakdown(rate, code=dsr_item["code"])
+        st.caption(
+            " | ".join(f"{k.title()}: ₹{v:,.0f}" for k, v in split.items())
+        )
 
-                openings = []
-                if openings_area > 0:
-                    # One equivalent opening; IS deduction rule handled by engine
-                    openings = [{"w": 1.0, "h": openings_area}]
+    if dsr_item["type"] == "volume":
+        st.info(
+            f"**IS 1200**: {L:.2f}×{B:.2f}×{D:.3f} = "
+            f"{qto['gross']:.3f} – {qto['deductions']:.3f} "
+            f"= **{qto['net']:.3f} {dsr_item['unit']}**"
+        )
+    else:
+        st.info(
+            f"**IS 1200**: Gross {qto['gross']:.3f} – Deductions {qto['deductions']:.3f} "
+            f"= **{qto['net']:.3f} {dsr_item['unit']}**"
+        )
 
-                qto = IS1200Engine.wall_finish_area(
-                    L, H, sides=2, openings=openings
-                )
-                B = H  # store height in breadth for MB/formats
-            else:
-                # Flooring, tiles, formwork, etc.
-                L = c1.number_input(
-                    "Length (m)",
-                    min_value=float(0.01),
-                    max_value=float(100.0),
-                    value=float(10.0),
-                    step=float(0.1),
-                )
-                B = c2.number_input(
-                    "Breadth (m)",
-                    min_value=float(0.01),
-                    max_value=float(100.0),
-                    value=float(5.0),
-                    step=float(0.1),
-                )
-                openings_area = c3.number_input(
-                    "Deductions (sqm)",
-                    min_value=float(0.0),
-                    max_value=float(100.0),
-                    value=float(0.0),
-                    step=float(0.1),
-                )
-                gross = L * B
-                net = max(0.0, gross - openings_area)
-                qto = {
-                    "gross": gross,
-                    "net": net,
-                    "deductions": openings_area,
+    if st.button("➕ ADD TO SOQ", type="primary"):
+        if dsr_item.get("category") == "rcc_concrete":
+            # Auto-expand RCC
+            add_rcc_with_components(
+                selected_item,
+                dsr_item,
+                phase,
+                L,
+                B,
+                D,
+                qto,
+                cost_index,
+                building,
+                floor,
+            )
+        else:
+            # Single items (earthwork, PCC, brickwork, plaster, tiles, paint, etc.)
+            st.session_state.qto_items.append(
+                {
+                    "building": building,
+                    "floor": floor,
+                    "phase": phase,
+                    "item": selected_item,
+                    "dsr_code": dsr_item["code"],
+                    "length": float(L),
+                    "breadth": float(B),
+                    "depth": float(D) if dsr_item["type"] == "volume" else 0.0,
+                    "quantity": float(qto["net"]),
+                    "unit": dsr_item["unit"],
+                    "rate": float(rate),
+                    "amount": float(amount),
+                    "category": dsr_item.get("category", ""),
                 }
+            )
 
-            rate = dsr_item["rate"] * (cost_index / 100.0)
-            amount = qto["net"] * rate
+        bump_revision(f"Added {selected_item}")
+        refresh_app("✅ Item(s) added with mandatory components where applicable.", balloons=True)
 
-        # RESULTS
-        c1, c2, c3, c4 = st.columns(4)
-        c1.metric(
-            "📐 Quantity", f"{qto['net']:.3f} {dsr_item['unit']}"
-        )
-        c2.metric("💰 Rate", f"₹{rate:,.0f}")
-        c3.metric("💵 Amount", format_rupees(amount))
-        c4.metric("🔢 DSR", dsr_item["code"])
-
-        if dsr_item["type"] == "volume":
-            st.info(
-                f"**IS 1200**: {L:.2f}×{B:.2f}×{D:.3f} = "
-                f"{qto['gross']:.3f} – {qto['deductions']:.3f} "
-                f"= **{qto['net']:.3f} {dsr_item['unit']}**"
+
+@st.fragment
+@timed("soq.import")
+def takeoff_import_panel(phase, building, floor, cost_index):
+    st.caption(
+        "Columns: element type, length, breadth/width, depth/height, count, level (optional building, mark). "
+        "Element types such as IfcColumn, Beam, Floor_Slab, Wall are mapped to DSR items."
+    )
+    schedule = st.file_uploader("Element schedule", type=["csv"], key="takeoff_schedule")
+    i1, i2 = st.columns(2)
+    dim_unit = i1.selectbox("Dimension unit", ["m", "mm", "cm"], key="takeoff_unit")
+    extra_map = i2.text_input("Extra mappings (type = DSR item; ...)", key="takeoff_map")
+    if schedule is not None and st.button("📥 IMPORT SCHEDULE"):
+        try:
+            element_map = dict(
+                (k.strip(), v.strip()) for k, v in (pair.split("=", 1) for pair in extra_map.split(";") if "=" in pair)
             )
-        else:
-            st.info(
-                f"**IS 1200**: Gross {qto['gross']:.3f} – Deductions {qto['deductions']:.3f} "
-                f"= **{qto['net']:.3f} {dsr_item['unit']}**"
+            importer = TakeoffImporter(
+                schedule, CPWD_BASE_DSR_2023, element_map,
+                engine=IS1200Engine, dimension_unit=dim_unit, building=building, floor=floor,
             )
-
-        if st.button("➕ ADD TO SOQ", type="primary"):
-            if dsr_item.get("category") == "rcc_concrete":
-                # Auto-expand RCC
-                add_rcc_with_components(
-                    selected_item,
-                    dsr_item,
-                    phase,
-                    L,
-                    B,
-                    D,
-                    qto,
-                    cost_index,
-                )
-            else:
-                # Single items (earthwork, PCC, brickwork, plaster, tiles, paint, etc.)
+            imported = importer.summarise()
+            for r in imported.itertuples():
+                base = CPWD_BASE_DSR_2023[r.item]
+                item_phase = ITEM_PHASE.get(r.item) or WBS_PHASE.get(r.wbs_code, phase)
+                if r.item in RCC_COMPONENT_DEFAULTS:
+                    add_rcc_with_components(
+                        r.item, base, item_phase, 0.0, 0.0, 0.0, {"net": r.quantity}, cost_index,
+                        r.building, r.floor, formwork_area=float(r.formwork_area),
+                    )
+                    continue
+                rate = base["rate"] * (cost_index / 100.0)
                 st.session_state.qto_items.append(
                     {
-                        "id": len(st.session_state.qto_items) + 1,
-                        "phase": phase,
-                        "item": selected_item,
-                        "dsr_code": dsr_item["code"],
-                        "length": float(L),
-                        "breadth": float(B),
-                        "depth": float(D) if dsr_item["type"] == "volume" else 0.0,
-                        "quantity": float(qto["net"]),
-                        "unit": dsr_item["unit"],
+                        "building": r.building,
+                        "floor": r.floor,
+                        "phase": item_phase,
+                        "item": r.item,
+                        "dsr_code": base["code"],
+                        "length": 0.0,
+                        "breadth": 0.0,
+                        "depth": 0.0,
+                        "quantity": float(r.quantity),
+                        "unit": base["unit"],
                         "rate": float(rate),
-                        "amount": float(amount),
-                        "category": dsr_item.get("category", ""),
+                        "amount": float(r.quantity * rate),
+                        "category": base.get("category", ""),
                     }
                 )
+            # kept for the next run: the report outlives the app rerun below
+            st.session_state.takeoff_report = (importer.report, len(imported))
+            if len(imported):
+                bump_revision(f"Imported {importer.report.source}")
+                refresh_app()
+        except TakeoffImportError as exc:
+            st.error(str(exc))
+
+    report, lines = st.session_state.get("takeoff_report", (None, 0))
+    if report is not None:
+        st.success(
+            f"✅ {report.rows_accepted:,} of {report.rows_read:,} rows imported as {lines} SOQ line(s)."
+        )
+        if report.reject_count:
+            st.warning(f"{report.reject_count:,} row(s) rejected")
+            st.dataframe(report.rejects_frame(), use_container_width=True, hide_index=True)
+        if report.unmapped:
+            st.warning("Unmapped element types – add them under Extra mappings")
+            st.dataframe(report.unmapped_frame(), use_container_width=True, hide_index=True)
+
+
+@st.fragment
+@timed("soq.geometry")
+def geometry_model_panel(phase, building, floor, cost_index):
+    st.caption("Walls – centreline coordinates in m (T and cross junctions are corrected automatically)")
+    geo_walls = st.data_editor(
+        pd.DataFrame(
+            {"wall": ["W1", "W2", "W3", "W4", "W5"],
+             "x0": [0.0, 10.0, 10.0, 0.0, 5.0], "y0": [0.0, 0.0, 8.0, 8.0, 0.0],
+             "x1": [10.0, 10.0, 0.0, 0.0, 5.0], "y1": [0.0, 8.0, 8.0, 0.0, 8.0],
+             "thickness": [0.23, 0.23, 0.23, 0.23, 0.115], "height": [3.0] * 5, "sides": [2] * 5}
+        ),
+        num_rows="dynamic",
+        key="geo_walls",
+        use_container_width=True,
+    )
+    geo_openings = st.data_editor(
+        pd.DataFrame({"type": ["D1 (main door)", "W1 (window)"], "w": [1.0, 1.5], "h": [2.1, 1.2],
+                      "count": [1, 2], "wall": ["W1", "W3"]}),
+        num_rows="dynamic",
+        column_config={"type": st.column_config.SelectboxColumn("Type", options=list(OPENING_TYPES))},
+        key="geo_openings",
+        use_container_width=True,
+    )
+    st.caption("Rooms and slabs – vertices as 'x,y; x,y; ...'")
+    g1, g2 = st.columns(2)
+    geo_rooms = g1.data_editor(
+        pd.DataFrame({"name": ["Room 1", "Room 2"],
+                      "vertices": ["0.115,0.115; 4.9425,0.115; 4.9425,7.885; 0.115,7.885",
+                                   "5.0575,0.115; 9.885,0.115; 9.885,7.885; 5.0575,7.885"],
+                      "skirting_height": [0.1, 0.1]}),
+        num_rows="dynamic",
+        key="geo_rooms",
+    )
+    geo_slabs = g2.data_editor(
+        pd.DataFrame({"name": ["Roof slab"], "vertices": ["0,0; 10,0; 10,8; 0,8"], "thickness": [0.15]}),
+        num_rows="dynamic",
+        key="geo_slabs",
+    )
+    try:
+        model = BuildingModel()
+        model.add_walls(geo_walls.dropna(subset=["x0", "y0", "x1", "y1"]))
+        model.add_openings(geo_openings)
+        for r in geo_rooms.dropna(subset=["vertices"]).itertuples():
+            model.add_room(r.name, parse_vertices(r.vertices), float(r.skirting_height or 0.0))
+        for r in geo_slabs.dropna(subset=["vertices"]).itertuples():
+            model.add_slab(r.name, parse_vertices(r.vertices), float(r.thickness or 0.0))
+        derived = model.quantities()
+        derived = derived[derived["item"].isin(CPWD_BASE_DSR_2023.keys())]
+        derived["rate"] = [
+            CPWD_BASE_DSR_2023[name]["rate"] * (cost_index / 100.0) for name in derived["item"]
+        ]
+        derived["amount"] = derived["quantity"] * derived["rate"]
+        # formwork is not in PHASE_GROUPS: it goes with the slab it supports
+        derived["phase"] = derived["item"].map(ITEM_PHASE)
+        derived.loc[derived["kind"] == "slab_formwork", "phase"] = ITEM_PHASE[DEFAULT_ITEM_MAP["slab_concrete"]]
+        derived["phase"] = derived["phase"].fillna(phase)
+        st.dataframe(derived.round(2), use_container_width=True, hide_index=True)
+
+        if st.button("➕ ADD DERIVED QUANTITIES"):
+            for r in derived.itertuples():
+                base = CPWD_BASE_DSR_2023[r.item]
+                st.session_state.qto_items.append(
+                    {
+                        "building": building,
+                        "floor": floor,
+                        "phase": r.phase,
+                        "item": r.item,
+                        "dsr_code": base["code"],
+                        "length": 0.0,
+                        "breadth": 0.0,
+                        "depth": 0.0,
+                        "quantity": float(r.quantity),
+                        "unit": base["unit"],
+                        "rate": float(r.rate),
+                        "amount": float(r.amount),
+                        "category": base.get("category", ""),
+                    }
+                )
+            bump_revision("Derived from geometry model")
+            refresh_app(f"✅ {len(derived)} derived item(s) added.")
+    except (GeometryError, OpeningScheduleError) as exc:
+        st.error(str(exc))
+
+
+@st.fragment
+@timed("soq.openings")
+def opening_schedule_panel():
+    st.caption("Walls")
+    walls_df = st.data_editor(
+        pd.DataFrame(
+            {"wall": ["W1", "W2"], "length": [10.0, 6.0], "height": [3.0, 3.0],
+             "thickness": [0.23, 0.115], "sides": [2, 2]}
+        ),
+        num_rows="dynamic",
+        key="wall_schedule",
+        use_container_width=True,
+    )
+    st.caption("Openings (host wall must match a wall ID)")
+    openings_df = st.data_editor(
+        pd.DataFrame(
+            {"type": ["D1 (main door)", "W1 (window)", "V1 (ventilator)"],
+             "w": [1.0, 1.5, 0.6], "h": [2.1, 1.2, 0.45], "count": [1, 2, 1],
+             "wall": ["W1", "W1", "W2"]}
+        ),
+        num_rows="dynamic",
+        column_config={
+            "type": st.column_config.SelectboxColumn("Type", options=list(OPENING_TYPES)),
+        },
+        key="opening_schedule",
+        use_container_width=True,
+    )
+    try:
+        per_wall, per_opening = opening_deductions(walls_df, openings_df)
+        st.dataframe(per_wall, use_container_width=True, hide_index=True)
+        totals = building_totals(per_wall)
+        t1, t2 = st.columns(2)
+        t1.metric("Plaster / paint (net)", f"{totals['finish_net']:.2f} sqm",
+                  f"-{totals['finish_deduction']:.2f} sqm openings", delta_color="off")
+        t2.metric("Masonry (net)", f"{totals['masonry_net']:.3f} cum",
+                  f"-{totals['masonry_deduction']:.3f} cum openings", delta_color="off")
+    except OpeningScheduleError as exc:
+        st.error(str(exc))
+
+
+@st.fragment
+@timed("soq.replication")
+def floor_replication_panel():
+    replicator = st.session_state.floor_replicator
+    locations = revision_cached(
+        "measured_floors",
+        lambda: sorted({(item_path(it)[0], item_path(it)[1]) for it in st.session_state.qto_items}),
+    )
+    r1, r2 = st.columns(2)
+    source = r1.selectbox(
+        "Measured floor", locations, format_func=lambda loc: f"{loc[0]} / {loc[1]}"
+    )
+    template_name = r2.text_input("Template name", value=f"Typical {source[1]}")
+    r3, r4, r5, r6 = st.columns(4)
+    n_repeats = r3.number_input("Repeats", min_value=1, max_value=100, value=5, step=1)
+    floor_prefix = r4.text_input("Floor label prefix", value="Floor")
+    first_no = r5.number_input("First floor no.", min_value=0, value=2, step=1)
+    multiplier = r6.number_input("Multiplier", min_value=0.01, value=1.0, step=0.05)
+
+    if st.button("🏢 REPLICATE FLOOR"):
+        try:
+            if template_name not in replicator.templates:
+                replicator.define_template(
+                    template_name,
+                    (it for it in st.session_state.qto_items if item_path(it)[:2] == source),
+                )
+            floors = [f"{floor_prefix} {first_no + k}" for k in range(int(n_repeats))]
+            revision = st.session_state.qto_revision
+            new_views = []
+            for index in replicator.replicate(template_name, floors, multiplier):
+                replicator.register_in_tree(
+                    st.session_state.wbs_tree, index, get_item, revision
+                )
+                new_views.extend(replicator.replica_items(index, get_item))
+            bump_revision(f"Replicated '{template_name}' × {len(floors)}", added=new_views)
+            refresh_app(f"✅ {len(floors)} floor(s) replicated from '{template_name}'.")
+        except (KeyError, ValueError) as exc:
+            st.error(str(exc))
+
+    if replicator.replicas:
+        reps = pd.DataFrame(replicator.summary(get_item, st.session_state.qto_revision))
+        reps["amount"] = reps["amount"].map(format_rupees)
+        st.dataframe(reps, use_container_width=True, hide_index=True)
+
+
+def current_soq_filter():
+    """SOQ table filter from its widgets (shared with the bulk editor)."""
+    return SOQFilter(
+        phases=tuple(st.session_state.get("soq_phases", ())),
+        categories=tuple(st.session_state.get("soq_categories", ())),
+        code_prefix=st.session_state.get("soq_code", ""),
+        text=st.session_state.get("soq_text", ""),
+    )
 
-            st.success("✅ Item(s) added with mandatory components where applicable.")
-            st.balloons()
+
+@st.fragment
+@timed("soq.table")
+def soq_table_panel():
+    """Filtered, paged SOQ table; only the visible page is sent to the browser."""
+    view = st.session_state.soq_view.sync(st.session_state.qto_items, st.session_state.qto_revision)
+    f1, f2, f3, f4 = st.columns([2, 2, 1, 2])
+    f1.multiselect("Phase filter", view.options("phase"), key="soq_phases")
+    f2.multiselect("Category filter", view.options("category"), key="soq_categories")
+    f3.text_input("DSR code starts with", key="soq_code")
+    f4.text_input("Item contains", key="soq_text")
+    flt = current_soq_filter()
+    p1, p2 = st.columns([1, 1])
+    page_size = p1.selectbox("Rows per page", PAGE_SIZES, index=1, key="soq_page_size")
+    page_no = p2.number_input("Page", min_value=1, value=1, step=1, key="soq_page")
+    page = view.page(flt, page_no, page_size)
+    st.dataframe(page.frame, use_container_width=True, hide_index=True)
+    scope = f" (filtered from {page.total_rows:,})" if flt.active else ""
+    st.caption(
+        f"Rows {page.first:,}–{page.last:,} of {page.rows:,}{scope} · page {page.page} of {page.pages} · "
+        f"{format_rupees(page.amount)}"
+    )
+
+
+BULK_ACTIONS = (
+    "Re-rate by %",
+    "Set rate",
+    "Scale quantity",
+    "Move to phase",
+    "Move to building / floor",
+    "Delete",
+)
+
+
+@st.fragment
+@timed("soq.bulk_edit")
+def bulk_edit_panel():
+    """Edit, re-rate or delete many items at once; linked RCC rows follow their parent."""
+    store = st.session_state.qto_items
+    view = st.session_state.soq_view.sync(store, st.session_state.qto_revision)
+    s1, s2 = st.columns([1, 2])
+    scope = s1.radio("Apply to", ["Rows matching the SOQ filter", "Item IDs"], key="bulk_scope")
+    id_text = s2.text_input("Item IDs (e.g. 4, 7-120)", key="bulk_ids", disabled=scope != "Item IDs")
+    a1, a2, a3 = st.columns([1, 2, 1])
+    action = a1.selectbox("Action", BULK_ACTIONS, key="bulk_action")
+    cascade = a3.checkbox("Include linked steel / formwork rows", value=True, key="bulk_cascade")
+
+    if action == "Re-rate by %":
+        pct = a2.number_input("Change (%)", min_value=-90.0, max_value=500.0, value=5.0, step=0.5)
+    elif action == "Set rate":
+        new_rate = a2.number_input("New rate (₹ per unit)", min_value=0.0, value=0.0, step=10.0)
+    elif action == "Scale quantity":
+        factor = a2.number_input("Quantity factor", min_value=0.0, value=1.0, step=0.05)
+    elif action == "Move to phase":
+        new_phase = a2.selectbox("Phase", list(PHASE_GROUPS.keys()), key="bulk_phase")
+    elif action == "Move to building / floor":
+        m1, m2 = a2.columns(2)
+        new_building = m1.text_input("Building / Block", value=DEFAULT_BUILDING, key="bulk_building")
+        new_floor = m2.text_input("Floor", value=DEFAULT_FLOOR, key="bulk_floor")
+
+    try:
+        ids = parse_id_ranges(id_text) if scope == "Item IDs" else view.ids(current_soq_filter())
+        ids = [i for i in ids if store.has_id(i)]
+    except ItemStoreError as exc:
+        st.error(str(exc))
+        return
+    st.caption(f"{len(ids):,} item(s) selected")
+    if not ids or not st.button(f"✏️ APPLY TO {len(ids):,} ITEM(S)", type="primary"):
+        return
+
+    try:
+        if action == "Re-rate by %":
+            change = store.rerate(ids, factor=1.0 + pct / 100.0, cascade=cascade)
+        elif action == "Set rate":
+            change = store.rerate(ids, rate=new_rate, cascade=cascade)
+        elif action == "Scale quantity":
+            change = store.scale_quantity(ids, factor, cascade=cascade)
+        elif action == "Move to phase":
+            change = store.edit(ids, cascade=cascade, phase=new_phase)
+        elif action == "Move to building / floor":
+            change = store.edit(ids, cascade=cascade, building=new_building, floor=new_floor)
+        else:
+            change = store.delete(ids, cascade=cascade)
+    except (ItemStoreError, KeyError) as exc:
+        st.error(str(exc))
+        return
+    apply_item_changes(change)
+    refresh_app(f"✅ {change.label}.")
+
+
+@st.fragment
+@timed("soq.rcc_components")
+def rcc_components_panel():
+    """Reinforcement coefficients and member dimensions; linked rows are re-derived from them."""
+    store = st.session_state.qto_items
+    composites = st.session_state.composites
+    counts = composites.members()
+    st.caption(
+        f"{len(composites):,} steel / formwork row(s) linked to {sum(counts.values()):,} RCC member(s). "
+        "Changing a coefficient or a member recomputes only the rows that depend on it."
+    )
+
+    k1, k2, k3 = st.columns([2, 1, 1])
+    coeff_member = k1.selectbox("Member type", list(composites.coefficients), key="rcc_coeff_member")
+    kg = k2.number_input(
+        "Steel (kg/cum)", min_value=0.0, step=5.0,
+        value=composites.coefficients[coeff_member], key=f"rcc_kg_{coeff_member}",
+    )
+    k3.metric("Linked members", counts.get(coeff_member, 0))
+    if st.button("🔁 APPLY COEFFICIENT"):
+        marked = composites.set_steel_rate(coeff_member, float(kg))
+        change = composites.recompute(store)
+        change.label = f"Steel for {coeff_member} set to {kg:g} kg/cum ({marked} row(s) recomputed)"
+        apply_item_changes(change)
+        refresh_app(f"✅ {change.label}.")
+
+    parents = {
+        f"#{it['id']} · {it['item']} ({it['floor']})": it["id"] for it in store if composites.is_parent(it["id"])
+    }
+    if not parents:
+        return
+    st.markdown("**Resize a member**")
+    pid = parents[st.selectbox("RCC member", list(parents), key="rcc_member")]
+    member = get_item(pid)
+    r1, r2, r3 = st.columns(3)
+    L = r1.number_input("Length (m)", min_value=0.01, value=max(float(member["length"]), 0.01), key=f"rcc_L_{pid}")
+    B = r2.number_input("Breadth (m)", min_value=0.01, value=max(float(member["breadth"]), 0.01), key=f"rcc_B_{pid}")
+    D = r3.number_input("Depth (m)", min_value=0.01, value=max(float(member["depth"]), 0.01), key=f"rcc_D_{pid}")
+    st.dataframe(
+        pd.DataFrame(
+            [
+                {
+                    "id": c,
+                    "item": get_item(c)["item"],
+                    "quantity": round(float(get_item(c)["quantity"]), 3),
+                    "unit": get_item(c)["unit"],
+                    "formula": composites.describe(c),
+                }
+                for c in store.children(pid)
+                if c in composites.formulas
+            ]
+        ),
+        hide_index=True,
+        use_container_width=True,
+    )
+    if st.button("📐 RESIZE MEMBER"):
+        try:
+            change = composites.resize(store, pid, L, B, D)
+        except ItemStoreError as exc:
+            st.error(str(exc))
+            return
+        apply_item_changes(change)
+        refresh_app(f"✅ {change.label}.")
+
+
+def render_soq_tab(cost_index):
+    st.header("📏 **CPWD FORM 7 - IS 1200 SOQ**")
+    show_flash()
+    anomalies = estimate_anomalies()
+    if len(anomalies):
+        st.warning(
+            f"⚠️ {len(anomalies)} implausible value(s), e.g. item {anomalies['id'].iat[0]} "
+            f"{anomalies['field'].iat[0]} {anomalies['value'].iat[0]:,.3g} "
+            f"({anomalies['reason'].iat[0]}). See Tab 2 › Quantity plausibility."
+        )
+
+    wb1, wb2 = st.columns(2)
+    building = wb1.text_input("Building / Block", value=DEFAULT_BUILDING)
+    floor = wb2.text_input("Floor", value=DEFAULT_FLOOR)
+
+    col1, col2 = st.columns([1, 3])
+    phase = col1.selectbox("Phase", list(PHASE_GROUPS.keys()))
+    selected_item = col2.selectbox("DSR Item", PHASE_GROUPS[phase])
+
+    if selected_item in CPWD_BASE_DSR_2023:
+        soq_entry_form(selected_item, phase, building, floor, cost_index)
+
+    with st.expander("📥 Import CAD / BIM element schedule (CSV)"):
+        takeoff_import_panel(phase, building, floor, cost_index)
+
+    with st.expander("📐 Geometry model (derive quantities from walls / rooms / slabs)"):
+        geometry_model_panel(phase, building, floor, cost_index)
 
     if st.session_state.qto_items:
-        df = pd.DataFrame(st.session_state.qto_items)[
-            ["id", "dsr_code", "phase", "item", "quantity", "unit", "rate", "amount"]
-        ]
-        st.dataframe(df.round(2), use_container_width=True)
+        soq_table_panel()
+
+        with st.expander("✏️ Bulk edit / delete"):
+            bulk_edit_panel()
+
+        if len(st.session_state.composites):
+            with st.expander("🧱 RCC components (steel / formwork formulas)"):
+                rcc_components_panel()
+
+        with st.expander("🚪 Door / window schedule (building-wide deductions)"):
+            opening_schedule_panel()
+
+        with st.expander("🏢 Typical floor replication"):
+            floor_replication_panel()
 
 
 # =============================================================================
 # TAB 2: ABSTRACT + TECHNICAL CHECKS
 # =============================================================================
-with tab2:
-    if st.session_state.qto_items:
-        st.header("📊 **FORM 5A ABSTRACT**")
-        phase_totals = {}
-        for item in st.session_state.qto_items:
-            phase_totals[item["phase"]] = phase_totals.get(
-                item["phase"], 0.0
-            ) + item["amount"]
-
-        data = []
-        for i, (p, a) in enumerate(phase_totals.items()):
-            data.append(
-                {
-                    "S.No.": i + 1,
-                    "Particulars": p,
-                    "Amount": format_rupees(a),
-                }
-            )
-        data.append(
-            {
-                "S.No.": "TOTAL",
-                "Particulars": "CIVIL WORKS",
-                "Amount": format_rupees(total_cost),
-            }
+def form_5a_abstract():
+    abstract = st.session_state.wbs_tree.to_abstract("phase")
+    data = {
+        "S.No.": abstract["S.No."],
+        "Particulars": abstract["Description"],
+        "Amount": abstract["Amount (₹)"].map(format_rupees),
+    }
+    return pd.DataFrame(data)
+
+
+@st.fragment
+@timed("abstract.rollup")
+def wbs_rollup_panel():
+    wbs_level = st.selectbox("Roll-up level", ["building", "floor", "phase", "element"], index=1)
+    rollup = st.session_state.wbs_tree.rollup(wbs_level).drop(columns="node")
+    rollup["amount"] = rollup["amount"].map(format_rupees)
+    st.dataframe(rollup, use_container_width=True, hide_index=True)
+
+
+@st.fragment
+@timed("abstract.history")
+def revision_history_panel():
+    history = st.session_state.revision_history
+    st.dataframe(history.log(), use_container_width=True, hide_index=True)
+    h1, h2 = st.columns(2)
+    rev_from = int(h1.number_input("From revision", 0, history.head, max(history.head - 1, 0)))
+    rev_to = int(h2.number_input("To revision", 0, history.head, history.head))
+    changes = revision_cached("revision_diff", lambda: history.diff(rev_from, rev_to), rev_from, rev_to)
+    if changes.empty:
+        st.caption("No changes between these revisions.")
+    else:
+        summary = revision_cached(
+            "revision_phase_summary", lambda: history.phase_summary(rev_from, rev_to), rev_from, rev_to
         )
-        df_abs = pd.DataFrame(data)
-        st.dataframe(df_abs, use_container_width=True)
-        st.download_button(
-            "📥 Form 5A",
-            df_abs.to_csv(index=False),
-            f"Form5A_{datetime.now().strftime('%Y%m%d')}.csv",
+        st.dataframe(summary.round(2), hide_index=True)
+        # measured (int) and replica ("3-R0") IDs mixed: show as text
+        st.dataframe(changes.round(3).astype({"id": str}), use_container_width=True, hide_index=True)
+
+
+@st.fragment
+@timed("abstract.anomalies")
+def anomaly_panel():
+    """Row outliers within the estimate and estimate ratios against recorded reference estimates."""
+    anomalies = estimate_anomalies()
+    if len(anomalies):
+        st.warning(f"{len(anomalies)} value(s) far from the other rows of the same item – check for typos.")
+        st.dataframe(anomalies.round({"value": 3, "median": 3, "z": 1}), use_container_width=True, hide_index=True)
+    else:
+        st.success("No row is far out of line with the other rows of its item.")
+
+    profile = st.session_state.estimate_profile
+    plinth_area = st.number_input("Plinth area (sqm, for cost per sqm)", min_value=0.0, value=0.0, step=10.0)
+    metrics = revision_cached(
+        "estimate_metrics",
+        lambda: estimate_metrics(estimate_items(), plinth_area=plinth_area or None),
+        plinth_area,
+    )
+    checked = profile.check(metrics)
+    flagged = checked[checked["flagged"]]
+    for row in flagged.itertuples():
+        st.warning(
+            f"• {row.metric} is {row.value:,.2f}; reference estimates run {row.q1:,.2f}–{row.q3:,.2f} "
+            f"(median {row.median:,.2f})."
         )
+    st.dataframe(checked.round(2), use_container_width=True, hide_index=True)
+    st.caption(f"{len(profile)} reference estimate(s) recorded; ratios are checked once there are 5.")
+    if metrics and st.button("📌 RECORD AS REFERENCE ESTIMATE"):
+        profile.record(st.session_state.project_info["name"], metrics)
+        st.success(f"Recorded '{st.session_state.project_info['name']}' ({len(metrics)} metric(s)).")
 
-        st.subheader("🛡️ Technical & Audit Checks")
-        issues = analyse_dependencies(st.session_state.qto_items)
-        if issues:
-            for msg in issues:
-                st.warning("• " + msg)
-        else:
-            st.success(
-                "Estimate passes basic sequencing & dependency checks "
-                "(RCC components, plaster, putty, painting)."
+
+def render_abstract_tab():
+    if not st.session_state.qto_items:
+        st.info("Add SOQ items in Tab 1 to view abstract.")
+        return
+
+    st.header("📊 **FORM 5A ABSTRACT**")
+    df_abs = revision_cached("form_5a_abstract", form_5a_abstract)
+    st.dataframe(df_abs, use_container_width=True)
+    st.download_button(
+        "📥 Form 5A",
+        df_abs.to_csv(index=False),
+        f"Form5A_{datetime.now().strftime('%Y%m%d')}.csv",
+    )
+
+    with st.expander("🌳 WBS roll-up"):
+        wbs_rollup_panel()
+
+    with st.expander("🕘 Revision history"):
+        revision_history_panel()
+
+    st.subheader("🧱 Material Take-off")
+    aggregator = st.session_state.resource_aggregator
+    revision = st.session_state.qto_revision
+    res_totals = aggregator.totals(estimate_items(), revision)
+    if res_totals.empty:
+        st.info("No rate analysis available for the items in this estimate.")
+    else:
+        st.dataframe(
+            res_totals[["name", "unit", "quantity", "amount"]].round(2),
+            use_container_width=True,
+            hide_index=True,
+        )
+        key_resources = [
+            k for k in ("cement", "steel", "sand", "aggregate", "bricks")
+            if k in set(res_totals["resource"])
+        ]
+        st.caption("Monthly requirement (phase schedule spread)")
+        st.dataframe(
+            aggregator.monthly(estimate_items(), revision, key_resources).round(2),
+            use_container_width=True,
+        )
+        if res_totals.attrs.get("unanalysed_lines"):
+            st.caption(
+                f"{res_totals.attrs['unanalysed_lines']} line(s) have no rate analysis and are not included."
             )
+
+    st.subheader("🛡️ Technical & Audit Checks")
+    issues = analyse_dependencies()
+    if issues:
+        for msg in issues:
+            st.warning("• " + msg)
     else:
-        st.info("Add SOQ items in Tab 1 to view abstract.")
+        st.success(
+            "Estimate passes basic sequencing, dependency & quantity-ratio checks "
+            "(RCC components, plaster, putty, painting)."
+        )
+
+    st.subheader("🔎 Quantity plausibility")
+    anomaly_panel()
 
 
 # =============================================================================
 # TAB 3: RISK ANALYSIS
 # =============================================================================
-with tab3:
+@st.fragment
+@timed("risk.what_if")
+def rate_sweep_panel():
+    c1, c2, c3 = st.columns(3)
+    steel_range = c1.slider("Steel ± %", 0, 50, 20)
+    cement_range = c2.slider("Cement ± %", 0, 50, 15)
+    step_pct = c3.select_slider("Step %", [1, 2, 5], value=1)
+    engine = SensitivityEngine(get_rate_analyzer())
+    step = step_pct / 100.0
+    surface = revision_cached(
+        "rate_sweep",
+        lambda: engine.sweep(
+            {"Current estimate": estimate_items()},
+            {
+                "steel": (-steel_range / 100.0, steel_range / 100.0, step),
+                "cement": (-cement_range / 100.0, cement_range / 100.0, step),
+            },
+        ).surface("Current estimate"),
+        steel_range, cement_range, step_pct,
+    )
+    st.caption("Change in estimate total (%) – rows: steel %, columns: cement %")
+    st.dataframe(surface.round(2), use_container_width=True)
+    st.caption("Elasticity of the estimate total to each basic rate")
+    elasticity = revision_cached(
+        "rate_elasticity", lambda: engine.elasticity_table({"Current estimate": estimate_items()})
+    )
+    st.dataframe(
+        elasticity[["name", "elasticity", "impact_per_1pct"]].round(4),
+        use_container_width=True,
+        hide_index=True,
+    )
+
+
+def render_risk_tab(total_cost):
     st.header("🎯 **RISK ANALYSIS**")
-    if total_cost:
-        mc = monte_carlo(total_cost)
-        c1, c2, c3 = st.columns(3)
-        c1.metric("P10", format_rupees(mc["p10"]))
-        c2.metric("P50", format_rupees(mc["p50"]))
-        c3.metric("P90", format_rupees(mc["p90"]))
-        st.success(f"**Recommended Budget (P90): {format_rupees(mc['p90'])}**")
-    else:
+    if not total_cost:
         st.info("Add items in SOQ to run risk analysis.")
+        return
+
+    mc = monte_carlo(total_cost)
+    c1, c2, c3 = st.columns(3)
+    c1.metric("P10", format_rupees(mc["p10"]))
+    c2.metric("P50", format_rupees(mc["p50"]))
+    c3.metric("P90", format_rupees(mc["p90"]))
+    st.success(f"**Recommended Budget (P90): {format_rupees(mc['p90'])}**")
+
+    st.subheader("📈 What-if: basic rate sweep")
+    rate_sweep_panel()
 
 
 # =============================================================================
 # TAB 4: CPWD/PWD FORMATS
 # =============================================================================
-with tab4:
+@st.fragment
+def render_formats_tab(location, contingency, cost_index):
+    """Forms, measurement book and export bundle (the whole tab reruns on its own)."""
     if not st.session_state.qto_items:
         st.warning("👆 **Complete SOQ first**")
-        st.stop()
+        return
 
     st.header("📄 **CPWD/PWD GOVERNMENT FORMATS - ALL 5 WORKING**")
 
@@ -756,208 +1540,199 @@ with tab4:
         ],
     )
 
-    grand_total = sum(item["amount"] for item in st.session_state.qto_items)
     today = datetime.now()
-
-    # 1️⃣ FORM 5A - ABSTRACT OF COST
-    if "Form 5A" in format_type:
-        st.markdown("### **📋 CPWD FORM 5A - ABSTRACT OF COST**")
-        phase_totals = {}
-        for item in st.session_state.qto_items:
-            phase = item["phase"]
-            phase_totals[phase] = phase_totals.get(phase, 0.0) + float(
-                item["amount"]
+    form_key = {"Form 5A": "5A", "Form 7": "7", "Form 8": "8", "Form 31": "31", "PWD Form 6": "PWD6"}
+    form_choice = next(v for k, v in form_key.items() if k in format_type)
+    mb = st.session_state.measurement_book
+    bill_no = None
+
+    if form_choice in ("8", "31"):
+        with st.expander(f"📏 Measurement Book – RA bill {mb.current_bill} open", expanded=not len(mb)):
+            frame = st.session_state.form_cache.frame(estimate_items, st.session_state.qto_revision)
+            m1, m2, m3 = st.columns([2, 1, 1])
+            pos = m1.selectbox(
+                "Item measured",
+                range(len(frame)),
+                format_func=lambda i: f"{frame['id'].iat[i]} – {frame['item'].iat[i]}",
             )
+            row = frame.iloc[pos]
+            balance = max(float(row["quantity"]) - mb.cumulative(row["id"]), 0.0)
+            qty = m2.number_input(f"Quantity ({row['unit']})", value=round(balance, 3), step=0.1, format="%.3f")
+            measured_on = m3.date_input("Date of measurement", value=today.date())
+
+            b1, b2, b3 = st.columns(3)
+            try:
+                if b1.button("➕ RECORD MEASUREMENT"):
+                    mb.record_item(row, qty, measured_on)
+                if b2.button("📏 MEASURE ALL BALANCES"):
+                    for _, r in frame.iterrows():
+                        if float(r["quantity"]) - mb.cumulative(r["id"]) > 1e-9:
+                            mb.record_item(r, None, measured_on)
+                if b3.button("🔒 CLOSE RA BILL"):
+                    closed = mb.close_bill(measured_on)
+                    st.success(f"RA bill {closed.bill_no} closed: {format_rupees(closed.this_bill)}")
+            except MeasurementError as exc:
+                st.error(str(exc))
+            st.caption(f"{len(mb)} measurement(s) recorded; {mb.current_bill - 1} bill(s) closed.")
+
+        bill_no = st.selectbox("RA Bill No.", list(range(1, mb.current_bill + 1)), index=mb.current_bill - 1)
+
+    form_ctx = FormContext(
+        project=st.session_state.project_info["name"],
+        location=location,
+        on_date=today.date(),
+        bill_no=bill_no,
+    )
+    with section("tab4.form_build"):
+        form = st.session_state.form_cache.get(
+            form_choice,
+            revision=st.session_state.qto_revision,
+            items=estimate_items,
+            tree=st.session_state.wbs_tree,
+            ctx=form_ctx,
+            mb=mb,
+        )
 
-        form5a_data = []
-        for i, (phase_name, amount) in enumerate(phase_totals.items(), 1):
-            form5a_data.append(
-                {
-                    "S.No.": i,
-                    "Description": phase_name,
-                    "No.Items": len(
-                        [
-                            it
-                            for it in st.session_state.qto_items
-                            if it["phase"] == phase_name
-                        ]
-                    ),
-                    "Amount (₹)": format_rupees(amount),
-                }
-            )
+    st.markdown(f"### **📋 {form.title}**")
+    st.dataframe(form.display(), use_container_width=True, hide_index=True)
+    st.download_button(
+        f"📥 DOWNLOAD {form.title.split(' - ')[0]}",
+        form.to_csv(),
+        form.file_name(today),
+        mime="text/csv",
+    )
 
-        form5a_data.append(
-            {
-                "S.No.": "**TOTAL-A**",
-                "Description": "**CIVIL WORKS**",
-                "No.Items": len(st.session_state.qto_items),
-                "Amount (₹)": format_rupees(grand_total),
-            }
-        )
+    if form.key == "31":
+        c1, c2 = st.columns(2)
+        c1.metric("**Gross Value**", format_rupees(form.totals["gross"]))
+        c2.metric("**Net Payable**", format_rupees(form.totals["net"]))
 
-        df5a = pd.DataFrame(form5a_data)
-        st.dataframe(df5a, use_container_width=True, hide_index=True)
-        st.download_button(
-            "📥 DOWNLOAD FORM 5A",
-            df5a.to_csv(index=False),
-            f"CPWD_Form5A_{today.strftime('%Y%m%d')}.csv",
-        )
+    elif form.key == "PWD6":
+        st.markdown(
+            f"""
+**WORK ORDER No: WO/{location[:3].upper()}/2026/{today.strftime('%m%d')}/001**
 
-    # 2️⃣ FORM 7 - SCHEDULE OF QUANTITIES
-    elif "Form 7" in format_type:
-        st.markdown("### **📋 CPWD FORM 7 - SCHEDULE OF QUANTITIES**")
-        soq_data = []
-        for item in st.session_state.qto_items:
-            soq_data.append(
-                {
-                    "Item No": item["id"],
-                    "DSR Code": item["dsr_code"],
-                    "Description": item["item"],
-                    "Quantity": f"{float(item['quantity']):.3f}",
-                    "Unit": item["unit"],
-                    "Rate (₹)": f"₹{float(item['rate']):,.0f}",
-                    "Amount (₹)": format_rupees(float(item["amount"])),
-                }
-            )
-        soq_data.append(
-            {
-                "Item No": "**TOTAL**",
-                "DSR Code": "",
-                "Description": "**GRAND TOTAL**",
-                "Quantity": "",
-                "Unit": "",
-                "Rate (₹)": "",
-                "Amount (₹)": format_rupees(grand_total),
-            }
-        )
+**To: M/s [CONTRACTOR NAME]**
 
-        df7 = pd.DataFrame(soq_data)
-        st.dataframe(df7, use_container_width=True, hide_index=True)
-        st.download_button(
-            "📥 DOWNLOAD FORM 7",
-            df7.to_csv(index=False),
-            f"SOQ_Form7_{today.strftime('%Y%m%d')}.csv",
+**Subject: Award of Contract - {st.session_state.project_info['name']}**
+"""
         )
 
-    # 3️⃣ FORM 8 - MEASUREMENT BOOK
-    elif "Form 8" in format_type:
-        st.markdown(
-            "### **📏 CPWD FORM 8 - MEASUREMENT BOOK** ✅ DIMENSIONS FIXED"
+    st.subheader("📦 Export bundle (all formats)")
+    export_formats = st.multiselect(
+        "Include",
+        list(EXPORT_FORMATS),
+        default=[f for f in EXPORT_FORMATS if f != "parquet" or parquet_available()],
+    )
+    if st.button("📦 BUILD EXPORT BUNDLE"):
+        st.session_state.export_bundle = (
+            st.session_state.qto_revision,
+            build_export_bundle(
+                st.session_state.form_cache,
+                revision=st.session_state.qto_revision,
+                items=estimate_items,
+                tree=st.session_state.wbs_tree,
+                ctx=form_ctx,
+                formats=export_formats,
+                contingency_pct=contingency,
+                cost_index=cost_index,
+                mb=mb,
+            ),
         )
-        mb_data = []
-        for item in st.session_state.qto_items:
-            mb_data.append(
-                {
-                    "Date": today.strftime("%d/%m/%Y"),
-                    "MB Page": f"MB/{int(item['id']):03d}",
-                    "Item Description": item["item"][:40],
-                    "Length": f"{float(item['length']):.2f} m",
-                    "Breadth": f"{float(item['breadth']):.2f} m",
-                    "Depth": f"{float(item['depth']):.3f} m",
-                    "Content": f"{float(item['quantity']):.3f} {item['unit']}",
-                    "Initials": "RKS/Checked & Verified",
-                }
-            )
-
-        df8 = pd.DataFrame(mb_data)
-        st.dataframe(df8, use_container_width=True, hide_index=True)
+    bundle_rev, bundle = st.session_state.get("export_bundle", (None, None))
+    if bundle is not None and bundle_rev == st.session_state.qto_revision:
+        st.caption(f"Built in {bundle.seconds:.2f} s – {len(bundle.data) / 1e6:.2f} MB")
         st.download_button(
-            "📥 DOWNLOAD FORM 8",
-            df8.to_csv(index=False),
-            f"MB_Form8_{today.strftime('%Y%m%d')}.csv",
+            "📥 DOWNLOAD BUNDLE (.zip)",
+            bundle.data,
+            f"CPWD_Estimate_{today.strftime('%Y%m%d')}.zip",
+            mime="application/zip",
         )
 
-    # 4️⃣ FORM 31 - RUNNING ACCOUNT BILL
-    elif "Form 31" in format_type:
-        st.markdown("### **💰 CPWD FORM 31 - RUNNING ACCOUNT BILL** ✅")
-
-        ra_data = {
-            "S.No.": [1, 2, 3, 4, 5, 6, 7],
-            "Particulars": [
-                "Gross value of work measured (this bill)",
-                "Work done - previous bills",
-                "Total value of work done (1+2)",
-                "Deductions:",
-                "Income Tax @2%",
-                "Labour Cess @1%",
-                "**NET AMOUNT PAYABLE**",
-            ],
-            "Amount (₹)": [
-                format_rupees(grand_total),
-                format_rupees(0.0),
-                format_rupees(grand_total),
-                "",
-                format_rupees(grand_total * 0.02),
-                format_rupees(grand_total * 0.01),
-                format_rupees(grand_total * 0.97),
-            ],
-        }
 
-        df31 = pd.DataFrame(ra_data)
-        st.dataframe(df31, use_container_width=True, hide_index=True)
+# =============================================================================
+# LAYOUT
+# =============================================================================
+# Everything below runs inside try / finally, so a profiled rerun is closed
+# even when st.rerun(), st.stop() or an error ends the script early.
+rerun_profiler = start_rerun_profile()
+try:
+    with st.sidebar, section("app.sidebar"):
+        st.header("🏛️ PROJECT")
+        for key in st.session_state.project_info:
+            st.session_state.project_info[key] = st.text_input(
+                key.replace("_", " ").title(),
+                value=st.session_state.project_info[key],
+            )
 
-        csv31 = df31.to_csv(index=False)
-        st.download_button(
-            "📥 DOWNLOAD FORM 31",
-            csv31,
-            f"RAB_Form31_{today.strftime('%Y%m%d')}.csv",
-            mime="text/csv",
-        )
+        st.header("📍 LOCATION")
+        location = st.selectbox("Select City", list(LOCATION_INDICES.keys()))
+        cost_index = LOCATION_INDICES[location]
+        st.info(f"**{location}: {cost_index}%**")
+
+        st.header("⚙️ RATES")
+        contingency = st.slider("Contingency", 0.0, 10.0, 5.0)
+        escalation = st.slider("Escalation p.a.", 3.0, 8.0, 5.5)
+
+        with st.expander("🛠 Developer: instrumentation"):
+            instrumentation.enable(st.toggle("Time hot paths", value=instrumentation.is_enabled()))
+            if st.button("Reset timers"):
+                instrumentation.reset()
+            timings = instrumentation.report()
+            if timings.empty:
+                st.caption("No timings yet – enable and interact with the app.")
+            else:
+                st.caption("Totals since the last reset (up to the previous rerun for tabs)")
+                st.dataframe(
+                    timings[["name", "calls", "total_ms", "mean_ms", "max_ms"]].round(2),
+                    use_container_width=True,
+                    hide_index=True,
+                )
+                counters = instrumentation.counters_frame()
+                if not counters.empty:
+                    st.dataframe(counters, use_container_width=True, hide_index=True)
+
+            last_profile = st.session_state.get("last_rerun_profile")
+            if rerun_profiler is not None and last_profile:
+                st.caption(
+                    f"Rerun {last_profile['rerun']}: {last_profile['wall_ms']:.0f} ms, "
+                    f"{last_profile['alloc_kb']:+.0f} KB, {last_profile['blocks'] or 0:,} live blocks"
+                )
+                st.dataframe(
+                    pd.DataFrame(last_profile["sections"]),
+                    use_container_width=True,
+                    hide_index=True,
+                )
 
-        c1, c2 = st.columns(2)
-        c1.metric("**Gross Value**", format_rupees(grand_total))
-        c2.metric("**Net Payable**", format_rupees(grand_total * 0.97))
-
-    # 5️⃣ PWD FORM 6 - WORK ORDER
-    elif "PWD Form 6" in format_type:
-        st.markdown("### **📜 PWD FORM 6 - WORK ORDER** ✅")
-        completion_date = today + timedelta(days=180)
-
-        wo_data = {
-            "S.No.": list(range(1, 10)),
-            "Particulars": [
-                "Name of Work",
-                "Location",
-                "Probable Amount of Contract",
-                "Earnest Money Deposit (2%)",
-                "Security Deposit (5%)",
-                "Time Allowed",
-                "Date of Commencement",
-                "Scheduled Completion Date",
-                "Performance Guarantee (3%)",
-            ],
-            "Details": [
-                st.session_state.project_info["name"],
-                location,
-                format_rupees(grand_total),
-                format_rupees(grand_total * 0.02),
-                format_rupees(grand_total * 0.05),
-                "6 (Six) Months",
-                today.strftime("%d/%m/%Y"),
-                completion_date.strftime("%d/%m/%Y"),
-                format_rupees(grand_total * 0.03),
-            ],
-        }
+    # Dashboard
+    with section("app.dashboard"):
+        total_cost = st.session_state.wbs_tree.total
+        with section("app.monte_carlo"):
+            mc = monte_carlo(total_cost) if total_cost else {}
+        cols = st.columns(5)
+        cols[0].metric("💰 Base Cost", format_rupees(total_cost))
+        cols[1].metric(
+            "📋 Items",
+            len(st.session_state.qto_items) + st.session_state.floor_replicator.replica_item_count(),
+        )
+        cols[2].metric("🎯 Index", f"{cost_index}%")
+        cols[3].metric("📊 Sanction", format_rupees(total_cost * 1.075))
+        cols[4].metric("🎯 P90", format_rupees(mc.get("p90", 0.0)))
 
-        df6 = pd.DataFrame(wo_data)
-        st.dataframe(df6, use_container_width=True, hide_index=True)
+    tab1, tab2, tab3, tab4 = st.tabs(["📏 SOQ", "📊 Abstract", "🎯 Risk", "📄 Formats"])
 
-        csv6 = df6.to_csv(index=False)
-        st.download_button(
-            "📥 DOWNLOAD PWD FORM 6",
-            csv6,
-            f"WorkOrder_PWD6_{today.strftime('%Y%m%d')}.csv",
-            mime="text/csv",
-        )
+    with tab1, section("tab1.soq"):
+        render_soq_tab(cost_index)
 
-        st.markdown(
-            f"""
-**WORK ORDER No: WO/{location[:3].upper()}/2026/{today.strftime('%m%d')}/001**
+    with tab2, section("tab2.abstract"):
+        render_abstract_tab()
 
-**To: M/s [CONTRACTOR NAME]**
+    with tab3, section("tab3.risk"):
+        render_risk_tab(total_cost)
 
-**Subject: Award of Contract - {st.session_state.project_info['name']}**
-"""
-        )
+    with tab4, section("tab4.formats"):
+        render_formats_tab(location, contingency, cost_index)
 
-st.success("✅ **All 5 CPWD/PWD formats and RCC auto-expansion are now active.**")
+    st.success("✅ **All 5 CPWD/PWD formats and RCC auto-expansion are now active.**")
+finally:
+    finish_rerun_profile()
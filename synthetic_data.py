@@ -0,0 +1,437 @@
+# synthetic_data.py
+
+"""
+Seeded synthetic inputs for load testing.
+
+Three generators, each yielding DataFrame chunks so any size can be
+streamed to disk without being held in memory:
+
+- dsr_catalogue    full-scale DSR / SoR catalogue in the dsr_items.csv
+                   layout (code, description, unit, rate): hierarchical
+                   chapter.item.sub-item codes, optional heading rows,
+                   CPWD-length descriptions and a per-chapter unit mix
+- takeoff_elements CAD / BIM element schedules for takeoff_import
+                   (element type, dimensions, count, level, building)
+                   with per-element dimension distributions
+- estimate_items   QTO item records in the st.session_state.qto_items
+                   layout, spread over buildings, floors and phases
+
+The same seed and chunk size always give the same rows.
+
+    python synthetic_data.py dsr --rows 50000 --out dsr_50k.csv --headings
+    python synthetic_data.py takeoff --rows 200000 --buildings 4 --floors 12 --out schedule.csv
+    python synthetic_data.py estimate --rows 1000000 --out estimate.parquet
+"""
+
+from __future__ import annotations
+
+import argparse
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Iterable, Iterator, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+try:  # optional: Parquet output
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:  # pragma: no cover - depends on environment
+    pa = pq = None
+
+DEFAULT_CHUNKSIZE = 50_000
+
+
+# ---------------------------------------------------------------------------
+# DSR vocabulary
+# ---------------------------------------------------------------------------
+
+@dataclass(frozen=True)
+class Chapter:
+    no: int
+    title: str
+    phase: str
+    category: str
+    units: Tuple[Tuple[str, float], ...]        # (unit, share)
+    rate_range: Tuple[float, float]             # typical rate band (₹)
+    words: Tuple[str, ...]
+
+
+CHAPTERS: Tuple[Chapter, ...] = (
+    Chapter(2, "Earth work in excavation", "1️⃣ SUBSTRUCTURE", "earthwork", (("Cum", 0.85), ("Sqm", 0.15)),
+            (60, 900), ("excavation", "trenches", "hard soil", "ordinary rock", "lead", "lift", "disposal",
+                        "dressing", "ramming", "filling", "foundation", "mechanical means")),
+    Chapter(4, "Plain cement concrete", "1️⃣ SUBSTRUCTURE", "pcc", (("Cum", 1.0),),
+            (4200, 7500), ("cement", "coarse sand", "graded stone aggregate", "nominal size", "foundation",
+                           "plinth", "compaction", "curing", "1:4:8", "1:3:6", "1:2:4")),
+    Chapter(5, "Reinforced cement concrete", "3️⃣ SUPERSTRUCTURE", "rcc_concrete",
+            (("Cum", 0.55), ("Kg", 0.2), ("Sqm", 0.25)),
+            (80, 11000), ("design mix", "M25", "M30", "columns", "beams", "slabs", "shuttering", "centering",
+                          "reinforcement", "TMT bars", "admixture", "pumping", "levels", "vibrating")),
+    Chapter(6, "Brick work", "3️⃣ SUPERSTRUCTURE", "brickwork", (("Cum", 0.75), ("Sqm", 0.25)),
+            (900, 7800), ("fly ash bricks", "class designation 7.5", "cement mortar", "1:6", "1:4",
+                          "superstructure", "half brick", "plinth level", "floor five level")),
+    Chapter(9, "Wood and PVC work", "4️⃣ FINISHING", "joinery", (("Sqm", 0.6), ("Nos", 0.4)),
+            (150, 9500), ("flush door shutters", "frames", "hardwood", "PVC", "hinges", "tower bolts",
+                          "handles", "decorative", "solid core", "fixing")),
+    Chapter(10, "Steel work", "3️⃣ SUPERSTRUCTURE", "steel", (("Kg", 0.8), ("Sqm", 0.2)),
+            (90, 2500), ("structural steel", "welded", "bolted", "trusses", "grills", "priming coat",
+                         "hoisting", "cutting", "fixing in position")),
+    Chapter(11, "Flooring", "4️⃣ FINISHING", "flooring", (("Sqm", 0.9), ("Rmt", 0.1)),
+            (300, 3500), ("vitrified tiles", "600x600 mm", "kota stone", "granite", "skirting", "dado",
+                          "cement mortar bed", "joints", "polishing", "matching pigment")),
+    Chapter(13, "Finishing", "4️⃣ FINISHING", "plaster", (("Sqm", 1.0),),
+            (60, 650), ("plaster", "12 mm", "15 mm", "cement mortar", "wall putty", "acrylic emulsion",
+                        "primer", "two coats", "smooth finish", "exterior", "internal")),
+    Chapter(18, "Water supply", "4️⃣ FINISHING", "plumbing", (("m", 0.6), ("Nos", 0.4)),
+            (40, 6000), ("CPVC pipes", "fittings", "GI pipes", "ball valve", "testing", "clamps",
+                         "trenching", "refilling", "jointing")),
+    Chapter(22, "Waterproofing", "4️⃣ FINISHING", "waterproofing", (("Sqm", 1.0),),
+            (200, 1400), ("bitumen", "membrane", "APP modified", "terrace", "brick bat coba", "slope",
+                          "integral compound", "protective layer")),
+)
+CHAPTER_SHARE = np.array([0.12, 0.06, 0.18, 0.1, 0.1, 0.08, 0.12, 0.12, 0.07, 0.05])
+
+FILLER = np.array(
+    ["including", "all", "complete", "as per", "direction of", "Engineer-in-charge", "with", "and",
+     "of", "the", "in", "to", "for", "all leads and lifts", "at all heights", "required", "specified"]
+)
+DESCRIPTION_WORDS = (30.0, 0.45)    # lognormal median word count and spread (CPWD items run long)
+
+
+ITEM_BLOCK = 1024                   # items generated per vectorised block
+
+
+def _vocabulary() -> Tuple[np.ndarray, np.ndarray]:
+    """Chapter topic words as a padded 2-D array plus the word count per chapter."""
+    width = max(len(c.words) for c in CHAPTERS)
+    table = np.array([list(c.words) + [""] * (width - len(c.words)) for c in CHAPTERS], dtype=object)
+    return table, np.array([len(c.words) for c in CHAPTERS])
+
+
+def _unit_tables() -> Tuple[np.ndarray, np.ndarray]:
+    """Per chapter: unit names and cumulative share thresholds, padded to the widest unit mix."""
+    width = max(len(c.units) for c in CHAPTERS)
+    names = np.empty((len(CHAPTERS), width), dtype=object)
+    thresholds = np.ones((len(CHAPTERS), width - 1))     # 1.0 is never exceeded
+    for i, c in enumerate(CHAPTERS):
+        units, shares = zip(*c.units)
+        names[i] = list(units) + [units[-1]] * (width - len(units))
+        thresholds[i, : len(units) - 1] = np.cumsum(shares)[:-1]
+    return names, thresholds
+
+
+def _phrases(rng: np.random.Generator, chapter: np.ndarray, n_words: np.ndarray, topic_share: float) -> List[str]:
+    """One phrase per entry: n_words words, topic words of its chapter mixed with filler."""
+    table, sizes = _vocabulary()
+    ch = np.repeat(chapter, n_words)
+    topic = table[ch, (rng.random(len(ch)) * sizes[ch]).astype(int)]
+    filler = FILLER[rng.integers(0, len(FILLER), len(ch))]
+    words = np.where(rng.random(len(ch)) < topic_share, topic, filler)
+    ends = np.cumsum(n_words)
+    return [" ".join(words[e - k:e]) for e, k in zip(ends.tolist(), n_words.tolist())]
+
+
+def _dsr_block(rng: np.random.Generator, next_item: np.ndarray, headings: bool) -> pd.DataFrame:
+    k = ITEM_BLOCK
+    chapter = rng.choice(len(CHAPTERS), k, p=CHAPTER_SHARE)
+    # item numbers continue per chapter across blocks
+    order = np.argsort(chapter, kind="stable")
+    first = np.searchsorted(chapter[order], np.arange(len(CHAPTERS)))
+    rank = np.empty(k, dtype=int)
+    rank[order] = np.arange(k) - first[chapter[order]]
+    item_no = next_item[chapter] + rank
+    next_item += np.bincount(chapter, minlength=len(CHAPTERS))
+
+    unit_names, thresholds = _unit_tables()
+    unit_ix = (rng.random(k)[:, None] > thresholds[chapter]).sum(axis=1)
+    unit = unit_names[chapter, unit_ix]
+    lo, hi = np.log(np.array([c.rate_range for c in CHAPTERS])).T
+    base_rate = np.exp(rng.uniform(lo[chapter], hi[chapter]))
+    titles = np.array([c.title + " " for c in CHAPTERS], dtype=object)
+    n_words = np.clip(rng.lognormal(np.log(DESCRIPTION_WORDS[0]), DESCRIPTION_WORDS[1], k), 6, 120).astype(int)
+    heading = titles[chapter] + np.array(_phrases(rng, chapter, n_words, 0.45), dtype=object)
+
+    subs = rng.integers(1, 9, k)
+    row_item = np.repeat(np.arange(k), subs)
+    sub_no = np.arange(len(row_item)) - np.repeat(np.cumsum(subs) - subs, subs) + 1
+    spec = np.array(_phrases(rng, chapter[row_item], rng.integers(2, 7, len(row_item)), 1.0), dtype=object)
+    rate = (base_rate[row_item] * rng.uniform(0.8, 1.6, len(row_item)) * (1 + 0.05 * sub_no)).round(2)
+    item_code = np.array([f"{CHAPTERS[c].no}.{i}" for c, i in zip(chapter.tolist(), item_no.tolist())], dtype=object)
+
+    subs_df = pd.DataFrame(
+        {
+            "code": item_code[row_item] + "." + sub_no.astype(str).astype(object),
+            "description": spec if headings else heading[row_item] + " - " + spec,
+            "unit": unit[row_item],
+            "rate": rate,
+            "_item": row_item,
+        }
+    )
+    if not headings:
+        return subs_df.drop(columns="_item")
+    heads = pd.DataFrame(
+        {"code": item_code, "description": heading, "unit": unit, "rate": "", "_item": np.arange(k) - 0.5}
+    )
+    out = pd.concat([heads, subs_df.assign(rate=subs_df["rate"].astype(str))], ignore_index=True)
+    return out.sort_values("_item", kind="stable").drop(columns="_item").reset_index(drop=True)
+
+
+def dsr_catalogue(
+    rows: int,
+    seed: int = 0,
+    *,
+    headings: bool = False,
+    chunksize: int = DEFAULT_CHUNKSIZE,
+) -> Iterator[pd.DataFrame]:
+    """
+    DSR rows (code, description, unit, rate) in chunks.
+
+    Items are numbered chapter.item.sub (e.g. 5.37.4), 1-8 sub-items per
+    item. With headings=True each item also gets a heading row (code,
+    description, no unit / rate) as in converted CPWD PDFs; these count
+    towards `rows`. Rows are generated in fixed item blocks, so the
+    output does not depend on chunksize.
+    """
+    rng = np.random.default_rng(seed)
+    next_item = np.ones(len(CHAPTERS), dtype=int)
+    buffered: List[pd.DataFrame] = []
+    held = emitted = 0
+    while emitted < rows:
+        while held < chunksize and emitted + held < rows:
+            block = _dsr_block(rng, next_item, headings)
+            buffered.append(block)
+            held += len(block)
+        pending = pd.concat(buffered, ignore_index=True)
+        n = min(chunksize, rows - emitted)
+        yield pending.iloc[:n].reset_index(drop=True)
+        emitted += n
+        buffered, held = [pending.iloc[n:]], len(pending) - n
+
+
+# ---------------------------------------------------------------------------
+# Element schedules
+# ---------------------------------------------------------------------------
+
+# element type, share, (length, width, height) samplers; "storey" = floor height
+ELEMENT_MIX: Tuple[Tuple[str, float], ...] = (
+    ("IfcColumn", 0.18), ("IfcBeam", 0.2), ("IfcSlab", 0.1), ("IfcWall", 0.27),
+    ("IfcFooting", 0.05), ("Floor_Tile", 0.1), ("Plaster", 0.1),
+)
+STOREY_HEIGHT = (3.0, 3.6)
+SCHEDULE_COLUMNS = ("Element Type", "Length", "Width", "Height", "Nos", "Level", "Building", "Mark")
+
+
+def _level_names(floors: int) -> np.ndarray:
+    return np.array(["Ground Floor"] + [f"Floor {i}" for i in range(1, floors)])
+
+
+def _element_dims(rng: np.random.Generator, kind: np.ndarray, storey: np.ndarray) -> np.ndarray:
+    """(n, 3) length / width / height per element kind (index into ELEMENT_MIX)."""
+    n = len(kind)
+    section = np.round(rng.normal(0.38, 0.08, n).clip(0.23, 0.75) / 0.025) * 0.025
+    span = rng.lognormal(np.log(4.2), 0.3, n).clip(1.5, 9.0)
+    room_l = rng.lognormal(np.log(4.5), 0.25, n).clip(2.4, 9.0)
+    room_b = rng.lognormal(np.log(3.6), 0.25, n).clip(2.1, 7.5)
+    wall_t = np.where(rng.random(n) < 0.7, 0.23, 0.115)
+    footing = rng.uniform(1.2, 3.0, n).round(1)
+
+    length = np.select(
+        [kind == 0, kind == 1, kind == 2, kind == 3, kind == 4],
+        [section, span, room_l, room_l, footing], room_l,
+    )
+    width = np.select(
+        [kind == 0, kind == 1, kind == 2, kind == 3, kind == 4, kind == 5],
+        [section, rng.choice([0.23, 0.3], n), room_b, wall_t, footing, room_b], 0.0,
+    )
+    height = np.select(
+        [kind == 0, kind == 1, kind == 2, kind == 3, kind == 4, kind == 6],
+        [storey, rng.uniform(0.45, 0.6, n), rng.uniform(0.125, 0.2, n), storey - 0.15,
+         rng.uniform(0.3, 0.6, n), storey - 0.15], 0.0,
+    )
+    return np.column_stack([length, width, height]).round(3)
+
+
+def takeoff_elements(
+    rows: int,
+    seed: int = 0,
+    *,
+    buildings: int = 3,
+    floors: int = 8,
+    chunksize: int = DEFAULT_CHUNKSIZE,
+) -> Iterator[pd.DataFrame]:
+    """
+    Element schedule rows (SCHEDULE_COLUMNS) for takeoff_import, in chunks.
+
+    Footings only occur on the ground floor; each building / level has
+    its own storey height.
+    """
+    rng = np.random.default_rng(seed)
+    types = np.array([t for t, _ in ELEMENT_MIX])
+    shares = np.array([s for _, s in ELEMENT_MIX])
+    levels = _level_names(floors)
+    blocks = np.array([f"Block {chr(65 + i % 26)}{i // 26 or ''}" for i in range(buildings)])
+    storeys = rng.uniform(*STOREY_HEIGHT, (buildings, floors)).round(2)
+
+    for start in range(0, rows, chunksize):
+        n = min(chunksize, rows - start)
+        kind = rng.choice(len(types), n, p=shares)
+        b = rng.integers(0, buildings, n)
+        f = np.where(kind == 4, 0, rng.integers(0, floors, n))
+        dims = _element_dims(rng, kind, storeys[b, f])
+        count = np.where(rng.random(n) < 0.8, 1, rng.integers(2, 6, n))
+        yield pd.DataFrame(
+            {
+                "Element Type": types[kind],
+                "Length": dims[:, 0],
+                "Width": dims[:, 1],
+                "Height": dims[:, 2],
+                "Nos": count,
+                "Level": levels[f],
+                "Building": blocks[b],
+                "Mark": np.char.add("E", np.arange(start + 1, start + n + 1).astype(str)),
+            },
+            columns=list(SCHEDULE_COLUMNS),
+        )
+
+
+# ---------------------------------------------------------------------------
+# Estimate items
+# ---------------------------------------------------------------------------
+
+ESTIMATE_COLUMNS = (
+    "id", "building", "floor", "phase", "item", "dsr_code", "length", "breadth", "depth",
+    "quantity", "unit", "rate", "amount", "category",
+)
+
+
+def estimate_items(
+    rows: int,
+    seed: int = 0,
+    *,
+    buildings: int = 3,
+    floors: int = 8,
+    catalogue_rows: int = 2_000,
+    chunksize: int = DEFAULT_CHUNKSIZE,
+) -> Iterator[pd.DataFrame]:
+    """
+    QTO item records (ESTIMATE_COLUMNS) priced from a synthetic catalogue
+    of catalogue_rows items; quantity follows the item's unit (L x B x D
+    for Cum, L x B for Sqm, a lognormal weight / count otherwise).
+    """
+    rng = np.random.default_rng(seed + 1)
+    cat = pd.concat(dsr_catalogue(catalogue_rows, seed), ignore_index=True)
+    chapter = cat["code"].str.partition(".")[0].astype(int)
+    by_no = {c.no: c for c in CHAPTERS}
+    phase = chapter.map({k: c.phase for k, c in by_no.items()}).to_numpy()
+    category = chapter.map({k: c.category for k, c in by_no.items()}).to_numpy()
+    name = (cat["description"].str.slice(0, 60) + " (" + cat["code"] + ")").to_numpy()
+    code, unit, rate = cat["code"].to_numpy(), cat["unit"].to_numpy(), cat["rate"].to_numpy(float)
+    levels = _level_names(floors)
+    blocks = np.array([f"Block {chr(65 + i % 26)}{i // 26 or ''}" for i in range(buildings)])
+
+    for start in range(0, rows, chunksize):
+        n = min(chunksize, rows - start)
+        pick = rng.integers(0, len(cat), n)
+        L = rng.lognormal(np.log(4.0), 0.5, n).clip(0.3, 30.0).round(3)
+        B = rng.lognormal(np.log(1.5), 0.7, n).clip(0.1, 12.0).round(3)
+        D = rng.lognormal(np.log(0.4), 0.6, n).clip(0.05, 4.0).round(3)
+        u = unit[pick]
+        qty = np.select(
+            [u == "Cum", u == "Sqm", (u == "m") | (u == "Rmt"), u == "Kg"],
+            [L * B * D, L * B, L, rng.lognormal(np.log(400.0), 0.8, n)],
+            rng.integers(1, 25, n),
+        ).round(3)
+        dim = (u == "Cum") | (u == "Sqm") | (u == "m") | (u == "Rmt")
+        yield pd.DataFrame(
+            {
+                "id": np.arange(start + 1, start + n + 1),
+                "building": blocks[rng.integers(0, buildings, n)],
+                "floor": levels[rng.integers(0, floors, n)],
+                "phase": phase[pick],
+                "item": name[pick],
+                "dsr_code": code[pick],
+                "length": np.where(dim, L, 0.0),
+                "breadth": np.where((u == "Cum") | (u == "Sqm"), B, 0.0),
+                "depth": np.where(u == "Cum", D, 0.0),
+                "quantity": qty,
+                "unit": u,
+                "rate": rate[pick],
+                "amount": (qty * rate[pick]).round(2),
+                "category": category[pick],
+            },
+            columns=list(ESTIMATE_COLUMNS),
+        )
+
+
+def estimate_records(rows: int, seed: int = 0, **kwargs) -> List[dict]:
+    """estimate_items() as a list of item dicts (the app's qto_items shape)."""
+    return [rec for chunk in estimate_items(rows, seed, **kwargs) for rec in chunk.to_dict("records")]
+
+
+# ---------------------------------------------------------------------------
+# Writing
+# ---------------------------------------------------------------------------
+
+def parquet_available() -> bool:
+    return pq is not None
+
+
+def write_chunks(chunks: Iterable[pd.DataFrame], path: str | Path, fmt: Optional[str] = None) -> int:
+    """
+    Stream chunks to CSV or Parquet (by suffix unless fmt is given);
+    returns the number of rows written.
+    """
+    path = Path(path)
+    fmt = fmt or ("parquet" if path.suffix.lower() in (".parquet", ".pq") else "csv")
+    if fmt == "parquet" and not parquet_available():
+        raise ImportError("Parquet output needs pyarrow (pip install pyarrow)")
+    if fmt not in ("csv", "parquet"):
+        raise ValueError(f"Unknown output format {fmt!r}")
+
+    written = 0
+    writer = None
+    try:
+        for i, chunk in enumerate(chunks):
+            if fmt == "csv":
+                chunk.to_csv(path, mode="w" if i == 0 else "a", header=i == 0, index=False)
+            else:
+                table = pa.Table.from_pandas(chunk, preserve_index=False)
+                if writer is None:
+                    writer = pq.ParquetWriter(path, table.schema)
+                writer.write_table(table.cast(writer.schema))
+            written += len(chunk)
+    finally:
+        if writer is not None:
+            writer.close()
+    return written
+
+
+def main(argv=None) -> None:
+    ap = argparse.ArgumentParser(description="Generate seeded synthetic DSR / take-off / estimate data.")
+    ap.add_argument("kind", choices=["dsr", "takeoff", "estimate"])
+    ap.add_argument("--rows", type=int, required=True)
+    ap.add_argument("--out", type=Path, required=True, help=".csv or .parquet")
+    ap.add_argument("--seed", type=int, default=0)
+    ap.add_argument("--chunksize", type=int, default=DEFAULT_CHUNKSIZE)
+    ap.add_argument("--buildings", type=int, default=3)
+    ap.add_argument("--floors", type=int, default=8)
+    ap.add_argument("--headings", action="store_true", help="dsr: emit item heading rows")
+    args = ap.parse_args(argv)
+
+    if args.kind == "dsr":
+        chunks = dsr_catalogue(args.rows, args.seed, headings=args.headings, chunksize=args.chunksize)
+    elif args.kind == "takeoff":
+        chunks = takeoff_elements(
+            args.rows, args.seed, buildings=args.buildings, floors=args.floors, chunksize=args.chunksize
+        )
+    else:
+        chunks = estimate_items(
+            args.rows, args.seed, buildings=args.buildings, floors=args.floors, chunksize=args.chunksize
+        )
+    n = write_chunks(chunks, args.out)
+    print(f"{n:,d} {args.kind} rows -> {args.out}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,433 @@
+# takeoff_import.py
+
+"""
+Bulk import of element schedules exported from CAD / BIM (IFC, DXF).
+
+Drafting tools export one row per element (or per element type with a
+count): element type, dimensions, level and count. TakeoffImporter
+streams such a CSV in fixed-size chunks and, per chunk, in one
+vectorised pass:
+
+- resolves column names ("Element Type", "IfcType", "Level", "Nos", ...)
+- maps element types to catalogue items (CPWD_BASE_DSR_2023 names) via
+  an element map ("ifccolumn", "column", "col" -> RCC M25 Column ...)
+- validates dimensions (unparseable, negative, missing for the item's
+  measurement type, implausibly large - usually a schedule in mm)
+- measures quantities the IS 1200 way: volume items L x B x D, area
+  items L x B (L x D for vertical finishes exported with a height),
+  times the element count; RCC concrete also gets its formwork area
+  from the engine's formwork helpers, called once per chunk with whole
+  dimension arrays (is1200_rules.IS1200Engine and the app's own
+  IS1200Engine both accept arrays)
+- reports every rejected row and every unmapped element type
+
+The catalogue and the IS 1200 engine are passed in, so the importer
+has no dependency on the app. Rows can be consumed chunk by chunk
+(iter_chunks) or summarised to one row per building / floor / item
+(summarise), which keeps a 200k-element schedule down to a handful of
+SOQ lines without holding the file in memory.
+
+    >>> import io, is1200_rules
+    >>> catalogue = {"RCC M25 Column (13.2.1)": {"code": "13.2.1", "unit": "cum",
+    ...                                          "type": "volume", "category": "rcc_concrete"}}
+    >>> schedule = "Element Type,Length,Width,Height,Count\\nIfcColumn,0.3,0.3,3,2\\n"
+    >>> for engine in (None, is1200_rules.IS1200Engine):
+    ...     soq = TakeoffImporter(io.StringIO(schedule), catalogue, engine=engine).summarise()
+    ...     print(soq.loc[0, ["count", "quantity", "formwork_area"]].round(3).tolist())
+    ...
+    [2.0, 0.54, 0.0]
+    [2.0, 0.54, 7.2]
+"""
+
+from __future__ import annotations
+
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import IO, Dict, Iterator, List, Mapping, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from phases_structure import classify_many
+
+
+# ---------------------------------------------------------------------------
+# Vocabulary
+# ---------------------------------------------------------------------------
+
+COLUMN_ALIASES: Dict[str, Tuple[str, ...]] = {
+    "element_type": ("element type", "element_type", "type", "ifctype", "ifc type", "ifc class",
+                     "family", "category", "layer", "block", "element"),
+    "length": ("length", "len", "l", "length (m)", "span"),
+    "breadth": ("breadth", "width", "b", "w", "breadth (m)", "width (m)"),
+    "depth": ("depth", "height", "thickness", "d", "h", "depth (m)", "height (m)"),
+    "count": ("count", "nos", "no", "no.", "qty", "quantity", "number"),
+    "level": ("level", "floor", "storey", "building storey"),
+    "building": ("building", "block name", "building / block"),
+    "mark": ("mark", "tag", "element id", "guid", "globalid", "handle"),
+}
+REQUIRED_COLUMNS = ("element_type", "length")
+DIMENSIONS = ("length", "breadth", "depth")
+
+# Normalised element type -> catalogue item name
+DEFAULT_ELEMENT_MAP: Dict[str, str] = {
+    **dict.fromkeys(("ifcfooting", "footing", "isolated footing", "foundation"), "RCC M25 Footing (13.1.1)"),
+    **dict.fromkeys(("ifccolumn", "column", "col", "rcc column"), "RCC M25 Column (13.2.1)"),
+    **dict.fromkeys(("ifcbeam", "beam", "plinth beam", "lintel", "rcc beam"), "RCC M25 Beam (13.3.1)"),
+    **dict.fromkeys(("ifcslab", "slab", "floor slab", "roof slab", "rcc slab"), "RCC M25 Slab 150mm (13.4.1)"),
+    **dict.fromkeys(("ifcwall", "ifcwallstandardcase", "wall", "brick wall", "masonry wall"),
+                    "Brickwork 230mm (6.1.1)"),
+    **dict.fromkeys(("excavation", "pit", "trench"), "Earthwork in Excavation (2.5.1)"),
+    **dict.fromkeys(("pcc", "blinding", "pcc bed"), "PCC 1:2:4 (M15) (5.2.1)"),
+    **dict.fromkeys(("plaster", "wall plaster"), "Plaster 12mm 1:6 (11.1.1)"),
+    **dict.fromkeys(("putty", "wall putty"), "Wall putty 2 mm average thickness"),
+    **dict.fromkeys(("ifccovering", "flooring", "floor tile", "tiles"), "Vitrified Tiles 600x600 (14.1.1)"),
+    **dict.fromkeys(("paint", "painting", "exterior paint"), "Exterior Acrylic Paint (15.8.1)"),
+}
+
+DIMENSION_SCALE = {"m": 1.0, "cm": 0.01, "mm": 0.001}
+MAX_DIMENSION_M = 100.0          # one element longer than this is almost always a unit mistake
+
+OUTPUT_COLUMNS = (
+    "row_no", "mark", "element_type", "building", "floor", "item", "dsr_code", "category",
+    "length", "breadth", "depth", "count", "quantity", "unit", "formwork_area",
+)
+
+
+class TakeoffImportError(ValueError):
+    """Raised when a schedule cannot be imported at all (missing columns, bad element map)."""
+
+
+def normalise_element_types(types: pd.Series) -> pd.Series:
+    """Lower-case, trim and collapse separators so "Floor_Slab" and "floor slab" match."""
+    return types.str.lower().str.replace(r"[\s_\-]+", " ", regex=True).str.strip()
+
+
+# ---------------------------------------------------------------------------
+# Report containers
+# ---------------------------------------------------------------------------
+
+@dataclass
+class TakeoffReject:
+    """One rejected schedule row (row_no is 1-based, excluding the header)."""
+
+    row_no: int
+    element_type: str
+    reason: str
+
+
+@dataclass
+class TakeoffImportReport:
+    """Summary of one import run."""
+
+    source: str
+    rows_read: int = 0
+    rows_accepted: int = 0
+    elements_accepted: float = 0.0
+    chunks: int = 0
+    rejects: List[TakeoffReject] = field(default_factory=list)
+    reject_count: int = 0
+    # element type (as written) -> [rows, elements, first row_no]
+    unmapped: Dict[str, List[float]] = field(default_factory=dict)
+
+    def rejects_frame(self) -> pd.DataFrame:
+        """Row-level rejects (row_no, element_type, reason); capped at max_rejects rows."""
+        return pd.DataFrame(
+            [r.__dict__ for r in self.rejects], columns=["row_no", "element_type", "reason"]
+        ).sort_values("row_no", kind="stable", ignore_index=True)
+
+    def unmapped_frame(self) -> pd.DataFrame:
+        """One row per unmapped element type, most frequent first."""
+        df = pd.DataFrame(
+            [(t, int(r), float(n), int(first)) for t, (r, n, first) in self.unmapped.items()],
+            columns=["element_type", "rows", "elements", "first_row"],
+        )
+        return df.sort_values(["rows", "element_type"], ascending=[False, True], ignore_index=True)
+
+    def summary(self) -> Dict[str, int | str | float]:
+        return {
+            "source": self.source,
+            "rows_read": self.rows_read,
+            "rows_accepted": self.rows_accepted,
+            "elements_accepted": self.elements_accepted,
+            "rejects": self.reject_count,
+            "unmapped_types": len(self.unmapped),
+            "unmapped_rows": int(sum(r for r, _, _ in self.unmapped.values())),
+            "chunks": self.chunks,
+        }
+
+
+# ---------------------------------------------------------------------------
+# Importer
+# ---------------------------------------------------------------------------
+
+class TakeoffImporter:
+    """
+    Chunked element-schedule reader.
+
+    Parameters
+    ----------
+    source : str, Path or binary/text file object
+        CSV schedule (an uploaded file works as-is).
+    catalogue : mapping
+        Item name -> {"code", "unit", "type", "category", ...}, e.g. CPWD_BASE_DSR_2023.
+    element_map : mapping, optional
+        Extra / overriding element type -> item name entries (merged over
+        DEFAULT_ELEMENT_MAP; keys are normalised).
+    engine : optional
+        Class with IS 1200 formwork helpers (formwork_column_area,
+        formwork_beam_area, formwork_slab_area) that take numpy arrays,
+        e.g. is1200_rules.IS1200Engine; without it no formwork area is
+        computed.
+    dimension_unit : "m", "cm" or "mm"
+        Unit of the schedule's dimension columns.
+    building, floor : str
+        Defaults for rows without a building / level.
+    chunksize : int
+        Rows parsed per chunk (bounds peak memory).
+    max_rejects : int
+        Rejects kept in the report; further rejects are only counted.
+    """
+
+    def __init__(
+        self,
+        source: str | Path | IO,
+        catalogue: Mapping[str, Mapping],
+        element_map: Optional[Mapping[str, str]] = None,
+        *,
+        engine=None,
+        dimension_unit: str = "m",
+        building: str = "Main Building",
+        floor: str = "Ground Floor",
+        chunksize: int = 50_000,
+        max_rejects: int = 10_000,
+        encoding: str = "utf-8-sig",
+    ):
+        if dimension_unit not in DIMENSION_SCALE:
+            raise TakeoffImportError(f"Unknown dimension unit {dimension_unit!r} (use m, cm or mm)")
+        self.source = source
+        self.catalogue = catalogue
+        self.engine = engine
+        self.scale = DIMENSION_SCALE[dimension_unit]
+        self.building = building
+        self.floor = floor
+        self.chunksize = max(int(chunksize), 1)
+        self.max_rejects = max_rejects
+        self.encoding = encoding
+        name = getattr(source, "name", source)
+        self.report = TakeoffImportReport(source=str(name))
+
+        # defaults pointing at items the catalogue lacks are dropped; explicit entries must resolve
+        custom = {k: v for k, v in (element_map or {}).items()}
+        missing = sorted({v for v in custom.values() if v not in catalogue})
+        if missing:
+            raise TakeoffImportError(f"Element map refers to items not in the catalogue: {missing}")
+        merged = {k: v for k, v in DEFAULT_ELEMENT_MAP.items() if v in catalogue}
+        merged.update(custom)
+        self.element_map = dict(zip(normalise_element_types(pd.Series(list(merged), dtype=str)), merged.values()))
+        self._kind = {name: catalogue[name].get("type", "volume") for name in merged.values()}
+        self._rcc = {name: catalogue[name].get("category") == "rcc_concrete" for name in merged.values()}
+
+    # -----------------------------
+    # Reading
+    # -----------------------------
+    def _rewind(self) -> None:
+        if hasattr(self.source, "seek"):
+            self.source.seek(0)
+
+    def _resolve_columns(self) -> Dict[str, str]:
+        """Map canonical names to the header names actually present in the file."""
+        self._rewind()
+        header = pd.read_csv(self.source, nrows=0, encoding=self.encoding).columns
+        lookup = {str(c).lower().strip(): c for c in header}
+        resolved: Dict[str, str] = {}
+        for canon, aliases in COLUMN_ALIASES.items():
+            for alias in aliases:
+                if alias in lookup and lookup[alias] not in resolved.values():
+                    resolved[canon] = lookup[alias]
+                    break
+        missing = set(REQUIRED_COLUMNS) - set(resolved)
+        if missing:
+            raise TakeoffImportError(f"{self.report.source} is missing columns: {sorted(missing)}")
+        return resolved
+
+    # -----------------------------
+    # Reject / unmapped bookkeeping
+    # -----------------------------
+    def _reject(self, rows: pd.DataFrame, reason: str) -> None:
+        if rows.empty:
+            return
+        self.report.reject_count += len(rows)
+        room = max(self.max_rejects - len(self.report.rejects), 0)
+        for row_no, etype in zip(rows["row_no"].head(room), rows["element_type"].head(room)):
+            self.report.rejects.append(TakeoffReject(int(row_no), etype, reason))
+
+    def _note_unmapped(self, rows: pd.DataFrame) -> None:
+        if rows.empty:
+            return
+        grouped = rows.groupby("element_type", sort=False).agg(
+            rows=("row_no", "size"), elements=("count", "sum"), first=("row_no", "min")
+        )
+        for etype, r, n, first in grouped.itertuples(name=None):
+            acc = self.report.unmapped.setdefault(etype, [0, 0.0, first])
+            acc[0] += r
+            acc[1] += n
+
+    # -----------------------------
+    # Chunk processing
+    # -----------------------------
+    def _measure(self, df: pd.DataFrame, item: pd.Series) -> Tuple[np.ndarray, np.ndarray, pd.Series]:
+        """Per-element quantity, formwork area and a reject reason ("" if valid)."""
+        kind = item.map(self._kind)
+        L, B, D = (df[c].to_numpy(float) for c in DIMENSIONS)
+
+        is_volume = (kind == "volume").to_numpy()
+        is_area = (kind == "area").to_numpy()
+        face = np.where(B > 0, B, D)                   # vertical finishes come as length x height
+
+        reason = np.select(
+            [
+                is_volume & ((L <= 0) | (B <= 0) | (D <= 0)),
+                is_area & ((L <= 0) | (face <= 0)),
+                ~(is_volume | is_area),
+                np.maximum(np.maximum(L, B), D) > MAX_DIMENSION_M,
+            ],
+            [
+                "volume item needs length, breadth and depth",
+                "area item needs length and breadth (or height)",
+                "item is not measured by dimensions",
+                f"dimension above {MAX_DIMENSION_M:g} m (schedule in mm?)",
+            ],
+            "",
+        )
+        quantity = np.select([is_volume, is_area], [L * B * D, L * face], 0.0)
+
+        formwork = np.zeros(len(df))
+        if self.engine is not None:
+            rcc = item.map(self._rcc).to_numpy(bool)
+            beam = rcc & item.str.contains("Beam", regex=False).to_numpy(bool)
+            slab = rcc & item.str.contains("Slab", regex=False).to_numpy(bool)
+            other = rcc & ~beam & ~slab            # columns and footings: four vertical faces
+            formwork = np.select(
+                [beam, slab, other],
+                [
+                    self.engine.formwork_beam_area(B, D, L),
+                    self.engine.formwork_slab_area(L, B),
+                    self.engine.formwork_column_area(L, B, D),
+                ],
+                0.0,
+            )
+        return quantity, formwork, pd.Series(reason, index=df.index)
+
+    def _process(self, chunk: pd.DataFrame) -> pd.DataFrame:
+        # dimensions and count
+        raw = {c: chunk[c].str.replace(",", "", regex=False) for c in (*DIMENSIONS, "count")}
+        nums = {c: pd.to_numeric(raw[c], errors="coerce") for c in raw}
+        blank = {c: raw[c] == "" for c in raw}
+
+        bad_num = pd.Series(False, index=chunk.index)
+        for c in raw:
+            bad_num |= nums[c].isna() & ~blank[c]
+        self._reject(chunk[bad_num], "unparseable dimension or count")
+
+        df = chunk.assign(
+            **{c: nums[c].fillna(0.0) * self.scale for c in DIMENSIONS},
+            count=nums["count"].where(~blank["count"], 1.0),
+        )[~bad_num]
+        negative = (df[list(DIMENSIONS)] < 0).any(axis=1)
+        self._reject(df[negative], "negative dimension")
+        bad_count = ~negative & ((df["count"] <= 0) | (df["count"] % 1 != 0))
+        self._reject(df[bad_count], "count must be a positive whole number")
+        df = df[~negative & ~bad_count]
+
+        # element type -> item
+        no_type = df["element_type"] == ""
+        self._reject(df[no_type], "missing element type")
+        df = df[~no_type]
+        item = normalise_element_types(df["element_type"]).map(self.element_map)
+        self._note_unmapped(df[item.isna()])
+        df, item = df[item.notna()], item[item.notna()]
+        if df.empty:
+            return pd.DataFrame(columns=list(OUTPUT_COLUMNS))
+
+        quantity, formwork, reason = self._measure(df, item)
+        for text in reason[reason != ""].unique():
+            self._reject(df[reason == text], text)
+        ok = (reason == "").to_numpy()
+        df, item = df[ok], item[ok]
+        count = df["count"].to_numpy(float)
+
+        meta = pd.DataFrame.from_dict(
+            {name: self.catalogue[name] for name in item.unique()}, orient="index"
+        ).reindex(columns=["code", "unit", "category"])
+        out = pd.DataFrame(
+            {
+                "row_no": df["row_no"],
+                "mark": df["mark"],
+                "element_type": df["element_type"],
+                "building": df["building"].where(df["building"] != "", self.building),
+                "floor": df["level"].where(df["level"] != "", self.floor),
+                "item": item,
+                "dsr_code": item.map(meta["code"]).astype(str),
+                "category": item.map(meta["category"]).fillna("").astype(str),
+                "length": df["length"],
+                "breadth": df["breadth"],
+                "depth": df["depth"],
+                "count": count,
+                "quantity": quantity[ok] * count,
+                "unit": item.map(meta["unit"]).astype(str),
+                "formwork_area": formwork[ok] * count,
+            },
+            columns=list(OUTPUT_COLUMNS),
+        )
+        self.report.rows_accepted += len(out)
+        self.report.elements_accepted += float(count.sum())
+        return out
+
+    # -----------------------------
+    # Public API
+    # -----------------------------
+    def iter_chunks(self) -> Iterator[pd.DataFrame]:
+        """Yield accepted, measured rows (OUTPUT_COLUMNS) chunk by chunk."""
+        cols = self._resolve_columns()
+        rename = {src: canon for canon, src in cols.items()}
+        self._rewind()
+        reader = pd.read_csv(
+            self.source,
+            usecols=list(cols.values()),
+            dtype=str,
+            keep_default_na=False,
+            chunksize=self.chunksize,
+            encoding=self.encoding,
+            encoding_errors="replace",
+            skipinitialspace=True,
+        )
+        row_no = 0
+        for chunk in reader:
+            chunk = chunk.rename(columns=rename).reindex(columns=list(COLUMN_ALIASES), fill_value="")
+            chunk = chunk.apply(lambda s: s.astype(str).str.strip())
+            chunk.insert(0, "row_no", range(row_no + 1, row_no + len(chunk) + 1))
+            row_no += len(chunk)
+            self.report.rows_read += len(chunk)
+            self.report.chunks += 1
+            out = self._process(chunk)
+            if not out.empty:
+                yield out
+
+    def summarise(self) -> pd.DataFrame:
+        """
+        One row per building / floor / item with summed count, quantity
+        and formwork area; only the running group sums are kept in memory.
+        Each line also gets the WBS code of the phase its item classifies
+        to (phases_structure.classify_many).
+        """
+        keys = ["building", "floor", "item", "dsr_code", "category", "unit"]
+        values = ["count", "quantity", "formwork_area"]
+        acc: Optional[pd.DataFrame] = None
+        for chunk in self.iter_chunks():
+            part = chunk.groupby(keys, sort=False)[values].sum()
+            acc = part if acc is None else pd.concat([acc, part]).groupby(level=keys, sort=False).sum()
+        if acc is None:
+            return pd.DataFrame(columns=keys + values + ["wbs_code"])
+        soq = acc.reset_index()
+        return soq.assign(wbs_code=classify_many(soq["item"])["wbs_code"])
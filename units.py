@@ -0,0 +1,209 @@
+# units.py
+
+"""
+Unit registry for DSR / SoR / IS 1200 quantities.
+
+Units arrive spelt many ways ("Cum", "cum", "m3", "cu.m.", "Sqm",
+"sq.m", "Kg", ...). The registry is compiled once at import time into
+an alias table, so every lookup is a single dict hit and hot paths can
+work on small integer unit IDs instead of repeated .lower().strip()
+string comparisons.
+
+Each unit has:
+- a stable integer ID (safe to store in DataFrame columns)
+- a canonical display symbol (as used in CPWD DSR: Cum, Sqm, Kg, ...)
+- a dimension and a factor to the dimension's base unit, for conversions
+  such as tonne <-> kg or rmt <-> m
+- IS 1200 rounding decimals
+"""
+
+from __future__ import annotations
+
+from dataclasses import dataclass
+from typing import Dict, Iterable, Tuple
+
+import numpy as np
+import pandas as pd
+
+
+class UnitConversionError(ValueError):
+    """Raised when converting between units of different dimensions."""
+
+
+@dataclass(frozen=True)
+class UnitDef:
+    uid: int
+    symbol: str
+    dimension: str
+    to_base: float          # multiply by this to get the dimension's base unit
+    decimals: int           # IS 1200 rounding
+    aliases: Tuple[str, ...] = ()
+
+
+# IDs are persisted in coded columns – append new units, never renumber.
+UNKNOWN = 0
+M = 1
+RMT = 2
+SQM = 3
+CUM = 4
+KG = 5
+QUINTAL = 6
+TONNE = 7
+NOS = 8
+LITRE = 9
+LS = 10
+BAG = 11
+SQFT = 12
+CFT = 13
+DAY = 14
+HOUR = 15
+
+UNIT_DEFS: Tuple[UnitDef, ...] = (
+    UnitDef(UNKNOWN, "", "unknown", 1.0, 3),
+    UnitDef(M, "m", "length", 1.0, 2, ("m", "metre", "metres", "meter", "meters", "mtr")),
+    UnitDef(RMT, "Rmt", "length", 1.0, 2, ("rm", "rmt", "r.m", "r.mt", "running metre", "running meter")),
+    UnitDef(SQM, "Sqm", "area", 1.0, 2, ("sqm", "m2", "m²", "sq.m", "sq m", "sq.mt", "sqmt", "square metre")),
+    UnitDef(CUM, "Cum", "volume", 1.0, 3, ("cum", "m3", "m³", "cu.m", "cu m", "cu.mt", "cubic metre")),
+    UnitDef(KG, "Kg", "mass", 1.0, 2, ("kg", "kgs", "kilogram", "kilograms")),
+    UnitDef(QUINTAL, "Quintal", "mass", 100.0, 3, ("quintal", "quintals", "qtl")),
+    UnitDef(TONNE, "Tonne", "mass", 1000.0, 3, ("tonne", "tonnes", "ton", "tons", "mt", "t")),
+    UnitDef(NOS, "Nos", "count", 1.0, 3, ("no", "nos", "number", "numbers", "each", "ea")),
+    UnitDef(LITRE, "Litre", "liquid", 1.0, 3, ("litre", "litres", "liter", "ltr", "l")),
+    UnitDef(LS, "LS", "lumpsum", 1.0, 3, ("ls", "l.s", "lumpsum", "lump sum", "job")),
+    UnitDef(BAG, "Bag", "mass", 50.0, 3, ("bag", "bags")),  # 50 kg cement bag
+    UnitDef(SQFT, "Sqft", "area", 0.09290304, 2, ("sqft", "sq.ft", "sq ft", "ft2")),
+    UnitDef(CFT, "Cft", "volume", 0.028316846592, 3, ("cft", "cu.ft", "cu ft", "ft3")),
+    UnitDef(DAY, "Day", "time", 8.0, 3, ("day", "days", "man-day", "man-days", "manday")),  # 8 h working day
+    UnitDef(HOUR, "Hour", "time", 1.0, 3, ("hour", "hours", "hr", "hrs", "h")),
+)
+
+
+def _alias_key(text: str) -> str:
+    """Normal form used for alias matching: lower-case, single spaces, no trailing dots."""
+    return " ".join(str(text).lower().split()).rstrip(".")
+
+
+class UnitRegistry:
+    """
+    Compiled unit table.
+
+    Lookups (unit_id) accept any spelling; conversions and rounding use
+    the integer IDs, backed by flat numpy arrays for vectorised work.
+    """
+
+    _MEMO_LIMIT = 4096
+
+    def __init__(self, defs: Iterable[UnitDef] = UNIT_DEFS):
+        self.defs: Dict[int, UnitDef] = {d.uid: d for d in defs}
+        size = max(self.defs) + 1
+
+        self.symbols = np.array([self.defs[i].symbol if i in self.defs else "" for i in range(size)], dtype=object)
+        self.decimals = np.array([self.defs[i].decimals if i in self.defs else 3 for i in range(size)], dtype=np.int8)
+        self.to_base = np.array([self.defs[i].to_base if i in self.defs else 1.0 for i in range(size)])
+        self.dimensions = np.array(
+            [self.defs[i].dimension if i in self.defs else "unknown" for i in range(size)], dtype=object
+        )
+
+        self._aliases: Dict[str, int] = {}
+        for d in self.defs.values():
+            if d.uid == UNKNOWN:
+                continue
+            for alias in (d.symbol,) + d.aliases:
+                self._aliases[_alias_key(alias)] = d.uid
+        # Raw-spelling memo: first lookup of "Cu.M. " normalises, later ones are one dict hit
+        self._memo: Dict[str, int] = {}
+
+    # -----------------------------
+    # Scalar API
+    # -----------------------------
+    def unit_id(self, unit: str | int | None) -> int:
+        """Integer ID for a unit spelling (UNKNOWN for unrecognised or empty)."""
+        if unit is None:
+            return UNKNOWN
+        if isinstance(unit, (int, np.integer)):
+            return int(unit) if int(unit) in self.defs else UNKNOWN
+        uid = self._memo.get(unit)
+        if uid is None:
+            uid = self._aliases.get(_alias_key(unit), UNKNOWN)
+            if len(self._memo) < self._MEMO_LIMIT:
+                self._memo[unit] = uid
+        return uid
+
+    def symbol(self, unit: str | int) -> str:
+        """Canonical display symbol; unrecognised spellings are returned stripped."""
+        uid = self.unit_id(unit)
+        if uid == UNKNOWN:
+            return "" if isinstance(unit, (int, np.integer)) else str(unit).strip()
+        return self.defs[uid].symbol
+
+    def dimension(self, unit: str | int) -> str:
+        return self.defs[self.unit_id(unit)].dimension
+
+    def round_decimals(self, unit: str | int) -> int:
+        return int(self.decimals[self.unit_id(unit)])
+
+    def factor(self, from_unit: str | int, to_unit: str | int) -> float:
+        """Multiplier converting a quantity in from_unit into to_unit."""
+        a, b = self.unit_id(from_unit), self.unit_id(to_unit)
+        if a == b:
+            return 1.0
+        da, db = self.defs[a], self.defs[b]
+        if UNKNOWN in (a, b) or da.dimension != db.dimension:
+            raise UnitConversionError(
+                f"Cannot convert {from_unit!r} ({da.dimension}) to {to_unit!r} ({db.dimension})"
+            )
+        return da.to_base / db.to_base
+
+    def convert(self, value: float, from_unit: str | int, to_unit: str | int) -> float:
+        return value * self.factor(from_unit, to_unit)
+
+    # -----------------------------
+    # Vectorised API
+    # -----------------------------
+    def encode(self, units: pd.Series | Iterable[str]) -> np.ndarray:
+        """Integer-code a column of unit spellings (one lookup per distinct spelling)."""
+        codes, uniques = pd.factorize(pd.Series(units, dtype=object), use_na_sentinel=True)
+        lut = np.array([self.unit_id(u) for u in uniques] + [UNKNOWN], dtype=np.int16)
+        return lut[codes]  # sentinel -1 picks the trailing UNKNOWN
+
+    def canonical(self, units: pd.Series) -> pd.Series:
+        """Canonical display symbols; unrecognised spellings are kept (stripped)."""
+        ids = self.encode(units)
+        out = pd.Series(self.symbols[ids], index=units.index, dtype=object)
+        unknown = ids == UNKNOWN
+        if unknown.any():
+            out[unknown] = units[unknown].astype(str).str.strip()
+        return out
+
+    def round_array(self, values: np.ndarray, unit_ids: np.ndarray) -> np.ndarray:
+        """IS 1200 rounding for mixed-unit arrays (grouped by distinct decimals)."""
+        values = np.asarray(values, dtype=float)
+        dec = self.decimals[np.asarray(unit_ids)]
+        out = np.empty_like(values)
+        for d in np.unique(dec):
+            sel = dec == d
+            out[sel] = np.round(values[sel], int(d))
+        return out
+
+    def factors_to(self, unit_ids: np.ndarray, target: str | int) -> np.ndarray:
+        """
+        Per-row conversion factor into target; NaN where the dimension differs.
+        """
+        t = self.unit_id(target)
+        ids = np.asarray(unit_ids)
+        ok = (self.dimensions[ids] == self.defs[t].dimension) & (ids != UNKNOWN)
+        return np.where(ok, self.to_base[ids] / self.to_base[t], np.nan)
+
+
+# Compiled once per process
+REGISTRY = UnitRegistry()
+
+
+def unit_id(unit: str | int | None) -> int:
+    """Module-level shortcut for REGISTRY.unit_id()."""
+    return REGISTRY.unit_id(unit)
+
+
+def convert(value: float, from_unit: str | int, to_unit: str | int) -> float:
+    """Module-level shortcut for REGISTRY.convert()."""
+    return REGISTRY.convert(value, from_unit, to_unit)
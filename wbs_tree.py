@@ -0,0 +1,232 @@
+# wbs_tree.py
+
+"""
+Hierarchical WBS tree with incremental roll-ups.
+
+Levels: project → building → floor → phase → element.
+
+Nodes are integer IDs into flat lists (parent, level, name, subtotal,
+item count). Every node keeps a cached subtotal; adding, changing or
+removing an item walks only its ancestor chain (at most four steps), so
+the roll-up at any node is an O(1) read even for 100k-item estimates.
+
+The tree exports directly to the Abstract (Form 5A layout) and to the
+section totals expected by BOQGenerator.to_excel_bytes(), at any level:
+
+    >>> tree = WBSTree.from_items([
+    ...     {"id": 1, "building": "A", "phase": "SUB", "item": "Footing", "amount": 100.0},
+    ...     {"id": 2, "building": "A", "phase": "SUP", "item": "Column", "amount": 50.0},
+    ...     {"id": 3, "building": "B", "phase": "SUP", "item": "Column", "amount": 25.0},
+    ... ], project_name="Hostel")
+    >>> for level in LEVELS:
+    ...     print(level, tree.totals_by(level).values.tolist(), tree.to_abstract(level)["Amount (₹)"].tolist())
+    project [['Hostel', 3, 175.0]] [175.0, 175.0]
+    building [['A', 2, 150.0], ['B', 1, 25.0]] [150.0, 25.0, 175.0]
+    floor [['All Floors', 3, 175.0]] [175.0, 175.0]
+    phase [['SUB', 1, 100.0], ['SUP', 2, 75.0]] [100.0, 75.0, 175.0]
+    element [['Footing', 1, 100.0], ['Column', 2, 75.0]] [100.0, 75.0, 175.0]
+"""
+
+from __future__ import annotations
+
+from typing import Dict, Hashable, Iterable, List, Optional, Tuple
+
+import pandas as pd
+
+LEVELS = ("project", "building", "floor", "phase", "element")
+ROOT = 0
+
+DEFAULT_BUILDING = "Main Building"
+DEFAULT_FLOOR = "All Floors"
+
+
+def item_path(item: dict) -> Tuple[str, str, str, str]:
+    """(building, floor, phase, element) for a QTO item dict."""
+    return (
+        str(item.get("building") or DEFAULT_BUILDING),
+        str(item.get("floor") or DEFAULT_FLOOR),
+        str(item.get("phase", "")),
+        str(item.get("item", "")),
+    )
+
+
+class WBSTree:
+    """
+    Integer-node WBS tree with cached subtotals.
+
+    Items are registered under a leaf (element) node by their item ID;
+    the tree stores only (leaf, amount) per item, not the item itself.
+    """
+
+    def __init__(self, project_name: str = "Project"):
+        self.parent: List[int] = [-1]
+        self.level: List[int] = [0]
+        self.name: List[str] = [project_name]
+        self.subtotal: List[float] = [0.0]
+        self.count: List[int] = [0]
+        self._children: List[Dict[str, int]] = [{}]
+        self._level_nodes: List[List[int]] = [[ROOT]] + [[] for _ in LEVELS[1:]]
+        self._items: Dict[Hashable, Tuple[int, float, int]] = {}
+
+    # -----------------------------
+    # Construction
+    # -----------------------------
+    @classmethod
+    def from_items(cls, items: Iterable[dict], project_name: str = "Project") -> "WBSTree":
+        """Build from QTO item dicts (id, phase, item, amount, optional building/floor)."""
+        tree = cls(project_name)
+        for it in items:
+            tree.add_item(it["id"], item_path(it), float(it.get("amount", 0.0)))
+        return tree
+
+    @classmethod
+    def from_boq_items(cls, items: Iterable, project_name: str = "Project") -> "WBSTree":
+        """Build from BOQGenerator.items (wbs_level1 → phase, wbs_level2 → element)."""
+        tree = cls(project_name)
+        for it in items:
+            path = (DEFAULT_BUILDING, DEFAULT_FLOOR, it.wbs_level1, it.wbs_level2 or it.description)
+            tree.add_item(it.item_no, path, float(it.amount))
+        return tree
+
+    def node_for(self, path: Tuple[str, ...]) -> int:
+        """Node ID for a path below the project root, creating nodes as needed."""
+        node = ROOT
+        for name in path:
+            child = self._children[node].get(name)
+            if child is None:
+                child = len(self.parent)
+                self.parent.append(node)
+                self.level.append(self.level[node] + 1)
+                self.name.append(name)
+                self.subtotal.append(0.0)
+                self.count.append(0)
+                self._children.append({})
+                self._children[node][name] = child
+                self._level_nodes[self.level[child]].append(child)
+            node = child
+        return node
+
+    def find(self, path: Tuple[str, ...]) -> Optional[int]:
+        """Node ID for a path, or None if it does not exist."""
+        node = ROOT
+        for name in path:
+            node = self._children[node].get(name)
+            if node is None:
+                return None
+        return node
+
+    # -----------------------------
+    # Incremental updates
+    # -----------------------------
+    def _propagate(self, node: int, delta_amount: float, delta_count: int) -> None:
+        while node != -1:
+            self.subtotal[node] += delta_amount
+            self.count[node] += delta_count
+            node = self.parent[node]
+
+    def add_item(self, item_id: Hashable, path: Tuple[str, ...], amount: float, count: int = 1) -> int:
+        """
+        Register an item under path; returns its leaf node.
+
+        count > 1 registers one weighted entry standing for several items
+        (e.g. a replicated floor's element group).
+        """
+        if item_id in self._items:
+            raise KeyError(f"Item {item_id!r} is already in the WBS tree")
+        leaf = self.node_for(path)
+        self._items[item_id] = (leaf, float(amount), int(count))
+        self._propagate(leaf, float(amount), int(count))
+        return leaf
+
+    def update_item(
+        self, item_id: Hashable, amount: float | None = None, path: Tuple[str, ...] | None = None
+    ) -> None:
+        """Change an item's amount and/or move it to another path."""
+        leaf, old, count = self._items[item_id]
+        new_amount = old if amount is None else float(amount)
+        if path is not None:
+            new_leaf = self.node_for(path)
+            if new_leaf != leaf:
+                self._propagate(leaf, -old, -count)
+                self._propagate(new_leaf, new_amount, count)
+                self._items[item_id] = (new_leaf, new_amount, count)
+                return
+        self._propagate(leaf, new_amount - old, 0)
+        self._items[item_id] = (leaf, new_amount, count)
+
+    def remove_item(self, item_id: Hashable) -> None:
+        leaf, old, count = self._items.pop(item_id)
+        self._propagate(leaf, -old, -count)
+
+    def __contains__(self, item_id: Hashable) -> bool:
+        return item_id in self._items
+
+    def __len__(self) -> int:
+        """Number of registered entries (weighted entries count once)."""
+        return len(self._items)
+
+    # -----------------------------
+    # Queries
+    # -----------------------------
+    @property
+    def total(self) -> float:
+        return self.subtotal[ROOT]
+
+    def children(self, node: int = ROOT) -> List[int]:
+        return list(self._children[node].values())
+
+    def path(self, node: int) -> Tuple[str, ...]:
+        """Names from the level below the project down to node."""
+        out = []
+        while node > ROOT:
+            out.append(self.name[node])
+            node = self.parent[node]
+        return tuple(reversed(out))
+
+    def rollup(self, level: str = "phase") -> pd.DataFrame:
+        """
+        One row per node at level: path columns, items, amount (in creation order).
+
+        The project level is the root alone, with its name as the path column.
+        """
+        depth = LEVELS.index(level)
+        columns = LEVELS[1 : depth + 1] if depth else LEVELS[:1]
+        nodes = [n for n in self._level_nodes[depth] if self.count[n]]
+        rows = []
+        for n in nodes:
+            p = self.path(n) if depth else (self.name[n],)
+            rows.append(dict(zip(columns, p), node=n, items=self.count[n], amount=self.subtotal[n]))
+        return pd.DataFrame(rows, columns=["node", *columns, "items", "amount"])
+
+    def totals_by(self, level: str = "phase") -> pd.DataFrame:
+        """Subtotals grouped by node name at level (e.g. each phase across all floors)."""
+        df = self.rollup(level)
+        return df.groupby(level, sort=False, as_index=False)[["items", "amount"]].sum()
+
+    # -----------------------------
+    # Exports
+    # -----------------------------
+    def to_abstract(self, level: str = "phase") -> pd.DataFrame:
+        """
+        Abstract of cost (Form 5A layout) with numeric amounts.
+
+        Columns: S.No., Description, No.Items, Amount (₹); last row is the total.
+        """
+        df = self.totals_by(level)
+        out = pd.DataFrame(
+            {
+                "S.No.": [str(i) for i in range(1, len(df) + 1)],
+                "Description": df[level].astype(str),
+                "No.Items": df["items"].astype(int),
+                "Amount (₹)": df["amount"].astype(float),
+            }
+        )
+        total = pd.DataFrame(
+            [{"S.No.": "TOTAL", "Description": "CIVIL WORKS", "No.Items": self.count[ROOT], "Amount (₹)": self.total}]
+        )
+        return pd.concat([out, total], ignore_index=True)
+
+    def section_totals(self, level: str = "phase") -> pd.DataFrame:
+        """Section totals in the shape BOQGenerator.to_excel_bytes() expects."""
+        df = self.totals_by(level)
+        return pd.DataFrame({"WBS Level 1": df[level], "Amount (₹)": df["amount"]})